@@ -1,7 +1,18 @@
+import contextvars
 import datetime as dt
 import json
-from app.schemas import WeeklyPlanSchema, ActionSchema, RiskSchema, ContextPacketSchema
-from app.llm.client import get_llm_client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator
+from pydantic import BaseModel, ValidationError
+from app.schemas import (
+    WeeklyPlanSchema, ActionSchema, RiskSchema, ContextPacketSchema,
+    ActionsPartSchema, RisksPartSchema, SummaryPartSchema,
+)
+from app.settings import settings
+from app.instrumentation.tracing import traced
+from app.logging import get_logger
+
+log = get_logger("weekly_plan")
 
 SYSTEM_PROMPT = """You are EM-Aide, a decision-support copilot for Engineering Managers.
 You receive ONLY sanitized delivery signals and anonymized entity references. Do not ask for code or ticket text.
@@ -12,29 +23,38 @@ Output MUST be valid JSON matching the provided schema. No markdown. No extra te
 def _week_start(d: dt.date) -> dt.date:
     return d - dt.timedelta(days=d.weekday())
 
-def generate_weekly_plan(context: ContextPacketSchema) -> WeeklyPlanSchema:
-    llm = get_llm_client()
+_ACTION_HINT = {
+    "title": "string",
+    "rationale": "string",
+    "evidence": ["string"],
+    "steps": ["string"],
+    "expected_impact": "string",
+    "risk": "string",
+    "confidence": 0.0
+}
+
+_RISK_HINT = {
+    "title": "string",
+    "description": "string",
+    "severity": "low|medium|high",
+    "likelihood": 0.0,
+    "signals": ["string"],
+    "mitigations": ["string"]
+}
+
+_RULES = """Rules:
+- Use only the provided signals/entities.
+- Actions must be operational and safe (no destructive automation).
+- Evidence should cite signal names and entity IDs (e.g., 'pr_stale_count', 'PR-123').
+- Confidence: 0.0–1.0.
+- Output ONLY JSON."""
 
+def _build_user_prompt(context: ContextPacketSchema) -> str:
     schema_hint = {
         "week_start": "YYYY-MM-DD",
         "generated_at": "ISO-8601 datetime",
-        "top_actions": [{
-            "title": "string",
-            "rationale": "string",
-            "evidence": ["string"],
-            "steps": ["string"],
-            "expected_impact": "string",
-            "risk": "string",
-            "confidence": 0.0
-        }],
-        "top_risks": [{
-            "title": "string",
-            "description": "string",
-            "severity": "low|medium|high",
-            "likelihood": 0.0,
-            "signals": ["string"],
-            "mitigations": ["string"]
-        }],
+        "top_actions": [_ACTION_HINT],
+        "top_risks": [_RISK_HINT],
         "summary": "string"
     }
 
@@ -45,20 +65,97 @@ Task:
 1) Propose the TOP 3 actions for the coming work week.
 2) Provide TOP 5 risks with mitigations.
 
-Rules:
-- Use only the provided signals/entities.
-- Actions must be operational and safe (no destructive automation).
-- Evidence should cite signal names and entity IDs (e.g., 'pr_stale_count', 'PR-123').
-- Confidence: 0.0–1.0.
-- Output ONLY JSON.
+{_RULES}
+
+Schema hint:
+{json.dumps(schema_hint, indent=2)}
+"""
+    return user_prompt
+
+# Decomposed mode: one small structured call per part, issued concurrently.
+_PARTS: dict[str, tuple[type[BaseModel], str, dict]] = {
+    "actions": (ActionsPartSchema, "Propose the TOP 3 actions for the coming work week.", {"top_actions": [_ACTION_HINT]}),
+    "risks": (RisksPartSchema, "Provide TOP 5 risks with mitigations.", {"top_risks": [_RISK_HINT]}),
+    "summary": (SummaryPartSchema, "Summarize the team's delivery health for the coming week in 2-4 sentences.", {"summary": "string"}),
+}
+
+def _build_part_prompt(context_json: str, task: str, schema_hint: dict) -> str:
+    return f"""ContextPacket (sanitized JSON):
+{context_json}
+
+Task:
+{task}
+
+{_RULES}
 
 Schema hint:
 {json.dumps(schema_hint, indent=2)}
 """
 
-    plan = llm.generate_structured(SYSTEM_PROMPT, user_prompt, WeeklyPlanSchema)
+@traced("generate_plan_part")
+def _generate_part(llm, part: str, context_json: str) -> BaseModel:
+    schema, task, schema_hint = _PARTS[part]
+    user_prompt = _build_part_prompt(context_json, task, schema_hint)
+    attempts = settings.llm_part_retries + 1
+    for attempt in range(1, attempts + 1):
+        try:
+            return llm.generate_structured(SYSTEM_PROMPT, user_prompt, schema)
+        except Exception as exc:
+            log.warning(f"plan part '{part}' failed (attempt {attempt}/{attempts}): {exc}")
+            if attempt == attempts:
+                raise
+
+def _generate_decomposed(context: ContextPacketSchema) -> WeeklyPlanSchema:
+    from app.llm.client import get_llm_client
+    llm = get_llm_client()
+    context_json = context.model_dump_json(indent=2)
+    with ThreadPoolExecutor(max_workers=len(_PARTS)) as pool:
+        # Each part runs in the caller's context so its spans join the plan's trace
+        futures = {part: pool.submit(contextvars.copy_context().run, _generate_part, llm, part, context_json)
+                   for part in _PARTS}
+        parts = {part: f.result() for part, f in futures.items()}
+
+    return WeeklyPlanSchema(
+        week_start=_week_start(dt.date.today()),
+        generated_at=dt.datetime.utcnow(),
+        top_actions=parts["actions"].top_actions,
+        top_risks=parts["risks"].top_risks,
+        summary=parts["summary"].summary,
+    )
+
+@traced("generate_weekly_plan")
+def generate_weekly_plan(context: ContextPacketSchema) -> WeeklyPlanSchema:
+    if settings.llm_plan_decomposed:
+        return _generate_decomposed(context)
+
+    # httpx and the LLM client load on first use, not at API/worker start
+    from app.llm.client import get_llm_client
+    llm = get_llm_client()
+    plan = llm.generate_structured(SYSTEM_PROMPT, _build_user_prompt(context), WeeklyPlanSchema)
 
     # Fill computed week_start if missing/invalid
     if not plan.week_start:
         plan.week_start = _week_start(dt.date.today())
     return plan
+
+_STREAM_ITEMS = {"top_actions": ("action", ActionSchema), "top_risks": ("risk", RiskSchema)}
+
+def stream_weekly_plan(context: ContextPacketSchema) -> Iterator[tuple[str, Any]]:
+    """Yields ("action", ActionSchema) / ("risk", RiskSchema) as they complete,
+    then ("plan", WeeklyPlanSchema) once the whole response has been validated."""
+    from app.llm.client import get_llm_client, stream_structured
+    llm = get_llm_client()
+    events = stream_structured(llm, SYSTEM_PROMPT, _build_user_prompt(context), WeeklyPlanSchema, _STREAM_ITEMS)
+    for field, item in events:
+        if field == "result":
+            plan = item
+            if not plan.week_start:
+                plan.week_start = _week_start(dt.date.today())
+            yield "plan", plan
+            continue
+        kind, schema = _STREAM_ITEMS[field]
+        try:
+            yield kind, schema.model_validate(item)
+        except ValidationError:
+            # Partial items that don't validate are dropped here; the final plan is still validated as a whole.
+            continue
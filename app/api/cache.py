@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.settings import settings
+from app.services.data_versions import get_data_versions
+from app.util import sha256_64
+
+class LRUCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> bytes | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: tuple, value: bytes) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+response_cache = LRUCache(settings.response_cache_max_entries)
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    # Weak comparison: ignore W/ prefixes on either side
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def _cache_key(request: Request, scopes: list[str], versions: dict[str, int]) -> tuple[tuple, dict]:
+    version_tag = ",".join(f"{scope}={versions[scope]}" for scope in scopes)
+    key = (request.url.path, str(request.query_params), version_tag)
+    etag = f'W/"{sha256_64("|".join(key))[:20]}"'
+    return key, {"ETag": etag, "Cache-Control": "no-cache"}
+
+def _cached_response(request: Request, key: tuple, headers: dict) -> Response | None:
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    body = response_cache.get(key)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers=headers)
+    return None
+
+def _store_response(key: tuple, headers: dict, result: Any) -> Response:
+    if isinstance(result, Response):
+        return result  # e.g. a 404; not cached
+    body = orjson.dumps(result, default=jsonable_encoder)
+    response_cache.put(key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def cached_json(request: Request, db: Session, scopes: list[str], build: Callable[[], Any]) -> Response:
+    """Serve a GET from the in-process cache keyed by the data versions of `scopes`.
+    Versions change whenever ingest/snapshot/plan writes touch a scope, so entries never go stale;
+    superseded ones simply age out of the LRU. `build` may return a Response to bypass caching."""
+    key, headers = _cache_key(request, scopes, get_data_versions(db, scopes))
+    return _cached_response(request, key, headers) or _store_response(key, headers, build())
+
+async def cached_json_async(request: Request, db: AsyncSession, scopes: list[str],
+                            build: Callable[[], Awaitable[Any]]) -> Response:
+    """cached_json for async routes; `build` is awaited, typically `db.run_sync(<sync query helper>, ...)`."""
+    versions = await db.run_sync(get_data_versions, scopes)
+    key, headers = _cache_key(request, scopes, versions)
+    return _cached_response(request, key, headers) or _store_response(key, headers, await build())
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Callable
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+from app import models
+from app.api.cache import cached_json_async
+from app.api.deps import async_read_db_dep, read_sessionmaker
+from app.api.health import _health_body
+from app.api.metrics import _latest_metrics
+from app.api.plans import _context_preview, _context_preview_allowed, _latest_plan_body
+from app.api.teams import _llm_run_rows, _pull_request_map, _team_rows
+from app.services.data_versions import TEAMS_SCOPE, team_scope
+from app.settings import settings
+from app.logging import get_logger
+
+log = get_logger("dashboard")
+
+router = APIRouter(tags=["dashboard"])
+
+# section -> loader(db, team_id); each runs on its own session so they can be queried concurrently
+SECTIONS: dict[str, Callable[[Session, int], object]] = {
+    "teams": lambda db, team_id: _team_rows(db),
+    "health": lambda db, team_id: _health_body(),
+    "metrics": _latest_metrics,
+    "plan": _latest_plan_body,
+    "pull_requests": _pull_request_map,
+    "llm_runs": _llm_run_rows,
+    "context": lambda db, team_id: _context_preview(db, team_id) if _context_preview_allowed() else None,
+}
+
+def _parse_fields(fields: str | None) -> list[str]:
+    if not fields:
+        return list(SECTIONS)
+    wanted = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in wanted if f not in SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(wanted))
+
+async def _load_section(factory: async_sessionmaker, limit: asyncio.Semaphore, name: str, team_id: int):
+    async with limit, factory() as db:
+        return await db.run_sync(SECTIONS[name], team_id)
+
+async def _gather(factory: async_sessionmaker, team_id: int, names: list[str]) -> tuple[dict, dict]:
+    # Caps the pooled connections one dashboard request holds at once
+    limit = asyncio.Semaphore(settings.dashboard_max_connections)
+    results = await asyncio.gather(*(_load_section(factory, limit, name, team_id) for name in names),
+                                   return_exceptions=True)
+    data, errors = {}, {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            log.warning(f"dashboard section {name} failed for team {team_id}: {result}")
+            data[name] = None
+            errors[name] = str(result)
+        else:
+            data[name] = result
+    return data, errors
+
+async def _dashboard(request: Request, db: AsyncSession, factory: async_sessionmaker, team_id: int,
+                     names: list[str], extra: dict | None = None):
+    async def build():
+        await db.rollback()  # the version check is done; give its connection back while sections load
+        data, errors = await _gather(factory, team_id, names)
+        data = {**(extra or {}), **data}
+        if errors:
+            # Partial result: return what loaded, but don't cache it
+            return ORJSONResponse(content={**data, "errors": errors})
+        return data
+
+    return await cached_json_async(request, db, [TEAMS_SCOPE, team_scope(team_id)], build)
+
+@router.get("/teams/{team_id}/dashboard")
+async def dashboard(team_id: int, request: Request, fields: str | None = None,
+                    db: AsyncSession = Depends(async_read_db_dep),
+                    factory: async_sessionmaker = Depends(read_sessionmaker)):
+    """Everything the dashboard renders in one response. `fields` is a comma-separated subset of
+    teams, health, metrics, plan, pull_requests, llm_runs, context (default: all)."""
+    return await _dashboard(request, db, factory, team_id, _parse_fields(fields))
+
+def _default_team_id(db: Session) -> int | None:
+    return db.query(func.min(models.Team.id)).scalar()
+
+@router.get("/dashboard")
+async def default_dashboard(request: Request, fields: str | None = None,
+                            db: AsyncSession = Depends(async_read_db_dep),
+                            factory: async_sessionmaker = Depends(read_sessionmaker)):
+    """The dashboard of the team the UI opens on (the first one), plus its `team_id`, so the first page
+    load doesn't need a separate /teams round trip. `team_id` is null when no team exists yet."""
+    names = _parse_fields(fields)
+    team_id = await db.run_sync(_default_team_id)
+    if team_id is None:
+        return {"team_id": None, **{name: [] if name == "teams" else None for name in names}}
+    return await _dashboard(request, db, factory, team_id, names, extra={"team_id": team_id})
@@ -1,8 +1,55 @@
 # app/api/deps.py
-from app.db import get_db  # adjust to your project
+from app.db import get_db, get_async_db, AsyncSessionLocal, AsyncReadSessionLocal, replica_lag_seconds  # adjust to your project
+from app.settings import settings
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
-from fastapi import Depends
+from fastapi import Depends, Request, Response
+from app.instrumentation.profiling import PROFILE_HEADER, profile_requested
+from app.services.jobs import jobs_settling
 
 DbDep = Session
 def db_dep(db: Session = Depends(get_db)) -> Session:
     return db
+
+async def async_db_dep(db: AsyncSession = Depends(get_async_db)) -> AsyncSession:
+    return db
+
+def job_profile_payload(request: Request) -> dict | None:
+    """Job-submitting endpoints pass this as the payload: with a valid profiling header the worker
+    profiles the job (see app/instrumentation/profiling.py)."""
+    return {"profile": True} if profile_requested(request.headers.get(PROFILE_HEADER)) else None
+
+# Set when a write is requested, holding the ids of the jobs doing it (dot-separated). The same browser
+# reads from the primary until those jobs have finished and the replica has had time to catch up.
+READ_YOUR_WRITES_COOKIE = "emaide_ryw"
+READ_YOUR_WRITES_MAX_JOBS = 20
+
+def _pinned_job_ids(request: Request) -> list[int]:
+    value = request.cookies.get(READ_YOUR_WRITES_COOKIE) or ""
+    return [int(v) for v in value.split(".") if v.isdigit()]
+
+def mark_read_your_writes(request: Request, response: Response, job_id: int) -> None:
+    ids = list(dict.fromkeys([*_pinned_job_ids(request), job_id]))[-READ_YOUR_WRITES_MAX_JOBS:]
+    response.set_cookie(READ_YOUR_WRITES_COOKIE, ".".join(map(str, ids)),
+                        max_age=settings.read_your_writes_max_seconds, httponly=True, samesite="lax")
+
+async def _writes_pending(request: Request) -> bool:
+    ids = _pinned_job_ids(request)
+    if not ids:
+        return False
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(jobs_settling, ids, settings.read_your_writes_seconds)
+
+async def read_sessionmaker(request: Request) -> async_sessionmaker:
+    """Replica session factory when a replica is configured, within REPLICA_MAX_LAG_SECONDS and none of
+    the client's pinned jobs is still running or settling; otherwise the primary."""
+    if AsyncReadSessionLocal is None or await _writes_pending(request):
+        return AsyncSessionLocal
+    lag = await replica_lag_seconds()
+    if lag is None or lag > settings.replica_max_lag_seconds:
+        return AsyncSessionLocal
+    return AsyncReadSessionLocal
+
+async def async_read_db_dep(factory: async_sessionmaker = Depends(read_sessionmaker)):
+    async with factory() as db:
+        yield db
@@ -3,10 +3,13 @@ from fastapi import APIRouter
 
 router = APIRouter(tags=["health"])
 
-@router.get("/health")
-def health():
+def _health_body() -> dict:
     return {
         "status": "ok",
         "project": "EM-Aide",
         "environment": os.getenv("ENVIRONMENT", "unknown"),
     }
+
+@router.get("/health")
+async def health():
+    return _health_body()
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.deps import async_db_dep
+from app.db import AsyncSessionLocal
+from app.services.jobs import TERMINAL_STATUSES, get_job, job_to_dict
+
+router = APIRouter(tags=["jobs"])
+
+EVENTS_POLL_SECONDS = 1.0
+EVENTS_MAX_SECONDS = 900
+
+def _job_dict(db, job_id: int) -> dict | None:
+    job = get_job(db, job_id)
+    return job_to_dict(job) if job else None
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: int, db: AsyncSession = Depends(async_db_dep)):
+    data = await db.run_sync(_job_dict, job_id)
+    if not data:
+        raise HTTPException(status_code=404, detail="job not found")
+    return data
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: int):
+    async def body():
+        last = None
+        deadline = time.monotonic() + EVENTS_MAX_SECONDS
+        while time.monotonic() < deadline:
+            # Short-lived session per poll so an open stream doesn't pin a pooled connection.
+            async with AsyncSessionLocal() as db:
+                data = await db.run_sync(_job_dict, job_id)
+            if data is None:
+                yield f"event: error\ndata: {json.dumps({'detail': 'job not found'})}\n\n"
+                return
+            state = (data["status"], data["progress"])
+            if state != last:
+                last = state
+                yield f"event: status\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+            if data["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
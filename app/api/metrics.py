@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app import models
-from app.api.deps import db_dep
-from app.metrics.compute import snapshot_metrics
+from app.api.cache import cached_json_async
+from app.api.deps import async_read_db_dep, db_dep, job_profile_payload, mark_read_your_writes
+from app.services.data_versions import team_scope
+from app.services.jobs import PRIORITY_INTERACTIVE, submit_job
+from app.instrumentation.prom import exposition
 
 router = APIRouter(tags=["metrics"])
 
-@router.post("/teams/{team_id}/metrics/snapshot")
-def snapshot(team_id: int, db: Session = Depends(db_dep)):
-    return snapshot_metrics(team_id=team_id, db=db)
+@router.post("/teams/{team_id}/metrics/snapshot", status_code=status.HTTP_202_ACCEPTED)
+def snapshot(team_id: int, request: Request, response: Response, db: Session = Depends(db_dep)):
+    job, created = submit_job(db, team_id, "metrics", dedupe_key="snapshot", priority=PRIORITY_INTERACTIVE, owner="api",
+                              payload=job_profile_payload(request))
+    mark_read_your_writes(request, response, job.id)
+    return {"job_id": job.id, "status": job.status, "coalesced": not created}
 
-@router.get("/teams/{team_id}/metrics/latest")
-def latest(team_id: int, db: Session = Depends(db_dep)):
+def _latest_metrics(db: Session, team_id: int) -> list[dict]:
     rows = (
         db.query(models.MetricSnapshot)
         .filter(models.MetricSnapshot.team_id == team_id)
@@ -22,3 +28,13 @@ def latest(team_id: int, db: Session = Depends(db_dep)):
 
     # return a compact list (name/value/date)
     return [{"name": r.name, "value": r.value, "as_of_date": str(r.as_of_date)} for r in rows]
+
+@router.get("/teams/{team_id}/metrics/latest")
+async def latest(team_id: int, request: Request, db: AsyncSession = Depends(async_read_db_dep)):
+    return await cached_json_async(request, db, [team_scope(team_id)], lambda: db.run_sync(_latest_metrics, team_id))
+
+@router.get("/metrics/prom", include_in_schema=False)
+async def prom():
+    # Prometheus exposition for this API process (the worker exports its own, see WORKER_METRICS_PORT)
+    body, content_type = exposition()
+    return Response(body, media_type=content_type)
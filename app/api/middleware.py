@@ -0,0 +1,47 @@
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.instrumentation.profiling import PROFILE_HEADER, profile_path, profile_requested, profiled
+
+class SelectiveGZipMiddleware:
+    """GZip responses above `minimum_size`, except Server-Sent Events: GZip buffers the body, which
+    would hold back streamed plan/job events until the stream ends."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int, compresslevel: int = 6) -> None:
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            accept = dict(scope.get("headers") or []).get(b"accept", b"")
+            if b"text/event-stream" not in accept:
+                await self.gzip(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+class ProfilingMiddleware:
+    """Samples the whole process while a request carrying `X-Profile: <PROFILE_TOKEN>` runs (async
+    handlers run on the event loop thread, sync ones in the threadpool, so all threads are sampled).
+    The profile's path comes back in the X-Profile-File response header."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = dict(scope.get("headers") or []).get(PROFILE_HEADER.encode())
+        if token is None or not profile_requested(token.decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        path = profile_path(f"{scope['method']}-{scope['path'].strip('/')}")
+
+        async def send_with_path(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-File", path)
+            await send(message)
+
+        with profiled(scope["path"], path=path):
+            await self.app(scope, receive, send_with_path)
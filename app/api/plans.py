@@ -1,33 +1,88 @@
 import os
 import json
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app import models
-from app.api.deps import db_dep
-from app.services.plans import PlanInProgress, run_weekly_plan, get_latest_plan, get_llm_context_preview
+from app.api.cache import cached_json_async
+from app.api.deps import async_read_db_dep, db_dep, job_profile_payload, mark_read_your_writes
+from app.services.data_versions import team_scope
+from app.db import SessionLocal
+from app.services.jobs import JobBusy
+from app.services.plans import submit_plan_job, stream_weekly_plan_run, get_latest_plan, get_llm_context_preview
 
 router = APIRouter(tags=["plans"])
 
-@router.post("/teams/{team_id}/plan/run")
-def run(team_id: int, db: Session = Depends(db_dep)):
+@router.post("/teams/{team_id}/plan/run", status_code=status.HTTP_202_ACCEPTED)
+def run(team_id: int, request: Request, response: Response, db: Session = Depends(db_dep)):
+    # Executed by the worker; poll /jobs/{job_id} or subscribe to /jobs/{job_id}/events.
+    job, created = submit_plan_job(db=db, team_id=team_id, owner="api", payload=job_profile_payload(request))
+    mark_read_your_writes(request, response, job.id)
+    return {"job_id": job.id, "status": job.status, "coalesced": not created}
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.get("/teams/{team_id}/plan/stream")
+def stream(team_id: int, request: Request):
+    # Own session: the request-scoped one is closed before a streaming body is sent.
+    db = SessionLocal()
     try:
-        wp = run_weekly_plan(db=db, team_id=team_id, owner="api")
-        return {"weekly_plan_id": wp.id, "week_start": str(wp.week_start)}
-    except PlanInProgress as exc:
+        job, events = stream_weekly_plan_run(db=db, team_id=team_id, owner="api:stream")
+    except JobBusy as exc:
+        db.close()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
 
-@router.get("/teams/{team_id}/plan/latest")
-def latest(team_id: int, db: Session = Depends(db_dep)):
+    def body():
+        try:
+            for kind, item in events:
+                if kind == "plan":
+                    yield _sse("plan", {"weekly_plan_id": item.id, "plan": item.plan_json})
+                else:
+                    yield _sse(kind, item.model_dump(mode="json"))
+        except Exception as exc:
+            yield _sse("error", {"detail": str(exc)})
+        finally:
+            db.close()
+
+    response = StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    mark_read_your_writes(request, response, job.id)
+    return response
+
+def _latest_plan_body(db: Session, team_id: int) -> dict | None:
     wp = get_latest_plan(db, team_id)
-    if not wp:
-        return JSONResponse({"error": "no plan yet"}, status_code=404)
-    return JSONResponse(content={"weekly_plan_id": wp.id, "plan": wp.plan_json})
+    return {"weekly_plan_id": wp.id, "plan": wp.plan_json} if wp else None
+
+@router.get("/teams/{team_id}/plan/latest")
+async def latest(team_id: int, request: Request, db: AsyncSession = Depends(async_read_db_dep)):
+    async def build():
+        body = await db.run_sync(_latest_plan_body, team_id)
+        if not body:
+            return JSONResponse({"error": "no plan yet"}, status_code=404)
+        # v1 contract: the plan as a JSON string
+        return {**body, "plan": orjson.dumps(body["plan"]).decode("utf-8")}
+    return await cached_json_async(request, db, [team_scope(team_id)], build)
+
+@router.get("/v2/teams/{team_id}/plan/latest")
+async def latest_v2(team_id: int, request: Request, db: AsyncSession = Depends(async_read_db_dep)):
+    async def build():
+        body = await db.run_sync(_latest_plan_body, team_id)
+        return body if body else JSONResponse({"error": "no plan yet"}, status_code=404)
+    return await cached_json_async(request, db, [team_scope(team_id)], build)
+
+def _context_preview_allowed() -> bool:
+    return os.getenv("ENVIRONMENT") in ("local", "dev")
+
+def _context_preview(db: Session, team_id: int) -> dict:
+    return get_llm_context_preview(db, team_id) or {}
 
 @router.get("/teams/{team_id}/llm/context/preview")
-def api_llm_context_preview(team_id: int, db: Session = Depends(db_dep)):
-    if os.getenv("ENVIRONMENT") not in ("local", "dev"):
+async def api_llm_context_preview(team_id: int, db: AsyncSession = Depends(async_read_db_dep)):
+    if not _context_preview_allowed():
         raise HTTPException(status_code=403, detail="Disabled in this environment")
-
-    packet = get_llm_context_preview(db, team_id)
-    return json.loads(packet.content_json) if packet else {}
+    return await db.run_sync(_context_preview, team_id)
@@ -1,30 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy.orm import Session
-from app.api.deps import db_dep
-from app import models
-from app.settings import settings
-from app.ingest.git_ingest import SyncInProgress, sync_team_git  # adjust
-from app.ingest.jira_ingest import sync_jira
+from app.api.deps import db_dep, job_profile_payload, mark_read_your_writes
+from app.services.jobs import PRIORITY_INTERACTIVE, submit_job
 
 router = APIRouter(tags=["sync"])
 
-@router.post("/teams/{team_id}/sync/git")
-def sync_team_git_alias(team_id: int, db: Session = Depends(db_dep)):
-    try:
-        return sync_team_git(team_id=team_id, db=db, owner="api")
-    except SyncInProgress as exc:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=str(exc),
-        ) from exc
+# Syncs run on the worker through the job queue; poll /jobs/{job_id} for the result.
+# A sync already waiting in the queue for the team absorbs repeated clicks.
 
-@router.post("/teams/{team_id}/sync/jira")
-def sync_team_jira_alias(team_id: int, db: Session = Depends(db_dep)):
-    try:
-        m = sync_jira(team_id=team_id, db=db, owner="api")
-        return {"issues_synced": m}
-    except SyncInProgress as exc:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=str(exc),
-        ) from exc
+@router.post("/teams/{team_id}/sync/git", status_code=status.HTTP_202_ACCEPTED)
+def sync_team_git_alias(team_id: int, request: Request, response: Response, db: Session = Depends(db_dep)):
+    job, created = submit_job(db, team_id, "sync_git", dedupe_key="sync", priority=PRIORITY_INTERACTIVE, owner="api",
+                              payload=job_profile_payload(request))
+    mark_read_your_writes(request, response, job.id)
+    return {"job_id": job.id, "status": job.status, "coalesced": not created}
+
+@router.post("/teams/{team_id}/sync/jira", status_code=status.HTTP_202_ACCEPTED)
+def sync_team_jira_alias(team_id: int, request: Request, response: Response, db: Session = Depends(db_dep)):
+    job, created = submit_job(db, team_id, "sync_jira", dedupe_key="sync", priority=PRIORITY_INTERACTIVE, owner="api",
+                              payload=job_profile_payload(request))
+    mark_read_your_writes(request, response, job.id)
+    return {"job_id": job.id, "status": job.status, "coalesced": not created}
@@ -1,35 +1,126 @@
-from fastapi import APIRouter, Depends
+import base64
+import datetime as dt
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.api.deps import db_dep
+from app.api.cache import cached_json_async
+from app.api.deps import async_read_db_dep
+from app.services.data_versions import TEAMS_SCOPE, team_scope
 from app import models  # adjust
+from app.util import strip_url_credentials
 
 router = APIRouter(tags=["teams"])
 
+def _team_rows(db: Session, *, after: int | None = None, limit: int | None = None) -> list[dict]:
+    # Column projection + outer join: one query instead of lazy-loading jira_config per team
+    q = (db.query(models.Team.id, models.Team.name, models.JiraConfig.base_url)
+         .outerjoin(models.JiraConfig, models.JiraConfig.team_id == models.Team.id)
+         .order_by(models.Team.id))
+    if after is not None:
+        q = q.filter(models.Team.id > after)
+    if limit is not None:
+        q = q.limit(limit)
+    return [{"id": id_, "name": name, "jira_base_url": base_url or None} for id_, name, base_url in q]
+
 @router.get("/teams")
-def list_teams(db: Session = Depends(db_dep)):
-    teams = db.query(models.Team).all()
-    rows = []
-    for t in teams:
-        jira_base_url = None
-        if t.jira_config and t.jira_config.base_url:
-            jira_base_url = t.jira_config.base_url
-        rows.append({"id": t.id, "name": t.name, "jira_base_url": jira_base_url})
-    return rows
+async def list_teams(request: Request, db: AsyncSession = Depends(async_read_db_dep)):
+    return await cached_json_async(request, db, [TEAMS_SCOPE], lambda: db.run_sync(_team_rows))
 
-@router.get("/teams/{team_id}/git/pull/requests")
-def api_git_pull_requests(team_id: int, db: Session = Depends(db_dep)):
-    get_web_url = lambda repo: repo.api_base_url.replace("api.", "").replace("/api/v3", "")
-    repos = db.query(models.GitRepo).filter_by(team_id=team_id).all()
-    repo_map = {repo.id: {"owner": repo.owner, "repo": repo.repo, "api_base_url": repo.api_base_url, "web_base_url": get_web_url(repo), "pull_requests": []} for repo in repos}
-    prs = db.query(models.PullRequest).filter_by(team_id=team_id).all()
-    for pr in prs:
-        repo_info = repo_map.get(pr.git_repo_id)
+@router.get("/v2/teams")
+async def list_teams_page(request: Request, after: int | None = None, limit: int = Query(50, ge=1, le=500),
+                          db: AsyncSession = Depends(async_read_db_dep)):
+    """Keyset page of teams ordered by id; pass `next_cursor` back as `after`."""
+    async def build():
+        rows = await db.run_sync(_team_rows, after=after, limit=limit + 1)
+        return {"items": rows[:limit], "next_cursor": rows[limit - 1]["id"] if len(rows) > limit else None}
+    return await cached_json_async(request, db, [TEAMS_SCOPE], build)
+
+def _web_url(api_base_url: str) -> str:
+    return strip_url_credentials(api_base_url).replace("api.", "").replace("/api/v3", "")
+
+def _repo_rows(db: Session, team_id: int) -> list:
+    return (db.query(models.GitRepo.id, models.GitRepo.owner, models.GitRepo.repo, models.GitRepo.api_base_url)
+            .filter(models.GitRepo.team_id == team_id)
+            .order_by(models.GitRepo.id)
+            .all())
+
+def _pull_request_map(db: Session, team_id: int) -> list[dict]:
+    repo_map = {r.id: {"owner": r.owner, "repo": r.repo, "api_base_url": strip_url_credentials(r.api_base_url), "web_base_url": _web_url(r.api_base_url), "pull_requests": []} for r in _repo_rows(db, team_id)}
+    # Only the two columns we need, not whole PullRequest rows
+    prs = (db.query(models.PullRequest.git_repo_id, models.PullRequest.pr_number)
+           .filter(models.PullRequest.team_id == team_id)
+           .yield_per(5000))
+    for git_repo_id, pr_number in prs:
+        repo_info = repo_map.get(git_repo_id)
         if repo_info:
-            repo_info["pull_requests"].append(pr.pr_number)
+            repo_info["pull_requests"].append(pr_number)
     return list(repo_map.values())
 
-@router.get("/teams/{team_id}/llm/runs")
-def llm_runs(team_id: int, db: Session = Depends(db_dep)):
+@router.get("/teams/{team_id}/git/pull/requests")
+async def api_git_pull_requests(team_id: int, request: Request, db: AsyncSession = Depends(async_read_db_dep)):
+    return await cached_json_async(request, db, [team_scope(team_id)],
+                                   lambda: db.run_sync(_pull_request_map, team_id))
+
+def _encode_cursor(created_at: dt.datetime, pr_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at.isoformat(), pr_id]).encode()).decode()
+
+def _decode_cursor(cursor: str) -> tuple[dt.datetime, int]:
+    try:
+        created_at, pr_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return dt.datetime.fromisoformat(created_at), int(pr_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="invalid cursor") from exc
+
+def _pull_request_page(db: Session, team_id: int, *, cursor: str | None, limit: int,
+                       state: str | None, repo: str | None) -> dict:
+    repos = _repo_rows(db, team_id)
+    pr = models.PullRequest
+    q = (db.query(pr.id, pr.git_repo_id, pr.pr_number, pr.state, pr.created_at, pr.merged_at, pr.closed_at,
+                  pr.additions, pr.deletions)
+         .filter(pr.team_id == team_id))
+    if repo:
+        # "owner/repo" or just "repo"
+        wanted = [r.id for r in repos if repo in (f"{r.owner}/{r.repo}", r.repo)]
+        q = q.filter(pr.git_repo_id.in_(wanted))
+    if state == "merged":
+        q = q.filter(pr.merged_at.isnot(None))
+    elif state == "open":
+        q = q.filter(pr.merged_at.is_(None), pr.closed_at.is_(None))
+    elif state == "closed":
+        q = q.filter(pr.closed_at.isnot(None), pr.merged_at.is_(None))
+    if cursor:
+        q = q.filter(tuple_(pr.created_at, pr.id) < _decode_cursor(cursor))
+    rows = q.order_by(pr.created_at.desc(), pr.id.desc()).limit(limit + 1).all()
+
+    items = [{
+        "git_repo_id": r.git_repo_id,
+        "number": r.pr_number,
+        "state": "merged" if r.merged_at else r.state,
+        "created_at": r.created_at,
+        "merged_at": r.merged_at,
+        "closed_at": r.closed_at,
+        "size": (r.additions or 0) + (r.deletions or 0),
+    } for r in rows[:limit]]
+    last = rows[limit - 1] if len(rows) > limit else None
+    return {
+        "repos": [{"id": r.id, "owner": r.owner, "repo": r.repo, "web_base_url": _web_url(r.api_base_url)} for r in repos],
+        "items": items,
+        "next_cursor": _encode_cursor(last.created_at, last.id) if last else None,
+    }
+
+@router.get("/v2/teams/{team_id}/git/pull/requests")
+async def api_git_pull_requests_page(team_id: int, request: Request, cursor: str | None = None,
+                                     limit: int = Query(500, ge=1, le=5000),
+                                     state: str | None = Query(None, pattern="^(open|closed|merged)$"),
+                                     repo: str | None = None, db: AsyncSession = Depends(async_read_db_dep)):
+    """Keyset page of PRs, newest first. Filter by `state` (open/closed/merged) and `repo` ("owner/repo")."""
+    return await cached_json_async(
+        request, db, [team_scope(team_id)],
+        lambda: db.run_sync(_pull_request_page, team_id, cursor=cursor, limit=limit, state=state, repo=repo))
+
+def _llm_run_rows(db: Session, team_id: int) -> list[dict]:
     runs = (db.query(models.AgentRun)
         .filter_by(team_id=team_id)
         .order_by(models.AgentRun.created_at.desc())
@@ -43,6 +134,11 @@ def llm_runs(team_id: int, db: Session = Depends(db_dep)):
             "model": r.model,
             "status": r.status,
             "error": r.error,
+            "trace_id": r.trace_id,
         }
         for r in runs
     ]
+
+@router.get("/teams/{team_id}/llm/runs")
+async def llm_runs(team_id: int, db: AsyncSession = Depends(async_read_db_dep)):
+    return await db.run_sync(_llm_run_rows, team_id)
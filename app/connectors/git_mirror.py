@@ -0,0 +1,109 @@
+import base64
+import datetime as dt
+import os
+import subprocess
+from typing import Iterator, Optional
+from app.logging import get_logger
+
+log = get_logger("git_mirror")
+
+# Record/field separators that can't appear in hashes, emails or timestamps
+_RS, _FS = "\x1e", "\x1f"
+_FORMAT = f"{_RS}%H{_FS}%P{_FS}%ae{_FS}%at{_FS}%ct"
+
+class GitMirrorError(Exception):
+    pass
+
+def _utc(epoch: str) -> dt.datetime:
+    return dt.datetime.fromtimestamp(int(epoch), dt.timezone.utc).replace(tzinfo=None)
+
+class GitMirror:
+    """A bare `git clone --mirror` kept up to date with fetch; history is read with `git log --numstat`.
+
+    `token` is sent as HTTP basic auth to `url` only, through git's environment config: it never appears
+    in the command line, the mirror's config or the database."""
+
+    def __init__(self, url: str, path: str, timeout: int = 3600, token: Optional[str] = None):
+        self.url = url
+        self.path = path
+        self.timeout = timeout
+        self.token = token
+
+    def _env(self) -> Optional[dict]:
+        if not self.token:
+            return None
+        auth = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+        return {**os.environ, "GIT_CONFIG_COUNT": "1", "GIT_CONFIG_KEY_0": f"http.{self.url}.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {auth}"}
+
+    def _git(self, *args: str) -> str:
+        try:
+            r = subprocess.run(["git", "--git-dir", self.path, *args], capture_output=True, text=True,
+                               timeout=self.timeout, env=self._env())
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            raise GitMirrorError(f"git {args[0]} failed: {exc}") from exc
+        if r.returncode != 0:
+            raise GitMirrorError(f"git {args[0]} failed: {r.stderr.strip()}")
+        return r.stdout
+
+    def update(self) -> None:
+        if os.path.isdir(self.path):
+            log.info(f"fetching mirror {self.path}")
+            self._git("fetch", "--prune", "--quiet", "origin")
+            return
+        log.info(f"cloning {self.url} into {self.path}")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        try:
+            r = subprocess.run(["git", "clone", "--mirror", "--quiet", self.url, self.path],
+                               capture_output=True, text=True, timeout=self.timeout, env=self._env())
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            raise GitMirrorError(f"git clone failed: {exc}") from exc
+        if r.returncode != 0:
+            raise GitMirrorError(f"git clone failed: {r.stderr.strip()}")
+
+    def head(self) -> str:
+        return self._git("rev-parse", "HEAD").strip()
+
+    def is_ancestor(self, sha: str, of: str) -> bool:
+        try:
+            self._git("merge-base", "--is-ancestor", sha, of)
+        except GitMirrorError:
+            return False
+        return True
+
+    def iter_commits(self, head: str, after: Optional[str] = None,
+                     since: Optional[dt.datetime] = None) -> Iterator[dict]:
+        """Stream commits reachable from `head` (and not from `after`), newest first. Merge commits come
+        without numstat (git log shows no diff for them), so their size is 0."""
+        args = ["git", "--git-dir", self.path, "log", f"--format={_FORMAT}", "--numstat", "--no-renames",
+                f"{after}..{head}" if after else head]
+        if since:
+            args.append(f"--since={since:%Y-%m-%dT%H:%M:%SZ}")
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                encoding="utf-8", errors="replace")
+        commit = None
+        try:
+            for line in proc.stdout:
+                if line.startswith(_RS):
+                    if commit:
+                        yield commit
+                    sha, parents, email, authored, committed = line[1:].rstrip("\n").split(_FS)
+                    commit = {"sha": sha, "is_merge": len(parents.split()) > 1, "author_email": email,
+                              "authored_at": _utc(authored), "committed_at": _utc(committed),
+                              "additions": 0, "deletions": 0, "files_changed": 0}
+                elif commit and "\t" in line:
+                    added, deleted, _ = line.split("\t", 2)
+                    # Binary files show "-" for both counts
+                    commit["additions"] += int(added) if added != "-" else 0
+                    commit["deletions"] += int(deleted) if deleted != "-" else 0
+                    commit["files_changed"] += 1
+            if commit:
+                yield commit
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()  # consumer stopped early
+            stderr = proc.stderr.read()
+            proc.stderr.close()
+            if proc.wait() not in (0, -9) and stderr:
+                log.warning(f"git log on {self.path}: {stderr.strip()}")
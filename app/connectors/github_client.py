@@ -1,21 +1,46 @@
 import datetime as dt
 from typing import Iterable, Optional
 from github import Github
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass
 from github.Repository import Repository
 from github.PullRequest import PullRequest as GhPR
+from app.instrumentation.prom import instrument_session
+from app.settings import settings
 from app.logging import get_logger
 
 log = get_logger("github_client")
 
+class _TimedHTTPSConnection(HTTPSRequestsConnectionClass):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        instrument_session(self.session, "github")
+
+class _TimedHTTPConnection(HTTPRequestsConnectionClass):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        instrument_session(self.session, "github")
+
+def _instrument(gh: Github) -> None:
+    # PyGithub has no request hooks, and Requester.injectConnectionClasses turns off connection reuse;
+    # swap the connection class on this client's requester instead (PyGithub 2.x internals).
+    requester = getattr(gh, "_Github__requester", None)
+    current = getattr(requester, "_Requester__connectionClass", None)
+    if current is HTTPSRequestsConnectionClass:
+        requester._Requester__connectionClass = _TimedHTTPSConnection
+    elif current is HTTPRequestsConnectionClass:
+        requester._Requester__connectionClass = _TimedHTTPConnection
+
 class GitHubClient:
     def __init__(self, api_base_url: str, token: Optional[str]):
         # PyGithub supports base_url via Github(base_url=...) but it expects the API root.
         # GitHub Cloud: https://api.github.com
         # GHE: https://<host>/api/v3
-        kwargs = {}
+        kwargs = {"per_page": settings.github_per_page,
+                  "seconds_between_requests": settings.github_seconds_between_requests}
         if api_base_url:
             kwargs["base_url"] = api_base_url
-        self.gh = Github(login_or_token=token) if not kwargs else Github(login_or_token=token, **kwargs)
+        self.gh = Github(login_or_token=token, **kwargs)
+        _instrument(self.gh)
 
     def get_repo(self, owner: str, repo: str) -> Repository:
         return self.gh.get_repo(f"{owner}/{repo}")
@@ -2,10 +2,12 @@ from __future__ import annotations
 from typing import Optional, Iterable
 from jira import JIRA
 from app.settings import settings
+from app.instrumentation.prom import instrument_session
 
 class JiraClient:
     def __init__(self, base_url: str, email: str, api_token: str):
         self.jira = JIRA(server=base_url, basic_auth=(email, api_token))
+        instrument_session(self.jira._session, "jira")
 
     def search_issues(self, jql: str, max_results: int = 200):
         return self.jira.search_issues(jql, maxResults=max_results)
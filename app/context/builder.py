@@ -1,8 +1,63 @@
 import datetime as dt
+import threading
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app import models
 from app.schemas import ContextPacketSchema, Signal, EntityRef
+from app.util import sha256_64
+from app.services.data_versions import get_data_versions, team_scope
+from app.instrumentation.prom import STAGE_SECONDS
+from app.instrumentation.tracing import traced
 
+def packet_version(team_id: int, db: Session) -> str:
+    """Cheap fingerprint of everything build_context_packet reads. Ages are relative to today,
+    so the date is part of it too. The team's data version catches in-place updates (snapshot_metrics
+    rewrites same-day rows without moving created_at or the count). Review rows are covered directly
+    (bulk imports add them without touching the PR); github ingest also bumps the PR's updated_at
+    when a review's state changes."""
+    scope = team_scope(team_id)
+    parts = [dt.date.today().isoformat(), str(get_data_versions(db, [scope])[scope])]
+    for model, column in (
+        (models.MetricSnapshot, models.MetricSnapshot.created_at),
+        (models.PullRequest, models.PullRequest.updated_at),
+        (models.PullRequestReview, models.PullRequestReview.created_at),
+        (models.Issue, models.Issue.updated_at),
+    ):
+        latest, count = (db.query(func.max(column), func.count(model.id))
+                         .filter(model.team_id == team_id)
+                         .one())
+        parts.append(f"{latest}:{count}")
+    return sha256_64("|".join(parts))
+
+# team_id -> ((packet_version, hour), packet); filled by get_context_packet and refresh_context_packet
+_PACKETS: dict[int, tuple[tuple[str, dt.datetime], ContextPacketSchema]] = {}
+_PACKETS_LOCK = threading.Lock()
+
+def _packet_hour() -> dt.datetime:
+    return dt.datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+@traced("get_context_packet")
+def get_context_packet(team: models.Team, db: Session) -> ContextPacketSchema:
+    """build_context_packet, reusing this process's last packet for the team while its data version
+    and hour are unchanged."""
+    key = (packet_version(team.id, db), _packet_hour())
+    with _PACKETS_LOCK:
+        cached = _PACKETS.get(team.id)
+    if cached and cached[0] == key:
+        return cached[1]
+    return refresh_context_packet(team, db, version=key[0])
+
+def refresh_context_packet(team: models.Team, db: Session, version: str | None = None) -> ContextPacketSchema:
+    """Rebuild the team's packet and replace whatever this process had cached for it. Writers that
+    just changed the team's data call this rather than trusting the cached key."""
+    version = version or packet_version(team.id, db)
+    packet = build_context_packet(team, db)
+    with _PACKETS_LOCK:
+        _PACKETS[team.id] = ((version, packet.as_of), packet)
+    return packet
+
+@traced("build_context_packet")
+@STAGE_SECONDS.labels(stage="build_context_packet").time()
 def build_context_packet(team: models.Team, db: Session) -> ContextPacketSchema:
     # Pull latest metrics (today or most recent)
     snapshots = (db.query(models.MetricSnapshot)
@@ -21,7 +76,8 @@ def build_context_packet(team: models.Team, db: Session) -> ContextPacketSchema:
             unit = "ratio" if "rate" in s.name else "hours"
         signals.append(Signal(name=s.name, value=float(s.value), unit=unit))
 
-    now = dt.datetime.utcnow()
+    # Hour granularity: re-running against unchanged data yields an identical packet (stored once)
+    now = _packet_hour()
     # Top PR entities: oldest open + mega PRs + needs review
     prs = (db.query(models.PullRequest)
            .filter_by(team_id=team.id)
@@ -1,20 +1,95 @@
-from sqlalchemy import create_engine
+import time
+
+import orjson
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.settings import settings
+from app.logging import get_logger
+
+log = get_logger("db")
 
 class Base(DeclarativeBase):
     pass
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+def _json_serializer(obj) -> str:
+    return orjson.dumps(obj).decode("utf-8")
+
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def _async_url(url: str):
+    u = make_url(url)
+    return u.set(drivername=f"{u.get_backend_name()}+{_ASYNC_DRIVERS[u.get_backend_name()]}")
+
+def _engine_kwargs() -> dict:
+    return {
+        "pool_pre_ping": True,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "json_serializer": _json_serializer,
+        "json_deserializer": orjson.loads,
+    }
+
+engine = create_engine(settings.database_url, **_engine_kwargs())
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Async engine for read routes: waiting on the database doesn't hold one of Starlette's threadpool slots.
+async_engine = create_async_engine(_async_url(settings.database_url), **_engine_kwargs())
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Read replica (optional). Only read routes use it, and only while replication lag is acceptable.
+read_async_engine = (create_async_engine(_async_url(settings.database_read_url), **_engine_kwargs())
+                     if settings.database_read_url else None)
+AsyncReadSessionLocal = (async_sessionmaker(bind=read_async_engine, autoflush=False, expire_on_commit=False)
+                         if read_async_engine else None)
+
+# A replica that has replayed everything it received is caught up even if the last replayed
+# transaction is old (idle primary), so only fall back to the replay timestamp while WAL is pending.
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+_replica_lag = {"checked_at": float("-inf"), "lag": None}
+
+async def replica_lag_seconds() -> float | None:
+    """Replication lag of the read replica, re-checked at most every REPLICA_LAG_CHECK_SECONDS.
+    None when there is no replica or it can't be reached."""
+    if read_async_engine is None:
+        return None
+    now = time.monotonic()
+    if now - _replica_lag["checked_at"] >= settings.replica_lag_check_seconds:
+        _replica_lag["checked_at"] = now
+        try:
+            async with read_async_engine.connect() as conn:
+                lag = (await conn.execute(_REPLICA_LAG_SQL)).scalar()
+            _replica_lag["lag"] = float(lag) if lag is not None else None
+        except Exception as exc:
+            log.warning(f"replica lag check failed: {exc}")
+            _replica_lag["lag"] = None
+    return _replica_lag["lag"]
+
 def init_db():
     from app import models  # noqa: F401
-    Base.metadata.create_all(bind=engine)
+    from app.migrations import SCHEMA_VERSION, run_migrations, schema_is_current
+    from app.services.retention import ensure_partitions
+    if schema_is_current(engine, set(Base.metadata.tables)):
+        log.info(f"schema at version {SCHEMA_VERSION}, skipping create_all and migrations")
+    else:
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+    with SessionLocal() as db:
+        ensure_partitions(db)
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,52 +1,24 @@
-
-import datetime as dt
-
-from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app import models
-from app.ingest.github_ingest import sync_github
+from app.ingest.git_mirror_ingest import sync_git_mirror
 from app.settings import settings
+from app.instrumentation.prom import SYNC_SECONDS, timed
+from app.instrumentation.tracing import span, traced
 from app.logging import get_logger
 
 log = get_logger("git_ingest")
 
-class SyncInProgress(Exception):
-    pass
-
-def _acquire_sync_lock(db: Session, team_id: int, *, action: str, owner: str | None, ttl_minutes: int = 120) -> None:
-    now = dt.datetime.utcnow()
-    lock = models.ActionLock(team_id=team_id, action=action, owner=owner, locked_at=now)
-    try:
-        db.add(lock)
-        db.commit()
-        return
-    except IntegrityError:
-        db.rollback()
-
-    existing = db.query(models.ActionLock).filter_by(team_id=team_id, action=action).one_or_none()
-    if existing and (now - existing.locked_at) > dt.timedelta(minutes=ttl_minutes):
-        db.delete(existing)
-        db.commit()
-        try:
-            db.add(lock)
-            db.commit()
-            return
-        except IntegrityError:
-            db.rollback()
-
-    raise SyncInProgress(f"action already running for team {team_id}")
-
-def _release_sync_lock(db: Session, team_id: int, *, action: str) -> None:
-    db.query(models.ActionLock).filter_by(team_id=team_id, action=action).delete()
-    db.commit()
-
-def sync_team_git(team_id: int, db: Session, since_days: int = 30, owner: str | None = None) -> int:
-    _acquire_sync_lock(db, team_id, action="sync_git", owner=owner)
-    try:
-        git_repos = db.query(models.GitRepo).filter_by(team_id=team_id).all()
-        total = 0
-        for repo in git_repos:
-            if repo.git_provider.name.lower() == "github":
+@traced("sync_team_git")
+def sync_team_git(team_id: int, db: Session, since_days: int = 30) -> int:
+    # Mutual exclusion per team comes from the job queue (one running sync_git job per team).
+    git_repos = db.query(models.GitRepo).filter_by(team_id=team_id).all()
+    total = 0
+    for repo in git_repos:
+        if repo.git_provider.name.lower() == "github":
+            # PyGithub is slow to import; processes that never sync shouldn't pay for it
+            from app.ingest.github_ingest import sync_github
+            labels = {"source": "github", "repo": f"{repo.owner}/{repo.repo}"}
+            with timed(SYNC_SECONDS, **labels), span("sync_github", repo=labels["repo"]):
                 n = sync_github(
                     team_id=team_id,
                     git_repo_id=repo.id,
@@ -57,8 +29,12 @@ def sync_team_git(team_id: int, db: Session, since_days: int = 30, owner: str |
                     db=db,
                     since_days=since_days
                 )
-                total += n
-                log.info(f"github synced: {n} PRs for repo {repo.owner}/{repo.repo}")
-        return total
-    finally:
-        _release_sync_lock(db, team_id, action="sync_git")
+            total += n
+            log.info(f"github synced: {n} PRs for repo {repo.owner}/{repo.repo}")
+        elif repo.git_provider.name.lower() == "git":
+            # Local mirror: no API quota, commit history only
+            labels = {"source": "git", "repo": f"{repo.owner}/{repo.repo}"}
+            with timed(SYNC_SECONDS, **labels), span("sync_git_mirror", repo=labels["repo"]):
+                n = sync_git_mirror(team_id=team_id, repo=repo, db=db, since_days=since_days)
+            total += n
+    return total
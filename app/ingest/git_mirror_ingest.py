@@ -0,0 +1,59 @@
+import datetime as dt
+import os
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app import models
+from app.connectors.git_mirror import GitMirror
+from app.instrumentation.prom import SYNC_ROWS
+from app.settings import settings
+from app.util import sha256_64
+from app.services.data_versions import bump_data_version, team_scope
+from app.logging import get_logger
+
+log = get_logger("git_mirror_ingest")
+
+CHUNK = 1000
+
+def mirror_path(repo: models.GitRepo) -> str:
+    return os.path.join(settings.git_mirror_dir, f"{repo.id}-{repo.repo}.git")
+
+def _insert(db: Session, rows: list[dict]) -> int:
+    stmt = insert(models.GitCommit).values(rows).on_conflict_do_nothing(constraint="uq_git_commit")
+    inserted = db.execute(stmt).rowcount
+    rows.clear()
+    return inserted
+
+def sync_git_mirror(team_id: int, repo: models.GitRepo, db: Session, since_days: int = 30) -> int:
+    """Fetch the repo's local mirror and store commits added since the last sync (the last `since_days`
+    on the first one). `repo.api_base_url` holds the clone URL. Returns how many commits were read."""
+    mirror = GitMirror(repo.api_base_url, mirror_path(repo), timeout=settings.git_mirror_timeout_seconds,
+                       token=settings.git_clone_token)
+    mirror.update()
+    head = mirror.head()
+    after = repo.mirror_head if repo.mirror_head and mirror.is_ancestor(repo.mirror_head, head) else None
+    if repo.mirror_head and not after:
+        log.warning(f"{repo.owner}/{repo.repo}: {repo.mirror_head} is no longer in history, re-reading window")
+    since = None if after else dt.datetime.utcnow() - dt.timedelta(days=since_days)
+
+    count = inserted = 0
+    rows: list[dict] = []
+    for c in mirror.iter_commits(head, after=after, since=since):
+        rows.append({
+            "team_id": team_id, "git_repo_id": repo.id, "sha": c["sha"],
+            "author_hash": sha256_64(c["author_email"].lower()),
+            "authored_at": c["authored_at"], "committed_at": c["committed_at"], "is_merge": c["is_merge"],
+            "additions": c["additions"], "deletions": c["deletions"], "files_changed": c["files_changed"],
+        })
+        count += 1
+        if len(rows) >= CHUNK:
+            inserted += _insert(db, rows)
+    if rows:
+        inserted += _insert(db, rows)
+
+    repo.mirror_head = head
+    if inserted:
+        bump_data_version(db, team_scope(team_id))
+    db.commit()
+    SYNC_ROWS.labels(source="git", repo=f"{repo.owner}/{repo.repo}").observe(inserted)
+    log.info(f"mirror synced {repo.owner}/{repo.repo}: {count} commits read, {inserted} new (head {head[:12]})")
+    return count
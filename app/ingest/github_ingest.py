@@ -3,12 +3,15 @@ from sqlalchemy.orm import Session
 from app.connectors.github_client import GitHubClient
 from app import models
 from app.util import sha256_64
+from app.instrumentation.prom import SYNC_ROWS
+from app.services.data_versions import bump_data_version, team_scope
 from app.logging import get_logger
 
 log = get_logger("github_ingest")
 
 def _sync_pr_reviews(team_id: int, git_repo_id: int, pr_number: int, pr, db: Session) -> int:
-    """Sync reviews for a single PR. Stores only hashed reviewer login + state + submitted_at."""
+    """Sync reviews for a single PR. Stores only hashed reviewer login + state + submitted_at.
+    Returns how many reviews were added or changed."""
     count = 0
     try:
         reviews = pr.get_reviews()
@@ -30,6 +33,8 @@ def _sync_pr_reviews(team_id: int, git_repo_id: int, pr_number: int, pr, db: Ses
                         .one_or_none())
             if existing:
                 existing.state = state
+                if db.is_modified(existing):
+                    count += 1
             else:
                 db.add(models.PullRequestReview(
                     team_id=team_id,
@@ -39,7 +44,7 @@ def _sync_pr_reviews(team_id: int, git_repo_id: int, pr_number: int, pr, db: Ses
                     state=state,
                     submitted_at=submitted_at
                 ))
-            count += 1
+                count += 1
         except Exception as exc:
             log.warning("Failed to sync review for PR %s: %s", pr_number, exc)
             continue
@@ -48,6 +53,7 @@ def _sync_pr_reviews(team_id: int, git_repo_id: int, pr_number: int, pr, db: Ses
 def sync_github(team_id: int, git_repo_id:int, api_base_url: str, token: str | None, owner: str, repo: str, db: Session, since_days: int = 30) -> int:
     client = GitHubClient(api_base_url=api_base_url, token=token)
     count = 0
+    changed = 0
     repo_obj = client.get_repo(owner, repo)
     full_name = repo_obj.full_name
     log.info(f"Syncing GitHub PRs for repo: {full_name}")
@@ -67,7 +73,6 @@ def sync_github(team_id: int, git_repo_id:int, api_base_url: str, token: str | N
             existing.additions = additions
             existing.deletions = deletions
             existing.changed_files = changed_files
-            existing.updated_at = dt.datetime.utcnow()
         else:
             row = models.PullRequest(
                 team_id=team_id,
@@ -84,8 +89,17 @@ def sync_github(team_id: int, git_repo_id:int, api_base_url: str, token: str | N
                 author_login_hash=author_hash,
             )
             db.add(row)
-        _sync_pr_reviews(team_id, git_repo_id, pr.number, pr, db)
+        reviews_changed = _sync_pr_reviews(team_id, git_repo_id, pr.number, pr, db)
+        # updated_at only moves when the PR or its reviews changed: packet_version keys plan coalescing on it,
+        # and unchanged syncs leave the data version alone
+        pr_changed = existing is None or db.is_modified(existing)
+        if existing and (pr_changed or reviews_changed):
+            existing.updated_at = dt.datetime.utcnow()
+        changed += pr_changed + reviews_changed
         count += 1
 
+    if changed:
+        bump_data_version(db, team_scope(team_id))
     db.commit()
+    SYNC_ROWS.labels(source="github", repo=f"{owner}/{repo}").observe(changed)
     return count
@@ -0,0 +1,102 @@
+"""Opt-in sampling profiler for single API requests and worker jobs.
+
+A background thread snapshots Python stacks with sys._current_frames() at PROFILE_SAMPLE_HZ and writes
+them in folded format ("frame;frame;frame count"), which flamegraph.pl, inferno and speedscope read
+directly. Nothing runs unless a profile is requested: an API request carrying
+`X-Profile: <PROFILE_TOKEN>`, or a worker job whose kind is in PROFILE_JOBS (or that was submitted
+through the API with that header).
+"""
+import collections
+import datetime as dt
+import hmac
+import os
+import sys
+import threading
+from contextlib import contextmanager, nullcontext
+
+from app.settings import settings
+from app.logging import get_logger
+
+log = get_logger("profiling")
+
+PROFILE_HEADER = "x-profile"
+
+# Job kinds whose work runs on other threads (weekly_plan's parallel LLM parts and hedged backends);
+# their profiles sample every thread instead of only the consumer's
+FAN_OUT_JOBS = {"weekly_plan"}
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Samples the given threads (all threads when None), each stack rooted at its thread name."""
+
+    def __init__(self, thread_ids: set[int] | None = None, hz: float | None = None):
+        self.thread_ids = thread_ids
+        self.interval = 1.0 / (hz or settings.profile_sample_hz)
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def _sample(self) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, str(thread_id)))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def profile_path(label: str) -> str:
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)
+    return os.path.join(settings.profile_dir, f"{dt.datetime.utcnow():%Y%m%dT%H%M%S%f}-{safe}.folded")
+
+@contextmanager
+def profiled(label: str, thread_ids: set[int] | None = None, path: str | None = None):
+    """Profile the enclosed block; the folded stacks are written to PROFILE_DIR when it exits."""
+    path = path or profile_path(label)
+    profiler = SamplingProfiler(thread_ids).start()
+    try:
+        yield path
+    finally:
+        profiler.stop()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        profiler.write_folded(path)
+        log.info(f"profile {label}: {profiler.samples} samples -> {path}")
+
+def profile_requested(token: str | None) -> bool:
+    return bool(settings.profile_token and token
+                and hmac.compare_digest(token.encode("utf-8"), settings.profile_token.encode("utf-8")))
+
+def job_profiler(job, payload: dict):
+    """Context manager profiling the job's own thread (every thread for FAN_OUT_JOBS) when asked for,
+    else a no-op."""
+    kinds = {k.strip() for k in settings.profile_jobs.split(",") if k.strip()}
+    if not (payload.get("profile") or job.kind in kinds or "all" in kinds):
+        return nullcontext()
+    thread_ids = None if job.kind in FAN_OUT_JOBS else {threading.get_ident()}
+    return profiled(f"job-{job.kind}-{job.id}", thread_ids=thread_ids)
@@ -0,0 +1,69 @@
+"""Prometheus series for the ingest, compute and LLM hot paths.
+
+The API serves its registry at /api/metrics/prom; the worker is a separate process and serves its own
+on WORKER_METRICS_PORT, so scrape both.
+"""
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest, start_http_server
+
+SYNC_SECONDS = Histogram(
+    "emaide_sync_duration_seconds", "Duration of one source sync", ["source", "repo"],
+    buckets=(1, 2, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+)
+SYNC_ROWS = Histogram(
+    "emaide_sync_rows_upserted", "Rows one source sync inserted or changed (unchanged rows not counted)", ["source", "repo"],
+    buckets=(0, 1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+CONNECTOR_SECONDS = Histogram(
+    "emaide_connector_request_seconds", "GitHub/Jira API request latency", ["connector", "method", "status"],
+)
+STAGE_SECONDS = Histogram(
+    "emaide_stage_duration_seconds", "Duration of compute stages (compute_metrics, build_context_packet)", ["stage"],
+)
+LLM_SECONDS = Histogram(
+    "emaide_llm_request_seconds", "LLM call latency", ["backend", "model", "call"],
+    buckets=(0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90, 120, 180, 300),
+)
+LLM_TOKENS = Counter("emaide_llm_tokens", "Tokens reported by the LLM backend", ["backend", "model", "direction"])
+LLM_PARSE_FAILURES = Counter(
+    "emaide_llm_parse_failures", "LLM responses that didn't validate against the schema", ["backend", "model"],
+)
+LOCK_CONTENTION = Counter("emaide_lock_contention", "Lock acquisitions that found the lock taken", ["lock"])
+
+@contextmanager
+def timed(histogram: Histogram, **labels: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - started)
+
+def llm_labels(llm) -> dict[str, str]:
+    # Client names are "<backend>:<model>" (e.g. "remote:gpt-4o-mini", "local:llama3.1")
+    backend, _, model = llm.name().partition(":")
+    return {"backend": backend, "model": model}
+
+def observe_llm(llm, call: str, seconds: float, prompt_tokens: int | None = None,
+                completion_tokens: int | None = None) -> None:
+    labels = llm_labels(llm)
+    LLM_SECONDS.labels(call=call, **labels).observe(seconds)
+    if prompt_tokens:
+        LLM_TOKENS.labels(direction="prompt", **labels).inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(direction="completion", **labels).inc(completion_tokens)
+
+def instrument_session(session, connector: str) -> None:
+    """Time every request made through a requests.Session (latency up to the response headers)."""
+    def observe(r, *args, **kwargs):
+        CONNECTOR_SECONDS.labels(connector=connector, method=r.request.method,
+                                 status=str(r.status_code)).observe(r.elapsed.total_seconds())
+    session.hooks["response"].append(observe)
+
+def exposition() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+def start_exporter(port: int) -> None:
+    if port:
+        start_http_server(port)
@@ -0,0 +1,90 @@
+"""OpenTelemetry tracing, off unless TRACING_EXPORTER is set.
+
+Stage spans come from `span`/`traced` around the plan and sync pipelines; DB query, httpx (LLM) and
+requests (PyGithub, Jira) spans come from the OpenTelemetry instrumentation packages. Everything here is
+a no-op when the opentelemetry packages aren't installed, and opentelemetry isn't even imported until
+setup_tracing turns tracing on.
+"""
+import functools
+from contextlib import contextmanager
+
+from app.settings import settings
+from app.logging import get_logger
+
+log = get_logger("tracing")
+
+trace = None  # the opentelemetry.trace module once setup_tracing has enabled tracing
+
+def _exporter():
+    if settings.tracing_exporter == "otlp":
+        # Endpoint and headers from the standard OTEL_EXPORTER_OTLP_* environment variables
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if settings.tracing_exporter == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        out = open(settings.tracing_file_path, "a", buffering=1)
+        return ConsoleSpanExporter(out=out, formatter=lambda s: s.to_json(indent=None) + "\n")
+    raise ValueError(f"unknown TRACING_EXPORTER {settings.tracing_exporter!r} (expected otlp or file)")
+
+def _instrument_libraries(app) -> None:
+    from app.db import async_engine, engine, read_async_engine
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    from opentelemetry.instrumentation.requests import RequestsInstrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+
+    engines = [engine, async_engine.sync_engine]
+    if read_async_engine is not None:
+        engines.append(read_async_engine.sync_engine)
+    SQLAlchemyInstrumentor().instrument(engines=engines)
+    HTTPXClientInstrumentor().instrument()
+    RequestsInstrumentor().instrument()
+    if app is not None:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        FastAPIInstrumentor.instrument_app(app, excluded_urls="api/health,api/metrics/prom")
+
+def setup_tracing(service_name: str, app=None) -> bool:
+    """Install the tracer provider and library instrumentation for this process. Returns whether
+    tracing is on."""
+    global trace
+    if not settings.tracing_exporter:
+        return False
+    try:
+        from opentelemetry import trace as otel_trace
+    except ImportError:  # tracing is optional
+        log.warning("TRACING_EXPORTER is set but opentelemetry is not installed; tracing disabled")
+        return False
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    otel_trace.set_tracer_provider(provider)
+    trace = otel_trace
+    _instrument_libraries(app)
+    log.info(f"tracing enabled for {service_name} ({settings.tracing_exporter})")
+    return True
+
+@contextmanager
+def span(name: str, **attributes):
+    if trace is None:
+        yield None
+        return
+    with trace.get_tracer("app").start_as_current_span(name, attributes=attributes) as s:
+        yield s
+
+def traced(name: str):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_trace_id() -> str | None:
+    """Hex trace id of the active span, to store on the rows a traced run writes."""
+    if trace is None:
+        return None
+    ctx = trace.get_current_span().get_span_context()
+    return format(ctx.trace_id, "032x") if ctx.is_valid else None
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import bisect
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Iterator, Type
+from pydantic import BaseModel
+from app.settings import settings
+from app.logging import get_logger
+
+log = get_logger("llm_chain")
+
+class LLMChainError(Exception):
+    pass
+
+class LatencyHistogram:
+    # Upper bounds in seconds; the last bucket catches everything slower.
+    BUCKETS = (0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90, 120, 180, 300, float("inf"))
+
+    def __init__(self):
+        self._counts = [0] * len(self.BUCKETS)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        idx = bisect.bisect_left(self.BUCKETS, seconds)
+        with self._lock:
+            self._counts[idx] += 1
+            self._total += 1
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def percentile(self, p: float) -> float | None:
+        """Upper bound of the bucket holding the p-th percentile, or None for an empty histogram."""
+        with self._lock:
+            if not self._total:
+                return None
+            rank = self._total * p / 100.0
+            seen = 0
+            for bound, count in zip(self.BUCKETS, self._counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+        return self.BUCKETS[-1]
+
+_histograms: dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+def latency_histogram(backend: str) -> LatencyHistogram:
+    with _histograms_lock:
+        return _histograms.setdefault(backend, LatencyHistogram())
+
+class HedgedChainClient:
+    """Tries LLM backends in order. If the newest in-flight backend hasn't answered within its
+    observed latency percentile (LLM_HEDGE_PERCENTILE), the next backend is started in parallel;
+    a failure starts the next one immediately. The first valid structured result wins."""
+
+    def __init__(self, backends: list):
+        if not backends:
+            raise ValueError("at least one LLM backend is required")
+        self.backends = backends
+        self.last_backend = None
+
+    def name(self) -> str:
+        return " > ".join(b.name() for b in self.backends)
+
+    def hedge_delay(self, backend) -> float:
+        hist = latency_histogram(backend.name())
+        if hist.total < settings.llm_hedge_min_samples:
+            return settings.llm_hedge_default_seconds
+        p = hist.percentile(settings.llm_hedge_percentile)
+        return max(settings.llm_hedge_min_seconds, min(p, settings.llm_timeout_seconds))
+
+    def _timed(self, backend, system: str, user: str, schema: Type[BaseModel]) -> BaseModel:
+        started = time.monotonic()
+        result = backend.generate_structured(system, user, schema)
+        latency_histogram(backend.name()).observe(time.monotonic() - started)
+        return result
+
+    def generate_structured(self, system: str, user: str, schema: Type[BaseModel]) -> BaseModel:
+        pool = ThreadPoolExecutor(max_workers=len(self.backends), thread_name_prefix="llm-hedge")
+        pending: dict[Any, Any] = {}
+        errors: list[str] = []
+        launched = 0
+
+        def launch() -> None:
+            nonlocal launched
+            backend = self.backends[launched]
+            launched += 1
+            ctx = contextvars.copy_context()  # keeps hedged calls in the caller's trace
+            pending[pool.submit(ctx.run, self._timed, backend, system, user, schema)] = backend
+
+        try:
+            launch()
+            while pending:
+                timeout = self.hedge_delay(self.backends[launched - 1]) if launched < len(self.backends) else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    log.info(f"hedging: {self.backends[launched - 1].name()} slower than {timeout:.1f}s, "
+                             f"also trying {self.backends[launched].name()}")
+                    launch()
+                    continue
+                for f in done:
+                    backend = pending.pop(f)
+                    try:
+                        result = f.result()
+                    except Exception as exc:
+                        log.warning(f"LLM backend {backend.name()} failed: {exc}")
+                        errors.append(f"{backend.name()}: {exc}")
+                        if launched < len(self.backends):
+                            launch()
+                        continue
+                    self.last_backend = backend
+                    return result
+            raise LLMChainError("all LLM backends failed: " + "; ".join(errors))
+        finally:
+            # Losers keep running in the background; their latencies still feed the histograms.
+            pool.shutdown(wait=False)
+
+    def stream_text(self, system: str, user: str) -> Iterator[str]:
+        # Streams can't be hedged without duplicating output; fall back only until the first chunk.
+        errors: list[str] = []
+        for backend in self.backends:
+            started = False
+            try:
+                for chunk in backend.stream_text(system, user):
+                    started = True
+                    yield chunk
+                self.last_backend = backend
+                return
+            except Exception as exc:
+                if started:
+                    raise
+                log.warning(f"LLM backend {backend.name()} failed before streaming: {exc}")
+                errors.append(f"{backend.name()}: {exc}")
+        raise LLMChainError("all LLM backends failed: " + "; ".join(errors))
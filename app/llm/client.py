@@ -1,15 +1,21 @@
 from __future__ import annotations
-from typing import Protocol, Type, Any
+from typing import Protocol, Type, Any, Iterator, Iterable
 import os
 import json
+import random
+import time
 import httpx
 from pydantic import BaseModel
 from app.settings import settings
+from app.llm.chain import HedgedChainClient
+from app.instrumentation.prom import LLM_PARSE_FAILURES, llm_labels, observe_llm
+from app.instrumentation.tracing import traced
 
 mode = os.getenv("LLM_MODE", "openai").lower()
 
 class LLMClient(Protocol):
     def generate_structured(self, system: str, user: str, schema: Type[BaseModel]) -> BaseModel: ...
+    def stream_text(self, system: str, user: str) -> Iterator[str]: ...
     def name(self) -> str: ...
 
 def _parse_structured(content: str, schema: Type[BaseModel]) -> BaseModel:
@@ -27,24 +33,114 @@ def _parse_structured(content: str, schema: Type[BaseModel]) -> BaseModel:
             data = json.loads(snippet)
             return schema.model_validate(data)
 
+def _parse_counted(llm: LLMClient, content: str, schema: Type[BaseModel]) -> BaseModel:
+    try:
+        return _parse_structured(content, schema)
+    except Exception:
+        LLM_PARSE_FAILURES.labels(**llm_labels(llm)).inc()
+        raise
+
+class IncrementalJSONParser:
+    """Scans a streamed JSON object and emits each element of the given top-level
+    array fields as soon as its closing brace arrives."""
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = set(fields)
+        self._text = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: str | None = None
+        self._key: str | None = None
+        self._field: str | None = None
+        self._elem_start: int | None = None
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        out: list[tuple[str, Any]] = []
+        start = len(self._text)
+        self._text += chunk
+        for i in range(start, len(self._text)):
+            c = self._text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = self._text[self._string_start + 1:i]
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":" and self._depth == 1:
+                self._key = self._last_string
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 2 and c == "[" and self._key in self.fields:
+                    self._field = self._key
+                elif self._depth == 3 and self._field and c == "{":
+                    self._elem_start = i
+            elif c in "}]":
+                if self._depth == 3 and c == "}" and self._elem_start is not None:
+                    try:
+                        out.append((self._field, json.loads(self._text[self._elem_start:i + 1])))
+                    except ValueError:
+                        pass
+                    self._elem_start = None
+                elif self._depth == 2 and c == "]":
+                    self._field = None
+                self._depth = max(self._depth - 1, 0)
+        return out
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+def stream_structured(llm: LLMClient, system: str, user: str, schema: Type[BaseModel],
+                      fields: Iterable[str]) -> Iterator[tuple[str, Any]]:
+    """Yields (field, item) for every completed array element, then ("result", model)."""
+    parser = IncrementalJSONParser(fields)
+    for chunk in llm.stream_text(system, user):
+        yield from parser.feed(chunk)
+    # A hedged chain records which backend actually answered
+    yield "result", _parse_counted(getattr(llm, "last_backend", None) or llm, parser.text, schema)
+
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+def _post_with_retry(client: httpx.Client, url: str, headers: dict, payload: dict) -> httpx.Response:
+    """POST with full-jitter exponential backoff on 429/5xx (honours Retry-After when given)."""
+    attempts = settings.llm_retry_attempts + 1
+    for attempt in range(attempts):
+        r = client.post(url, headers=headers, json=payload)
+        if r.status_code not in _RETRYABLE_STATUS or attempt == attempts - 1:
+            break
+        delay = random.uniform(0, settings.llm_retry_backoff_seconds * (2 ** attempt))
+        retry_after = r.headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        time.sleep(delay)
+    r.raise_for_status()
+    return r
+
 class OpenAICompatibleClient:
-    def __init__(self):
-        if not settings.llm_api_key:
+    def __init__(self, base_url: str | None = None, api_key: str | None = None, model: str | None = None):
+        api_key = api_key or settings.llm_api_key
+        if not api_key:
             raise RuntimeError("LLM_API_KEY is required for remote mode.")
-        self.base_url = settings.llm_base_url.rstrip("/")
-        self.api_key = settings.llm_api_key
-        self.model = settings.llm_model
+        self.base_url = (base_url or settings.llm_base_url).rstrip("/")
+        self.api_key = api_key
+        self.model = model or settings.llm_model
         self.timeout = settings.llm_timeout_seconds
 
     def name(self) -> str:
         return f"remote:{self.model}"
 
-    def generate_structured(self, system: str, user: str, schema: Type[BaseModel]) -> BaseModel:
-        # Uses Chat Completions compatible endpoint: /chat/completions
-        # Uses "response_format" JSON schema if supported; otherwise relies on strict prompt.
-        url = f"{self.base_url}/chat/completions"
-        headers = {"Authorization": f"Bearer {self.api_key}"}
-        payload: dict[str, Any] = {
+    def _payload(self, system: str, user: str) -> dict[str, Any]:
+        return {
             "model": self.model,
             "temperature": settings.llm_temperature,
             "max_tokens": settings.llm_max_tokens,
@@ -55,27 +151,59 @@ class OpenAICompatibleClient:
             # Best-effort: many OpenAI-compatible providers accept this; if not, it is ignored.
             "response_format": {"type": "json_object"},
         }
+
+    def generate_structured(self, system: str, user: str, schema: Type[BaseModel]) -> BaseModel:
+        # Uses Chat Completions compatible endpoint: /chat/completions
+        # Uses "response_format" JSON schema if supported; otherwise relies on strict prompt.
+        url = f"{self.base_url}/chat/completions"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        started = time.monotonic()
         with httpx.Client(timeout=self.timeout) as client:
-            r = client.post(url, headers=headers, json=payload)
-            r.raise_for_status()
-            data = r.json()
+            data = _post_with_retry(client, url, headers, self._payload(system, user)).json()
+        usage = data.get("usage") or {}
+        observe_llm(self, "structured", time.monotonic() - started,
+                    usage.get("prompt_tokens"), usage.get("completion_tokens"))
         content = data["choices"][0]["message"]["content"]
         # Parse JSON into schema
-        return _parse_structured(content, schema)
+        return _parse_counted(self, content, schema)
+
+    def stream_text(self, system: str, user: str) -> Iterator[str]:
+        # Server-sent "data: {...}" lines, terminated by "data: [DONE]"
+        url = f"{self.base_url}/chat/completions"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        payload = {**self._payload(system, user), "stream": True}
+        started = time.monotonic()
+        usage: dict = {}
+        with httpx.Client(timeout=self.timeout) as client:
+            with client.stream("POST", url, headers=headers, json=payload) as r:
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    event = json.loads(data)
+                    # Only some providers report usage on streams (in the last chunk)
+                    usage = event.get("usage") or usage
+                    choices = event.get("choices") or []
+                    delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                    if delta:
+                        yield delta
+        observe_llm(self, "stream", time.monotonic() - started,
+                    usage.get("prompt_tokens"), usage.get("completion_tokens"))
 
 class OllamaClient:
-    def __init__(self):
-        self.base_url = settings.ollama_base_url.rstrip("/")
-        self.model = settings.ollama_model
-        self.api_key = settings.llm_api_key
+    def __init__(self, base_url: str | None = None, api_key: str | None = None, model: str | None = None):
+        self.base_url = (base_url or settings.ollama_base_url).rstrip("/")
+        self.model = model or settings.ollama_model
+        self.api_key = api_key or settings.llm_api_key
 
     def name(self) -> str:
         return f"local:{self.model}"
 
-    def generate_structured(self, system: str, user: str, schema: Type[BaseModel]) -> BaseModel:
-        url = f"{self.base_url}/api/chat"
-        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
-        payload = {
+    def _payload(self, system: str, user: str, stream: bool) -> dict[str, Any]:
+        return {
             "model": self.model,
             "messages": [
                 {"role": "system", "content": system},
@@ -86,16 +214,49 @@ class OllamaClient:
                 "temperature": settings.llm_temperature,
                 "num_predict": settings.llm_max_tokens,
             },
-            "stream": False,
+            "stream": stream,
         }
+
+    def generate_structured(self, system: str, user: str, schema: Type[BaseModel]) -> BaseModel:
+        url = f"{self.base_url}/api/chat"
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        started = time.monotonic()
         with httpx.Client(timeout=settings.llm_timeout_seconds) as client:
-            r = client.post(url, headers=headers, json=payload)
-            r.raise_for_status()
-            data = r.json()
+            data = _post_with_retry(client, url, headers, self._payload(system, user, stream=False)).json()
+        observe_llm(self, "structured", time.monotonic() - started,
+                    data.get("prompt_eval_count"), data.get("eval_count"))
         content = data["message"]["content"]
-        return _parse_structured(content, schema)
+        return _parse_counted(self, content, schema)
 
-def get_llm_client() -> LLMClient:
-    if settings.llm_mode.lower() in ["ollama", "local"]:
+    def stream_text(self, system: str, user: str) -> Iterator[str]:
+        # Newline-delimited JSON objects, the last one carries "done": true
+        url = f"{self.base_url}/api/chat"
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        started = time.monotonic()
+        data: dict = {}
+        with httpx.Client(timeout=settings.llm_timeout_seconds) as client:
+            with client.stream("POST", url, headers=headers, json=self._payload(system, user, stream=True)) as r:
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    content = (data.get("message") or {}).get("content")
+                    if content:
+                        yield content
+                    if data.get("done"):
+                        break
+        # The final "done" object carries the token counts
+        observe_llm(self, "stream", time.monotonic() - started, data.get("prompt_eval_count"), data.get("eval_count"))
+
+def _client_for(mode: str) -> LLMClient:
+    if mode.lower() in ["ollama", "local"]:
         return OllamaClient()
     return OpenAICompatibleClient()
+
+@traced("get_llm_client")
+def get_llm_client() -> LLMClient:
+    backends = [b.strip() for b in settings.llm_backends.split(",") if b.strip()]
+    if len(backends) > 1:
+        return HedgedChainClient([_client_for(b) for b in backends])
+    return _client_for(backends[0] if backends else settings.llm_mode)
@@ -1,22 +1,30 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 import os
 
 from app.db import SessionLocal, init_db
 from app.services.setup import ensure_defaults_setup
 from app.logging import get_logger
-from app.api import health, teams, sync, metrics, plans
+from app.api import health, teams, sync, metrics, plans, jobs, dashboard
+from app.api.middleware import ProfilingMiddleware, SelectiveGZipMiddleware
+from app.instrumentation.tracing import setup_tracing
+from app.settings import settings
 
 log = get_logger("main")
 
-app = FastAPI(title="EM-Aide")
+app = FastAPI(title="EM-Aide", default_response_class=ORJSONResponse)
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=settings.response_gzip_min_bytes)
+app.add_middleware(ProfilingMiddleware)
+setup_tracing("em-aide-api", app=app)
 
 app.include_router(health.router, prefix="/api")
 app.include_router(teams.router, prefix="/api")
 app.include_router(sync.router, prefix="/api")
 app.include_router(metrics.router, prefix="/api")
 app.include_router(plans.router, prefix="/api")
+app.include_router(jobs.router, prefix="/api")
+app.include_router(dashboard.router, prefix="/api")
 
 UI_DIST = "/app/ui-dist"
 if os.path.isdir(UI_DIST):
@@ -1,7 +1,12 @@
 import datetime as dt
 from sqlalchemy.orm import Session
 from app import models
+from app.services.data_versions import bump_data_version, team_scope
+from app.instrumentation.prom import STAGE_SECONDS
+from app.instrumentation.tracing import traced
 
+@traced("compute_metrics")
+@STAGE_SECONDS.labels(stage="compute_metrics").time()
 def compute_metrics(team_id: int, db: Session) -> dict[str, float]:
     #GIT metrics from PR table + reviews table
     prs_query = db.query(models.PullRequest).filter_by(team_id=team_id).yield_per(1000)
@@ -82,8 +87,36 @@ def compute_metrics(team_id: int, db: Session) -> dict[str, float]:
         "jira_wip_count": float(wip),
         "jira_issue_count": float(total_issues),
     }
+    metrics.update(_commit_metrics(team_id, db, now))
     return metrics
 
+COMMIT_WINDOW_DAYS = 28
+
+def _commit_metrics(team_id: int, db: Session, now: dt.datetime) -> dict[str, float]:
+    """Merge cadence and change-size signals from mirrored commits; empty for teams without a local mirror."""
+    commits_query = (db.query(models.GitCommit.is_merge, models.GitCommit.additions, models.GitCommit.deletions)
+                     .filter(models.GitCommit.team_id == team_id,
+                             models.GitCommit.committed_at >= now - dt.timedelta(days=COMMIT_WINDOW_DAYS))
+                     .yield_per(5000))
+    merges = 0
+    sizes = []
+    for is_merge, additions, deletions in commits_query:
+        if is_merge:
+            merges += 1
+        else:
+            sizes.append(additions + deletions)
+    if not merges and not sizes:
+        return {}
+    sizes.sort()
+    weeks = COMMIT_WINDOW_DAYS / 7
+    return {
+        "git_commits_per_week": len(sizes) / weeks,
+        "git_merges_per_week": merges / weeks,
+        "git_median_commit_lines": float(sizes[len(sizes) // 2]) if sizes else 0.0,
+        "git_p90_commit_lines": float(sizes[int(len(sizes) * 0.9)]) if sizes else 0.0,
+        "git_large_commit_count": float(sum(1 for size in sizes if size >= 1000)),
+    }
+
 
 def snapshot_metrics(team_id: int, db: Session, as_of: dt.date | None = None) -> int:
     as_of = as_of or dt.date.today()
@@ -96,5 +129,6 @@ def snapshot_metrics(team_id: int, db: Session, as_of: dt.date | None = None) ->
         else:
             db.add(models.MetricSnapshot(team_id=team_id, as_of_date=as_of, name=name, value=float(value)))
         upserts += 1
+    bump_data_version(db, team_scope(team_id))
     db.commit()
     return upserts
@@ -0,0 +1,169 @@
+"""Versioned schema changes applied on top of Base.metadata.create_all.
+
+create_all only creates missing tables; anything that alters an existing table goes here as a new,
+append-only entry. Every statement must also be safe on a fresh database where create_all already
+built the current schema. Startup skips create_all and migrations when schema_migrations is already at
+SCHEMA_VERSION and every model table exists (see schema_is_current).
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from app.logging import get_logger
+
+log = get_logger("migrations")
+
+# Arbitrary constant for pg_advisory_lock so api and worker don't migrate concurrently
+MIGRATION_LOCK_KEY = 7261_0001
+
+def _partition_by_month(table: str, column: str, indexes: list[str]) -> list[str]:
+    """Turn `table` into a table range-partitioned on `column`. The existing table is attached as
+    `<table>_legacy` covering everything up to the end of the current month (no data copy); later months
+    get `<table>_pYYYYMM` partitions from app/services/retention.py, with `<table>_default` as catch-all."""
+    legacy = f"{table}_legacy"
+    return [
+        f"UPDATE {table} SET {column} = now() at time zone 'utc' WHERE {column} IS NULL",
+        f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL",
+        f"ALTER TABLE {table} RENAME TO {legacy}",
+        # ATTACH PARTITION needs the partition's primary key to match the parent's (id, column)
+        f"ALTER TABLE {legacy} DROP CONSTRAINT {table}_pkey",
+        f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_pkey PRIMARY KEY (id, {column})",
+        # Free the index names for the partitioned parent
+        f"""DO $$ DECLARE r record; BEGIN
+              FOR r IN SELECT indexname FROM pg_indexes WHERE tablename = '{legacy}' AND indexname <> '{legacy}_pkey' LOOP
+                EXECUTE format('ALTER INDEX %I RENAME TO %I', r.indexname, r.indexname || '_legacy');
+              END LOOP;
+            END $$""",
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE ({column})",
+        # Partitioned primary keys must include the partition column
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})",
+        f"ALTER TABLE {table} ADD FOREIGN KEY (team_id) REFERENCES teams (id)",
+        f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id",
+        *indexes,
+        f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE)"
+        f" TO (date_trunc('month', now() at time zone 'utc') + interval '1 month')",
+        f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT",
+    ]
+
+MIGRATIONS: list[tuple[int, str, list[str]]] = [
+    (1, "store plans and context packets as JSONB", [
+        "ALTER TABLE weekly_plans ALTER COLUMN plan_json TYPE JSONB USING plan_json::jsonb",
+        "ALTER TABLE context_packets ALTER COLUMN content_json TYPE JSONB USING content_json::jsonb",
+    ]),
+    # Composite indexes for the hot read paths; mirrored as Index(...) in app/models.py and
+    # checked by tests/test_query_plans.py. Built CONCURRENTLY (NON_TRANSACTIONAL) so ingest keeps
+    # writing while they build.
+    (2, "composite indexes for hot queries", [
+        # An interrupted CREATE INDEX CONCURRENTLY leaves an invalid index behind that IF NOT EXISTS
+        # would then skip
+        """DO $$ DECLARE r record; BEGIN
+              FOR r IN SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                       WHERE NOT i.indisvalid AND c.relname IN (
+                           'ix_pr_team_created', 'ix_pr_team_updated', 'ix_issue_team_updated',
+                           'ix_metric_team_date', 'ix_metric_team_created', 'ix_context_packet_team_created',
+                           'ix_agent_run_team_created', 'ix_weekly_plan_team_created', 'ix_job_run_team_action_ran') LOOP
+                EXECUTE format('DROP INDEX %I', r.relname);
+              END LOOP;
+            END $$""",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_pr_team_created ON pull_requests (team_id, created_at, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_pr_team_updated ON pull_requests (team_id, updated_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_issue_team_updated ON jira_issues (team_id, updated_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_metric_team_date ON metric_snapshots (team_id, as_of_date, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_metric_team_created ON metric_snapshots (team_id, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_context_packet_team_created ON context_packets (team_id, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_agent_run_team_created ON agent_runs (team_id, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_weekly_plan_team_created ON weekly_plans (team_id, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_job_run_team_action_ran ON job_runs (team_id, action, ran_at)",
+    ]),
+    # Append-only history: monthly partitions so retention can drop whole months
+    (3, "partition context_packets and job_runs by month", [
+        *_partition_by_month("context_packets", "created_at", [
+            "CREATE INDEX ix_context_packets_team_id ON context_packets (team_id)",
+            "CREATE INDEX ix_context_packet_team_created ON context_packets (team_id, created_at)",
+        ]),
+        *_partition_by_month("job_runs", "ran_at", [
+            "CREATE INDEX ix_job_runs_team_id ON job_runs (team_id)",
+            "CREATE INDEX ix_job_runs_action ON job_runs (action)",
+            "CREATE INDEX ix_job_run_team_action_ran ON job_runs (team_id, action, ran_at)",
+        ]),
+    ]),
+    (4, "job progress", [
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS progress_json TEXT",
+    ]),
+    # context_blobs itself is created by create_all
+    (5, "content-addressed context packets", [
+        "ALTER TABLE agent_runs ADD COLUMN IF NOT EXISTS context_hash VARCHAR(64) REFERENCES context_blobs (hash)",
+        "ALTER TABLE weekly_plans ADD COLUMN IF NOT EXISTS context_hash VARCHAR(64) REFERENCES context_blobs (hash)",
+        "CREATE INDEX IF NOT EXISTS ix_agent_runs_context_hash ON agent_runs (context_hash)",
+        "CREATE INDEX IF NOT EXISTS ix_weekly_plans_context_hash ON weekly_plans (context_hash)",
+    ]),
+    (6, "claim order by due time", [
+        "DROP INDEX IF EXISTS ix_job_claim",
+        "CREATE INDEX ix_job_claim ON jobs (priority DESC, run_after, id) WHERE status = 'queued'",
+    ]),
+    (7, "trace ids", [
+        "ALTER TABLE agent_runs ADD COLUMN IF NOT EXISTS trace_id VARCHAR(32)",
+        "ALTER TABLE job_runs ADD COLUMN IF NOT EXISTS trace_id VARCHAR(32)",
+    ]),
+    # git_commits itself is created by create_all
+    (8, "local git mirror ingest", [
+        "ALTER TABLE git_repos ADD COLUMN IF NOT EXISTS mirror_head VARCHAR(40)",
+    ]),
+    # Clone URLs stored with a token in them (GIT_CLONE_URL=https://<token>@host/...); same rule as
+    # app.util.strip_url_credentials for http(s). Rows whose stripped URL already exists stay as they are.
+    (9, "strip credentials from stored repo URLs", [
+        """UPDATE git_repos g SET api_base_url = regexp_replace(g.api_base_url, '^(https?://)[^/]*@', '\\1')
+           WHERE g.api_base_url ~ '^https?://[^/]*@'
+             AND NOT EXISTS (SELECT 1 FROM git_repos o
+                             WHERE o.team_id = g.team_id AND o.owner = g.owner AND o.repo = g.repo
+                               AND o.api_base_url = regexp_replace(g.api_base_url, '^(https?://)[^/]*@', '\\1'))""",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Migrations whose statements can't run inside a transaction block (CREATE INDEX CONCURRENTLY); they
+# run one statement at a time in autocommit mode, so each statement must be safe to re-run
+NON_TRANSACTIONAL = {2}
+
+def schema_is_current(engine: Engine, table_names: set[str]) -> bool:
+    """Whether migrations are at SCHEMA_VERSION and all of `table_names` exist: two catalog queries,
+    where create_all checks each table separately."""
+    with engine.connect() as conn:
+        existing = set(inspect(conn).get_table_names())
+        if "schema_migrations" not in existing or not table_names <= existing:
+            return False
+        return conn.execute(text("SELECT max(version) FROM schema_migrations")).scalar() == SCHEMA_VERSION
+
+def run_migrations(engine: Engine) -> int:
+    """Apply pending migrations in order, each in its own transaction (NON_TRANSACTIONAL ones statement
+    by statement). Returns how many were applied."""
+    applied_now = 0
+    # Session-level lock on its own autocommit connection, held across all the migration transactions;
+    # the same connection runs the NON_TRANSACTIONAL statements
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock:
+        lock.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(
+                    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                    " version INTEGER PRIMARY KEY,"
+                    " description TEXT NOT NULL,"
+                    " applied_at TIMESTAMP NOT NULL DEFAULT (now() at time zone 'utc'))"
+                ))
+                applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+            for version, description, statements in MIGRATIONS:
+                if version in applied:
+                    continue
+                log.info(f"applying migration {version}: {description}")
+                if version in NON_TRANSACTIONAL:
+                    for statement in statements:
+                        lock.execute(text(statement))
+                with engine.begin() as conn:
+                    if version not in NON_TRANSACTIONAL:
+                        for statement in statements:
+                            conn.execute(text(statement))
+                    conn.execute(text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)"),
+                                 {"v": version, "d": description})
+                applied_now += 1
+        finally:
+            lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    return applied_now
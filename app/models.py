@@ -1,5 +1,6 @@
 import datetime as dt
-from sqlalchemy import String, DateTime, Integer, Float, ForeignKey, Text, Boolean, UniqueConstraint
+from sqlalchemy import String, DateTime, Integer, Float, ForeignKey, Text, Boolean, LargeBinary, UniqueConstraint, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db import Base
 
@@ -40,6 +41,8 @@ class GitRepo(Base):
     token_present: Mapped[bool] = mapped_column(Boolean, default=False)
     owner: Mapped[str] = mapped_column(String(200))
     repo: Mapped[str] = mapped_column(String(200))
+    # Tip of the local mirror's HEAD at the last mirror sync; the next one reads only commits after it
+    mirror_head: Mapped[str | None] = mapped_column(String(40), nullable=True)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
 
     team: Mapped["Team"] = relationship(back_populates="git_repos")
@@ -77,7 +80,11 @@ class PullRequest(Base):
     author_login_hash: Mapped[str] = mapped_column(String(64))
     updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
 
-    __table_args__ = (UniqueConstraint("team_id", "git_repo_id", "pr_number", name="uq_pr"),)
+    __table_args__ = (
+        UniqueConstraint("team_id", "git_repo_id", "pr_number", name="uq_pr"),
+        Index("ix_pr_team_created", "team_id", "created_at", "id"),
+        Index("ix_pr_team_updated", "team_id", "updated_at"),
+    )
 
 class Issue(Base):
     __tablename__ = "jira_issues"
@@ -93,7 +100,10 @@ class Issue(Base):
     due_date: Mapped[str | None] = mapped_column(String(30), nullable=True)
     is_blocked: Mapped[bool] = mapped_column(Boolean, default=False)
 
-    __table_args__ = (UniqueConstraint("team_id", "key", name="uq_issue"),)
+    __table_args__ = (
+        UniqueConstraint("team_id", "key", name="uq_issue"),
+        Index("ix_issue_team_updated", "team_id", "updated_at"),
+    )
 
 class MetricSnapshot(Base):
     __tablename__ = "metric_snapshots"
@@ -104,14 +114,33 @@ class MetricSnapshot(Base):
     value: Mapped[float] = mapped_column(Float)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
 
-    __table_args__ = (UniqueConstraint("team_id", "as_of_date", "name", name="uq_metric"),)
+    __table_args__ = (
+        UniqueConstraint("team_id", "as_of_date", "name", name="uq_metric"),
+        Index("ix_metric_team_date", "team_id", "as_of_date", "id"),
+        Index("ix_metric_team_created", "team_id", "created_at"),
+    )
+
+class ContextBlob(Base):
+    """Compressed context packet keyed by the sha256 of its canonical JSON; identical packets are stored once
+    and referenced from agent_runs / weekly_plans (see app/services/context_store.py)."""
+    __tablename__ = "context_blobs"
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    codec: Mapped[str] = mapped_column(String(10))  # zlib / zstd
+    raw_size: Mapped[int] = mapped_column(Integer)
+    size: Mapped[int] = mapped_column(Integer)
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
 
 class ContextPacket(Base):
+    # Legacy: written before context_blobs; still read by the preview for older runs.
+    # Partitioned by month on created_at (migration 3); the database primary key is (id, created_at)
     __tablename__ = "context_packets"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     team_id: Mapped[int] = mapped_column(ForeignKey("teams.id"), index=True)
-    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
-    content_json: Mapped[str] = mapped_column(Text)  # store sanitized JSON
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, nullable=False)
+    content_json: Mapped[dict] = mapped_column(JSONB)  # store sanitized JSON
+
+    __table_args__ = (Index("ix_context_packet_team_created", "team_id", "created_at"),)
 
 class AgentRun(Base):
     __tablename__ = "agent_runs"
@@ -122,6 +151,10 @@ class AgentRun(Base):
     model: Mapped[str] = mapped_column(String(200))
     status: Mapped[str] = mapped_column(String(50), default="ok")
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    context_hash: Mapped[str | None] = mapped_column(ForeignKey("context_blobs.hash"), nullable=True, index=True)
+    trace_id: Mapped[str | None] = mapped_column(String(32), nullable=True)  # OpenTelemetry trace of the run
+
+    __table_args__ = (Index("ix_agent_run_team_created", "team_id", "created_at"),)
 
 class PullRequestReview(Base):
     __tablename__ = "pull_request_reviews"
@@ -135,9 +168,31 @@ class PullRequestReview(Base):
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
 
     __table_args__ = (
+        # Leading (team_id, git_repo_id, pr_number) also serves the per-PR review lookups
         UniqueConstraint("team_id", "git_repo_id", "pr_number", "reviewer_login_hash", "submitted_at", name="uq_pr_review"),
     )
 
+class GitCommit(Base):
+    """Commits read from a local mirror (git provider "git"): hashed author, timestamps, numstat sizes."""
+    __tablename__ = "git_commits"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    team_id: Mapped[int] = mapped_column(ForeignKey("teams.id"))
+    git_repo_id: Mapped[int] = mapped_column(ForeignKey("git_repos.id"))
+    sha: Mapped[str] = mapped_column(String(40))
+    author_hash: Mapped[str] = mapped_column(String(64))
+    authored_at: Mapped[dt.datetime] = mapped_column(DateTime)
+    committed_at: Mapped[dt.datetime] = mapped_column(DateTime)
+    is_merge: Mapped[bool] = mapped_column(Boolean, default=False)
+    additions: Mapped[int] = mapped_column(Integer, default=0)
+    deletions: Mapped[int] = mapped_column(Integer, default=0)
+    files_changed: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("git_repo_id", "sha", name="uq_git_commit"),
+        Index("ix_git_commit_team_committed", "team_id", "committed_at"),
+    )
+
 class WeeklyPlan(Base):
     __tablename__ = "weekly_plans"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -145,21 +200,65 @@ class WeeklyPlan(Base):
     agent_run_id: Mapped[int] = mapped_column(ForeignKey("agent_runs.id"))
     week_start: Mapped[dt.date] = mapped_column()
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
-    plan_json: Mapped[str] = mapped_column(Text)
-
-class ActionLock(Base):
-    __tablename__ = "action_locks"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    team_id: Mapped[int] = mapped_column(ForeignKey("teams.id"), index=True)
-    action: Mapped[str] = mapped_column(String(50))
-    owner: Mapped[str | None] = mapped_column(String(50), nullable=True)
-    locked_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    plan_json: Mapped[dict] = mapped_column(JSONB)
+    context_hash: Mapped[str | None] = mapped_column(ForeignKey("context_blobs.hash"), nullable=True, index=True)
 
-    __table_args__ = (UniqueConstraint("team_id", "action", name="uq_action_lock"),)
+    __table_args__ = (Index("ix_weekly_plan_team_created", "team_id", "created_at"),)
 
 class JobRun(Base):
+    # Partitioned by month on ran_at (migration 3); the database primary key is (id, ran_at)
     __tablename__ = "job_runs"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     team_id: Mapped[int] = mapped_column(ForeignKey("teams.id"), index=True)
     action: Mapped[str] = mapped_column(String(50), index=True)
-    ran_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    ran_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, nullable=False)
+    trace_id: Mapped[str | None] = mapped_column(String(32), nullable=True)
+
+    __table_args__ = (Index("ix_job_run_team_action_ran", "team_id", "action", "ran_at"),)
+
+class Job(Base):
+    """Durable work queue consumed with SELECT ... FOR UPDATE SKIP LOCKED (see app/services/jobs.py)."""
+    __tablename__ = "jobs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    team_id: Mapped[int] = mapped_column(ForeignKey("teams.id"), index=True)
+    kind: Mapped[str] = mapped_column(String(50))  # sync_git / sync_jira / metrics / weekly_plan
+    status: Mapped[str] = mapped_column(String(20), default="queued", index=True)  # queued / running / done / error
+    priority: Mapped[int] = mapped_column(Integer, default=0)
+    dedupe_key: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    payload_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    owner: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3)
+    run_after: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    lease_expires_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+    result_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    progress_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    started_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # At most one queued job per (team, kind, dedupe_key): duplicate submissions coalesce onto it.
+        Index("uq_job_queued", "team_id", "kind", "dedupe_key", unique=True,
+              postgresql_where=text("status = 'queued'")),
+        Index("ix_job_claim", text("priority DESC"), "run_after", "id", postgresql_where=text("status = 'queued'")),
+    )
+
+class WorkerLease(Base):
+    """One row per live worker replica, kept alive by heartbeats; teams are sharded across the
+    unexpired leases (see app/services/sharding.py)."""
+    __tablename__ = "worker_leases"
+    worker_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    started_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    heartbeat_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    expires_at: Mapped[dt.datetime] = mapped_column(DateTime, index=True)
+
+class DataVersion(Base):
+    """Monotonic counter per cache scope ("teams", "team:<id>"), bumped in the same transaction as the
+    writes that change what the dashboard reads. Drives ETags and the API response cache."""
+    __tablename__ = "data_versions"
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
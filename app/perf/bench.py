@@ -0,0 +1,132 @@
+"""Benchmark the DB-side hot paths against a synthetic team.
+
+Seeds (or reuses) the team from app.perf.synthetic, then runs each case `--repeat` times after one
+warm-up run and reports median/p95 latency, peak Python memory (tracemalloc) and the number of SQL
+statements per run. Results can be saved as JSON and compared with a run from another commit:
+
+    python -m app.perf.bench --prs 100000 --output bench-main.json
+    python -m app.perf.bench --prs 100000 --compare bench-main.json
+
+Runs against DATABASE_URL (use a local Postgres, not production).
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import models
+from app.api.teams import _pull_request_map, _pull_request_page
+from app.context.builder import build_context_packet
+from app.db import SessionLocal, engine, init_db
+from app.metrics.compute import compute_metrics, snapshot_metrics
+from app.perf.synthetic import seed_team
+
+def _route_body(result) -> bytes:
+    # Routes serialize through the response cache the same way (app/api/cache.py)
+    return orjson.dumps(result, default=jsonable_encoder)
+
+CASES: dict[str, Callable[[Session, int], object]] = {
+    "compute_metrics": lambda db, team_id: compute_metrics(team_id, db),
+    "snapshot_metrics": lambda db, team_id: snapshot_metrics(team_id, db),
+    "build_context_packet": lambda db, team_id: build_context_packet(
+        db.query(models.Team).filter_by(id=team_id).one(), db),
+    "pull_requests": lambda db, team_id: _route_body(_pull_request_map(db, team_id)),
+    "pull_requests_page": lambda db, team_id: _route_body(
+        _pull_request_page(db, team_id, cursor=None, limit=500, state=None, repo=None)),
+}
+
+def _run_once(fn: Callable[[Session, int], object], team_id: int) -> tuple[float, int, int]:
+    queries = 0
+
+    def count(*args):
+        nonlocal queries
+        queries += 1
+
+    db = SessionLocal()
+    event.listen(engine, "before_cursor_execute", count)
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        fn(db, team_id)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        event.remove(engine, "before_cursor_execute", count)
+        db.rollback()
+        db.close()
+    return elapsed, peak, queries
+
+def run_case(fn: Callable[[Session, int], object], team_id: int, repeat: int) -> dict:
+    _run_once(fn, team_id)  # warm-up: connection pool, plan cache, imports
+    runs = [_run_once(fn, team_id) for _ in range(repeat)]
+    latencies = sorted(r[0] for r in runs)
+    return {
+        "median_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 2),
+        "peak_mem_kb": round(max(r[1] for r in runs) / 1024, 1),
+        "queries": max(r[2] for r in runs),
+    }
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _delta(new: float, old: float) -> str:
+    return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+def _print(results: dict, baseline: dict | None) -> None:
+    base = (baseline or {}).get("cases", {})
+    print(f"{'case':24} {'median ms':>10} {'p95 ms':>10} {'peak KiB':>10} {'queries':>8}")
+    for name, r in results["cases"].items():
+        line = f"{name:24} {r['median_ms']:>10} {r['p95_ms']:>10} {r['peak_mem_kb']:>10} {r['queries']:>8}"
+        if name in base:
+            b = base[name]
+            line += (f"   vs {baseline.get('commit') or 'baseline'}: median {_delta(r['median_ms'], b['median_ms'])},"
+                     f" mem {_delta(r['peak_mem_kb'], b['peak_mem_kb'])}, queries {r['queries'] - b['queries']:+d}")
+        print(line)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prs", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="default: all")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results from an earlier run to diff against")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        team_id = seed_team(db, args.prs, args.seed)
+    finally:
+        db.close()
+
+    results = {"commit": _git_commit(), "prs": args.prs, "seed": args.seed, "repeat": args.repeat, "cases": {}}
+    for name in args.case or CASES:
+        results["cases"][name] = run_case(CASES[name], team_id, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    _print(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""EXPLAIN regression check for the hot read queries.
+
+Runs the real query helpers for one team, captures the SQL they emit, then EXPLAINs each statement
+with the planner's default settings. A query fails when none of its expected indexes appears in its
+plans, or when an index scan feeds a Sort (the index no longer matches the ORDER BY). Plans depend on
+table sizes, so run it against seeded data (tests/test_query_plans.py does this for you):
+
+    python -m app.perf.synthetic --prs 3000 --seed 0 --repos 3 --days 120   # prints the team id
+    python -m app.perf.explain_check --team-id <id>
+
+Exits 1 if any query regressed. Postgres only.
+"""
+import argparse
+import sys
+from typing import Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app import models
+from app.api.metrics import _latest_metrics
+from app.api.teams import _llm_run_rows, _pull_request_page
+from app.context.builder import packet_version
+from app.db import SessionLocal, engine, init_db
+from app.services.plans import get_latest_plan, get_llm_context_preview
+
+def _reviews_for_pr(db: Session, team_id: int):
+    # Same lookup shape as github_ingest's per-review upsert
+    return (db.query(models.PullRequestReview)
+            .filter_by(team_id=team_id, git_repo_id=1, pr_number=1)
+            .all())
+
+def _last_job_run(db: Session, team_id: int):
+    # Same shape as worker._get_last_job_run_time
+    return (db.query(models.JobRun)
+            .filter_by(team_id=team_id, action="sync_git")
+            .order_by(models.JobRun.ran_at.desc())
+            .first())
+
+HOT_QUERIES: dict[str, Callable[[Session, int], object]] = {
+    "latest_plan": get_latest_plan,
+    "latest_context_packet": get_llm_context_preview,
+    "latest_metrics": _latest_metrics,
+    "pull_request_page": lambda db, team_id: _pull_request_page(db, team_id, cursor=None, limit=50,
+                                                                state=None, repo=None),
+    "llm_runs": _llm_run_rows,
+    "reviews_for_pr": _reviews_for_pr,
+    "last_job_run": _last_job_run,
+    "packet_version": lambda db, team_id: packet_version(team_id, db),
+}
+
+def _capture(fn: Callable[[Session, int], object], team_id: int) -> list[tuple[str, object]]:
+    statements: list[tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    db = SessionLocal()
+    try:
+        fn(db, team_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        db.rollback()
+        db.close()
+    return statements
+
+# Index each hot query has to use; a set lists equivalent alternatives. Indexes on partitions count
+# as the partitioned table's index they were created from.
+EXPECTED_INDEXES: dict[str, list[set[str]]] = {
+    "latest_plan": [{"ix_weekly_plan_team_created"}],
+    "latest_context_packet": [{"ix_agent_run_team_created"}],
+    "latest_metrics": [{"ix_metric_team_date"}],
+    "pull_request_page": [{"ix_pr_team_created"}],
+    "llm_runs": [{"ix_agent_run_team_created"}],
+    "reviews_for_pr": [{"uq_pr_review"}],
+    "last_job_run": [{"ix_job_run_team_action_ran"}],
+    "packet_version": [{"ix_metric_snapshots_team_id", "ix_metric_team_date", "ix_metric_team_created"},
+                       {"ix_pull_requests_team_id", "ix_pr_team_created", "ix_pr_team_updated"},
+                       {"ix_pull_request_reviews_team_id", "uq_pr_review"},
+                       {"ix_jira_issues_team_id", "ix_issue_team_updated"}],
+}
+
+_PARENT_INDEXES = text("""
+    WITH RECURSIVE chain(child, parent) AS (
+        SELECT inhrelid, inhparent FROM pg_inherits
+        UNION ALL
+        SELECT chain.child, i.inhparent FROM chain JOIN pg_inherits i ON i.inhrelid = chain.parent
+    )
+    SELECT c.relname, p.relname FROM chain
+    JOIN pg_class c ON c.oid = chain.child
+    JOIN pg_class p ON p.oid = chain.parent
+    WHERE c.relkind = 'i' AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = chain.parent)
+""")
+
+_INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+def _sorts_over_index(node: dict) -> list[str]:
+    """Indexes whose scan output gets sorted again: the index exists but doesn't match the ORDER BY."""
+    if node.get("Node Type") in ("Sort", "Incremental Sort"):
+        return [n["Index Name"] for n in _walk(node) if n.get("Node Type") in _INDEX_SCANS]
+    return [name for child in node.get("Plans", []) for name in _sorts_over_index(child)]
+
+def check_hot_queries(team_id: int, names: list[str] | None = None) -> dict[str, list[str]]:
+    """Map query name -> problems found in its plans (empty list means it uses its index as intended).
+
+    Plans are only meaningful on a realistically sized, ANALYZEd dataset (see app.perf.synthetic):
+    on near-empty tables the planner rightly prefers sequential scans.
+    """
+    with engine.connect() as conn:
+        parents = dict(conn.execute(_PARENT_INDEXES).all())
+    results: dict[str, list[str]] = {}
+    for name in names or HOT_QUERIES:
+        used: set[str] = set()
+        problems: list[str] = []
+        for statement, parameters in _capture(HOT_QUERIES[name], team_id):
+            with engine.connect() as conn:
+                plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+                conn.rollback()
+            root = plan[0]["Plan"]
+            used.update(parents.get(n["Index Name"], n["Index Name"]) for n in _walk(root) if "Index Name" in n)
+            problems.extend(f"sort on top of {parents.get(index, index)}" for index in _sorts_over_index(root))
+        problems.extend(f"uses none of {', '.join(sorted(expected))}"
+                        for expected in EXPECTED_INDEXES[name] if not expected & used)
+        results[name] = problems
+    return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--team-id", type=int, default=1)
+    args = parser.parse_args()
+
+    init_db()
+    results = check_hot_queries(args.team_id)
+    for name, problems in results.items():
+        print(f"{'FAIL' if problems else 'ok  '} {name}" + (f": {'; '.join(problems)}" if problems else ""))
+    return 1 if any(results.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""Local GitHub/Jira stand-in for load-testing ingest.
+
+Serves the endpoints sync_github and sync_jira use (repo, paginated pull list, pull detail, reviews,
+Jira serverInfo/search) from synthesized data of any size, or replays a cassette recorded from the real
+APIs. Point the app at it with GITHUB_API_BASE_URL / JIRA_BASE_URL (or the repo/Jira config rows).
+
+    python -m app.perf.simulator --port 8900 --prs 5000 --latency-ms 80 --error-rate 0.01
+    python -m app.perf.simulator --record https://api.github.com --cassette gh.jsonl   # proxy + record
+    python -m app.perf.simulator --cassette gh.jsonl                                   # replay
+
+Every mode adds the injected latency, random 503s, GitHub rate-limit headers (403 once the budget for the
+window is spent, 429 for Jira) and ETag / If-None-Match 304s. Recorded bodies are sanitized: names, logins, titles and
+free text are replaced by hashes before they are written, and auth headers are never stored.
+"""
+import argparse
+import asyncio
+import collections
+import datetime as dt
+import hashlib
+import json
+import random
+import re
+import sys
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.util import sha256_64
+
+SANITIZED_KEYS = {"title", "body", "login", "name", "email", "displayName", "emailAddress", "summary",
+                  "description", "full_name", "avatar_url", "gravatar_id", "html_url", "message"}
+PASS_HEADERS = {"content-type", "link", "etag", "x-ratelimit-limit", "x-ratelimit-remaining",
+                "x-ratelimit-reset", "retry-after"}
+BASE_PLACEHOLDER = "{{base}}"
+
+_ROUTES = [
+    ("github_repo", re.compile(r"^/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)$")),
+    ("github_pulls", re.compile(r"^/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/pulls$")),
+    ("github_pull", re.compile(r"^/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/pulls/(?P<number>\d+)$")),
+    ("github_reviews", re.compile(r"^/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/pulls/(?P<number>\d+)/reviews$")),
+    ("jira_server_info", re.compile(r"^/rest/api/[23]/serverInfo$")),
+    ("jira_fields", re.compile(r"^/rest/api/[23]/field$")),
+    ("jira_search", re.compile(r"^/rest/api/[23]/search$")),
+]
+
+def route_name(path: str) -> str:
+    for name, pattern in _ROUTES:
+        if pattern.match(path):
+            return name
+    return "other"
+
+def _iso(d: dt.datetime | None) -> str | None:
+    return d.strftime("%Y-%m-%dT%H:%M:%SZ") if d else None
+
+def _jira_time(d: dt.datetime) -> str:
+    return d.strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+def sanitize(value):
+    if isinstance(value, dict):
+        return {k: (sha256_64(str(v))[:16] if k in SANITIZED_KEYS and isinstance(v, str) else sanitize(v))
+                for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v) for v in value]
+    return value
+
+class SyntheticData:
+    """Deterministic per-item data: a PR's list entry, detail and reviews agree however they're fetched."""
+
+    def __init__(self, prs: int, issues: int, days: int, seed: int):
+        self.prs, self.issues, self.days, self.seed = prs, issues, days, seed
+        self.now = dt.datetime.utcnow().replace(microsecond=0)
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(f"{self.seed}:{':'.join(map(str, key))}")
+
+    def pull(self, base: str, owner: str, repo: str, number: int, detail: bool) -> dict:
+        rng = self._rng("pr", owner, repo, number)
+        # Higher numbers are newer; list order (updated desc) is number desc
+        updated = self.now - dt.timedelta(days=self.days * (self.prs - number) / max(self.prs, 1))
+        created = updated - dt.timedelta(hours=rng.lognormvariate(3.0, 1.2))
+        merged = updated if rng.random() < 0.72 else None
+        closed = merged or (updated if rng.random() < 0.3 else None)
+        pr = {
+            "id": number, "number": number, "title": f"Change {number}",
+            "state": "closed" if closed else "open", "user": {"login": f"dev-{rng.randrange(25)}"},
+            "created_at": _iso(created), "updated_at": _iso(updated), "merged_at": _iso(merged),
+            "closed_at": _iso(closed),
+            "url": f"{base}/repos/{owner}/{repo}/pulls/{number}",
+            "html_url": f"https://github.com/{owner}/{repo}/pull/{number}",
+        }
+        if detail:
+            additions = int(rng.lognormvariate(4.1, 1.4))
+            pr.update(additions=additions, deletions=int(additions * rng.betavariate(2, 5)),
+                      changed_files=max(1, additions // 35), merged=merged is not None)
+        return pr
+
+    def reviews(self, owner: str, repo: str, number: int) -> list[dict]:
+        rng = self._rng("reviews", owner, repo, number)
+        pr_created = dt.datetime.strptime(self.pull("", owner, repo, number, False)["created_at"], "%Y-%m-%dT%H:%M:%SZ")
+        out = []
+        submitted = pr_created
+        for i in range(rng.choices([0, 1, 2, 3, 4], [15, 40, 28, 12, 5])[0]):
+            submitted = min(submitted + dt.timedelta(hours=rng.lognormvariate(1.8, 1.3)), self.now)
+            out.append({"id": number * 10 + i, "user": {"login": f"reviewer-{rng.randrange(20)}"},
+                        "state": rng.choice(["APPROVED", "COMMENTED", "CHANGES_REQUESTED"]),
+                        "submitted_at": _iso(submitted)})
+        return out
+
+    def issue(self, base: str, project: str, n: int) -> dict:
+        rng = self._rng("issue", project, n)
+        updated = self.now - dt.timedelta(days=self.days * n / max(self.issues, 1))
+        created = updated - dt.timedelta(days=rng.uniform(0, 30))
+        return {
+            "id": str(10000 + n), "key": f"{project}-{n}", "self": f"{base}/rest/api/2/issue/{10000 + n}",
+            "fields": {
+                "summary": f"Issue {n}",
+                "status": {"name": rng.choices(["To Do", "In Progress", "In Review", "Done"], [30, 25, 10, 35])[0]},
+                "issuetype": {"name": rng.choice(["Story", "Bug", "Task"])},
+                "priority": {"name": rng.choice(["Low", "Medium", "High"])},
+                "assignee": {"displayName": f"person-{rng.randrange(15)}"} if rng.random() < 0.85 else None,
+                "created": _jira_time(created), "updated": _jira_time(updated),
+                "duedate": (updated + dt.timedelta(days=14)).date().isoformat() if rng.random() < 0.3 else None,
+            },
+        }
+
+class Simulator:
+    def __init__(self, data: SyntheticData | None = None, *, latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0.0, rate_limit: int = 0, rate_window: int = 60,
+                 cassette: str | None = None, record: str | None = None, max_page: int = 100, seed: int = 0):
+        self.data = data
+        self.latency_ms, self.jitter_ms, self.error_rate = latency_ms, jitter_ms, error_rate
+        self.rate_limit, self.rate_window = rate_limit, rate_window
+        self.cassette, self.record, self.max_page = cassette, record, max_page
+        self.rng = random.Random(seed)
+        self.stats: collections.Counter[tuple[str, int]] = collections.Counter()
+        self._window_start = time.time()
+        self._used = 0
+        self._tape: dict[str, dict] = {}
+        if cassette and not record:
+            with open(cassette) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._tape[entry["key"]] = entry
+        self.app = Starlette(routes=[Route("/{path:path}", self.handle, methods=["GET", "POST", "HEAD"])])
+
+    # ---- shared behaviour ----
+
+    def _rate_headers(self) -> tuple[bool, dict]:
+        if not self.rate_limit:
+            return True, {}
+        now = time.time()
+        if now - self._window_start >= self.rate_window:
+            self._window_start, self._used = now, 0
+        allowed = self._used < self.rate_limit
+        self._used += allowed
+        reset = int(self._window_start + self.rate_window)
+        return allowed, {"X-RateLimit-Limit": str(self.rate_limit),
+                         "X-RateLimit-Remaining": str(max(self.rate_limit - self._used, 0)),
+                         "X-RateLimit-Reset": str(reset)}
+
+    @staticmethod
+    def _key(request: Request, body: bytes) -> str:
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        digest = hashlib.sha256(body).hexdigest()[:16] if body else ""
+        return f"{request.method} {request.url.path}?{query} {digest}"
+
+    async def handle(self, request: Request) -> Response:
+        body = await request.body()
+        route = route_name(request.url.path)
+        if self.latency_ms or self.jitter_ms:
+            await asyncio.sleep(max(self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000)
+        allowed, headers = self._rate_headers()
+        if not allowed:
+            # GitHub answers 403 with X-RateLimit-Remaining: 0, Jira 429 with Retry-After
+            status = 429 if route.startswith("jira") else 403
+            headers["Retry-After"] = str(max(int(headers["X-RateLimit-Reset"]) - int(time.time()), 1))
+            self.stats[(route, status)] += 1
+            return Response(json.dumps({"message": "API rate limit exceeded"}), status_code=status,
+                            headers=headers, media_type="application/json")
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats[(route, 503)] += 1
+            return Response("service unavailable", status_code=503, headers={**headers, "Retry-After": "1"})
+
+        if self.record:
+            status, content, extra = await self._proxy(request, body)
+        elif self.cassette:
+            status, content, extra = self._replay(request, body)
+        else:
+            status, content, extra = self._synthesize(request, route)
+        headers.update(extra)
+
+        if status == 200 and request.method == "GET":
+            etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+            headers["ETag"] = etag
+            if request.headers.get("if-none-match") == etag:
+                self.stats[(route, 304)] += 1
+                return Response(status_code=304, headers=headers)
+        self.stats[(route, status)] += 1
+        return Response(content, status_code=status, headers=headers, media_type="application/json")
+
+    # ---- record / replay ----
+
+    async def _proxy(self, request: Request, body: bytes) -> tuple[int, bytes, dict]:
+        upstream = self.record.rstrip("/")
+        forward = {k: v for k, v in request.headers.items() if k.lower() in ("authorization", "accept", "content-type")}
+        async with httpx.AsyncClient(timeout=60) as client:
+            r = await client.request(request.method, f"{upstream}{request.url.path}", params=request.url.query,
+                                     content=body, headers=forward)
+        text = r.text.replace(upstream, BASE_PLACEHOLDER)
+        try:
+            text = json.dumps(sanitize(json.loads(text)))
+        except ValueError:
+            pass
+        headers = {k: v.replace(upstream, BASE_PLACEHOLDER) for k, v in r.headers.items() if k.lower() in PASS_HEADERS}
+        with open(self.cassette, "a") as f:
+            f.write(json.dumps({"key": self._key(request, body), "status": r.status_code,
+                                "headers": headers, "body": text}) + "\n")
+        return self._materialize(request, r.status_code, text, headers)
+
+    def _replay(self, request: Request, body: bytes) -> tuple[int, bytes, dict]:
+        entry = self._tape.get(self._key(request, body))
+        if entry is None:
+            return 404, json.dumps({"message": "not in cassette"}).encode(), {}
+        # Recorded rate-limit state is stale on replay; --rate-limit simulates it instead
+        headers = {k: v for k, v in entry["headers"].items() if not k.lower().startswith("x-ratelimit")}
+        return self._materialize(request, entry["status"], entry["body"], headers)
+
+    @staticmethod
+    def _materialize(request: Request, status: int, text: str, headers: dict) -> tuple[int, bytes, dict]:
+        base = str(request.base_url).rstrip("/")
+        headers = {k: v.replace(BASE_PLACEHOLDER, base) for k, v in headers.items() if k.lower() != "etag"}
+        return status, text.replace(BASE_PLACEHOLDER, base).encode(), headers
+
+    # ---- synthesized responses ----
+
+    def _page(self, request: Request, total: int) -> tuple[int, int, dict]:
+        per_page = min(int(request.query_params.get("per_page", 30)), self.max_page)
+        page = int(request.query_params.get("page", 1))
+        headers = {}
+        if page * per_page < total:
+            params = dict(request.query_params, page=str(page + 1))
+            url = request.url.include_query_params(**params)
+            headers["Link"] = f'<{url}>; rel="next"'
+        return (page - 1) * per_page, per_page, headers
+
+    def _synthesize(self, request: Request, route: str) -> tuple[int, bytes, dict]:
+        base = str(request.base_url).rstrip("/")
+        match = dict(_ROUTES)[route].match(request.url.path) if route != "other" else None
+        data = self.data
+        if route == "github_repo":
+            owner, repo = match["owner"], match["repo"]
+            body = {"id": 1, "name": repo, "full_name": f"{owner}/{repo}", "owner": {"login": owner},
+                    "url": f"{base}/repos/{owner}/{repo}"}
+            return 200, json.dumps(body).encode(), {}
+        if route == "github_pulls":
+            start, per_page, headers = self._page(request, data.prs)
+            numbers = range(data.prs - start, max(data.prs - start - per_page, 0), -1)
+            body = [data.pull(base, match["owner"], match["repo"], n, detail=False) for n in numbers]
+            return 200, json.dumps(body).encode(), headers
+        if route == "github_pull":
+            number = int(match["number"])
+            if not 1 <= number <= data.prs:
+                return 404, b'{"message": "Not Found"}', {}
+            return 200, json.dumps(data.pull(base, match["owner"], match["repo"], number, detail=True)).encode(), {}
+        if route == "github_reviews":
+            reviews = data.reviews(match["owner"], match["repo"], int(match["number"]))
+            start, per_page, headers = self._page(request, len(reviews))
+            return 200, json.dumps(reviews[start:start + per_page]).encode(), headers
+        if route == "jira_server_info":
+            body = {"baseUrl": base, "version": "9.12.0", "versionNumbers": [9, 12, 0], "deploymentType": "Server"}
+            return 200, json.dumps(body).encode(), {}
+        if route == "jira_fields":
+            return 200, b"[]", {}
+        if route == "jira_search":
+            project = re.search(r'project\s*=\s*"?([A-Za-z0-9_]+)', request.query_params.get("jql", ""))
+            start = int(request.query_params.get("startAt", 0))
+            size = min(int(request.query_params.get("maxResults", 50)), self.max_page)
+            issues = [data.issue(base, project.group(1) if project else "SIM", n + 1)
+                      for n in range(start, min(start + size, data.issues))]
+            body = {"startAt": start, "maxResults": size, "total": data.issues, "issues": issues}
+            return 200, json.dumps(body).encode(), {}
+        return 404, json.dumps({"message": "not simulated", "path": request.url.path}).encode(), {}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--prs", type=int, default=1000, help="pull requests per repo")
+    parser.add_argument("--issues", type=int, default=500)
+    parser.add_argument("--days", type=int, default=30, help="spread of PR/issue update times")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests per window (0: unlimited)")
+    parser.add_argument("--rate-window", type=int, default=60)
+    parser.add_argument("--max-page", type=int, default=100)
+    parser.add_argument("--cassette", help="JSON lines file to replay (or to append to with --record)")
+    parser.add_argument("--record", metavar="UPSTREAM", help="proxy to this API base URL and record")
+    args = parser.parse_args()
+    if args.record and not args.cassette:
+        parser.error("--record needs --cassette")
+
+    import uvicorn
+    sim = Simulator(SyntheticData(args.prs, args.issues, args.days, args.seed),
+                    latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                    rate_limit=args.rate_limit, rate_window=args.rate_window, cassette=args.cassette,
+                    record=args.record, max_page=args.max_page, seed=args.seed)
+    uvicorn.run(sim.app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Cold-start benchmark for the API and worker processes.
+
+Each run starts a fresh interpreter, so nothing is cached between runs:
+- framework_import: FastAPI, SQLAlchemy, pydantic-settings, uvicorn and the drivers alone, the floor
+  under api_ready that no change in app/ can remove
+- api_import / worker_import: time to import app.main / app.worker
+- api_ready: from spawning uvicorn to the first 200 from /api/health (imports, init_db, default setup)
+
+    python -m app.perf.startup_bench --repeat 5 --budget 1.0
+    python -m app.perf.startup_bench --importtime 15     # slowest imports of app.main
+
+Exits non-zero when the median api_ready exceeds --budget, so CI can guard startup time. Runs against
+DATABASE_URL; start it once beforehand so the first run doesn't also create the schema.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from app.perf.bench import _delta, _git_commit
+from app.perf.sync_bench import _free_port
+
+_IMPORT = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+def import_seconds(module: str) -> float:
+    out = subprocess.run([sys.executable, "-c", _IMPORT.format(module=module)], capture_output=True, text=True,
+                         check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def api_ready_seconds(timeout: float = 30.0) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--log-level", "warning"], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"API exited during startup: {proc.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"API not ready after {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def slowest_imports(module: str, n: int) -> list[tuple[float, str]]:
+    """Top-level packages and app modules from `python -X importtime`, by cumulative time (seconds)."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True,
+                         text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if "." not in name or name.startswith("app."):
+            rows.append((int(cumulative) / 1e6, name))
+    return sorted(rows, reverse=True)[:n]
+
+FRAMEWORKS = ("fastapi, fastapi.responses, sqlalchemy.orm, sqlalchemy.ext.asyncio, sqlalchemy.dialects.postgresql,"
+              " pydantic_settings, uvicorn.main, asyncpg, psycopg2, orjson")
+
+CASES = {
+    "framework_import": lambda: import_seconds(FRAMEWORKS),
+    "api_import": lambda: import_seconds("app.main"),
+    "worker_import": lambda: import_seconds("app.worker"),
+    "api_ready": api_ready_seconds,
+}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="max median api_ready seconds")
+    parser.add_argument("--importtime", type=int, metavar="N", help="also list the N slowest imports of app.main")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results from an earlier run to diff against")
+    args = parser.parse_args()
+
+    results = {"commit": _git_commit(), "repeat": args.repeat, "cases": {}}
+    for name, fn in CASES.items():
+        fn()  # warm-up: .pyc files and the OS page cache
+        runs = sorted(fn() for _ in range(args.repeat))
+        results["cases"][name] = {"median_ms": round(statistics.median(runs) * 1000, 1),
+                                  "max_ms": round(runs[-1] * 1000, 1)}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    base = (baseline or {}).get("cases", {})
+    print(f"{'case':16} {'median ms':>10} {'max ms':>10}")
+    for name, r in results["cases"].items():
+        line = f"{name:16} {r['median_ms']:>10} {r['max_ms']:>10}"
+        if name in base:
+            line += f"   vs {baseline.get('commit') or 'baseline'}: {_delta(r['median_ms'], base[name]['median_ms'])}"
+        print(line)
+    if args.importtime:
+        print("\nslowest imports of app.main (cumulative ms):")
+        for seconds, name in slowest_imports("app.main", args.importtime):
+            print(f"  {seconds * 1000:>8.1f}  {name}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    ready = results["cases"]["api_ready"]["median_ms"] / 1000
+    if ready > args.budget:
+        print(f"\nAPI readiness {ready:.2f}s exceeds the {args.budget:.2f}s budget")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""End-to-end ingest benchmark against the local API simulator.
+
+Starts app.perf.simulator in-process on a free port, points a throwaway team's repos and Jira config at
+it and times full sync_team_git / sync_jira runs: wall time, rows per second and the number of API
+requests per route (including injected errors, rate-limit rejections and 304s). The team is deleted
+when the run ends, so the worker never schedules syncs against the dead port.
+
+    python -m app.perf.sync_bench --prs 2000 --repos 3 --latency-ms 50
+    python -m app.perf.sync_bench --prs 500 --error-rate 0.02 --output sync-main.json
+
+PyGithub's request spacing (GITHUB_SECONDS_BETWEEN_REQUESTS) is turned off unless --throttle is given,
+so the numbers measure our side of the sync rather than the sleep. Runs against DATABASE_URL.
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+
+import uvicorn
+from app import models
+from app.db import SessionLocal, init_db
+from app.ingest.git_ingest import sync_team_git
+from app.ingest.jira_ingest import sync_jira
+from app.perf.bench import _delta, _git_commit
+from app.perf.simulator import Simulator, SyntheticData
+from app.perf.synthetic import delete_team
+from app.services.setup import ensure_git_provider
+from app.settings import settings
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_simulator(sim: Simulator) -> tuple[uvicorn.Server, str]:
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(sim.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="simulator", daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+def _setup_team(db, base_url: str, repos: int) -> int:
+    org = db.query(models.Org).filter_by(name="synthetic").one_or_none() or models.Org(name="synthetic")
+    provider = ensure_git_provider(db, "GitHub", "https://api.github.com")
+    team = models.Team(name=f"sync-bench-{int(time.time())}", org=org)
+    db.add(team)
+    db.flush()
+    db.add_all([models.GitRepo(team_id=team.id, git_provider_id=provider.id, api_base_url=base_url,
+                               owner="simulated", repo=f"repo-{i}") for i in range(repos)])
+    db.add(models.JiraConfig(team_id=team.id, base_url=base_url, email="bench@example.com",
+                             token_present=True, project_key="SIM"))
+    db.commit()
+    return team.id
+
+def _requests(sim: Simulator, prefix: str) -> dict:
+    return {f"{route} {status}": n for (route, status), n in sorted(sim.stats.items()) if route.startswith(prefix)}
+
+def run(args) -> dict:
+    data = SyntheticData(args.prs, args.issues, args.days, args.seed)
+    sim = Simulator(data, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                    rate_limit=args.rate_limit, rate_window=args.rate_window, seed=args.seed)
+    server, base_url = start_simulator(sim)
+    if not args.throttle:
+        settings.github_seconds_between_requests = 0
+    settings.jira_api_token = settings.jira_api_token or "simulated"
+
+    db = SessionLocal()
+    results = {"commit": _git_commit(), "prs": args.prs, "repos": args.repos, "issues": args.issues,
+               "latency_ms": args.latency_ms, "error_rate": args.error_rate, "cases": {}}
+    team_id = _setup_team(db, base_url, args.repos)
+    try:
+        for name, fn, prefix in (("sync_git", lambda: sync_team_git(team_id, db, since_days=args.days), "github"),
+                                 ("sync_jira", lambda: sync_jira(team_id, db), "jira")):
+            sim.stats.clear()
+            started = time.perf_counter()
+            rows = fn()
+            elapsed = time.perf_counter() - started
+            requests = _requests(sim, prefix)
+            results["cases"][name] = {
+                "seconds": round(elapsed, 2), "rows": rows,
+                "rows_per_second": round(rows / elapsed, 1) if elapsed else None,
+                "requests": sum(requests.values()), "by_route": requests,
+            }
+    finally:
+        db.rollback()
+        delete_team(db, team_id)
+        db.commit()
+        db.close()
+        server.should_exit = True
+    return results
+
+def _print(results: dict, baseline: dict | None) -> None:
+    base = (baseline or {}).get("cases", {})
+    print(f"{'case':12} {'seconds':>9} {'rows':>8} {'rows/s':>9} {'requests':>9}")
+    for name, r in results["cases"].items():
+        line = f"{name:12} {r['seconds']:>9} {r['rows']:>8} {r['rows_per_second']:>9} {r['requests']:>9}"
+        if name in base:
+            b = base[name]
+            line += (f"   vs {baseline.get('commit') or 'baseline'}: time {_delta(r['seconds'], b['seconds'])},"
+                     f" requests {r['requests'] - b['requests']:+d}")
+        print(line)
+        for route, n in r["by_route"].items():
+            print(f"    {route:32} {n:>7}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prs", type=int, default=500, help="pull requests per repo")
+    parser.add_argument("--repos", type=int, default=2)
+    parser.add_argument("--issues", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=0)
+    parser.add_argument("--rate-window", type=int, default=60)
+    parser.add_argument("--throttle", action="store_true", help="keep PyGithub's request spacing")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results from an earlier run to diff against")
+    args = parser.parse_args()
+
+    init_db()
+    results = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    _print(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
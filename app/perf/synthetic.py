@@ -0,0 +1,240 @@
+"""Seeded synthetic dataset for benchmarking the DB-side hot paths.
+
+Creates one team ("synthetic-<prs>-<seed>-r<repos>-d<days>-i<issues>") with PRs spread over a few repos, their reviews, Jira
+issues, a history of daily metric snapshots, plan runs with their plans and context blobs, and hourly
+job runs. Distributions are shaped like a real team: most PRs
+merge within a day or two with a long tail, sizes are log-normal (a few mega PRs), most PRs get one
+to three reviews, and open PRs younger than a day usually have none. The same arguments always produce
+the same rows, and an existing team with that name is reused, so benchmarks can be compared across
+commits. A team is seeded under a "(seeding)" name and renamed in the final commit, so an interrupted
+run never leaves a partial team that looks complete; the next run deletes the leftover and starts over.
+
+    python -m app.perf.synthetic --prs 100000 [--seed 0] [--repos 5] [--days 180]
+"""
+import argparse
+import datetime as dt
+import math
+import random
+import sys
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from app import models
+from app.db import Base, SessionLocal, init_db
+from app.schemas import ContextPacketSchema, Signal
+from app.services.context_store import store_context
+from app.services.setup import ensure_git_provider
+from app.util import sha256_64
+from app.logging import get_logger
+
+log = get_logger("synthetic")
+
+CHUNK = 10_000
+
+# Same names compute_metrics writes
+METRIC_NAMES = [
+    "pr_count", "pr_open_count", "pr_avg_cycle_hours", "pr_avg_first_review_latency_hours",
+    "pr_stale_count", "pr_mega_count", "pr_low_review_coverage_count",
+    "jira_blocked_rate", "jira_wip_count", "jira_issue_count",
+]
+
+REVIEW_COUNTS = ([0, 1, 2, 3, 4], [15, 40, 28, 12, 5])
+REVIEW_STATES = (["APPROVED", "COMMENTED", "CHANGES_REQUESTED"], [55, 30, 15])
+ISSUE_STATUSES = (["To Do", "In Progress", "In Review", "Done"], [30, 25, 10, 35])
+ISSUE_TYPES = (["Story", "Bug", "Task"], [45, 25, 30])
+
+def team_name(prs: int, seed: int, repos: int, days: int, issues: int) -> str:
+    return f"synthetic-{prs}-{seed}-r{repos}-d{days}-i{issues}"
+
+def delete_team(db: Session, team_id: int) -> None:
+    """Delete a team and every row that references it, children first. Does not commit."""
+    for table in reversed(Base.metadata.sorted_tables):
+        if "team_id" in table.c:
+            db.execute(table.delete().where(table.c.team_id == team_id))
+    db.execute(delete(models.Team).where(models.Team.id == team_id))
+
+def _lognormal(rng: random.Random, median: float, sigma: float) -> float:
+    return rng.lognormvariate(math.log(median), sigma)
+
+def _people(prefix: str, n: int) -> list[str]:
+    return [sha256_64(f"{prefix}-{i}") for i in range(n)]
+
+def _flush(db: Session, model, rows: list[dict]) -> None:
+    if rows:
+        db.execute(insert(model), rows)
+        rows.clear()
+
+def _setup_team(db: Session, name: str, repos: int) -> tuple[models.Team, list[int]]:
+    org = db.query(models.Org).filter_by(name="synthetic").one_or_none() or models.Org(name="synthetic")
+    provider = ensure_git_provider(db, "GitHub", "https://api.github.com")
+    team = models.Team(name=name, org=org)
+    db.add(team)
+    db.flush()
+    repo_rows = [models.GitRepo(team_id=team.id, git_provider_id=provider.id, api_base_url=provider.api_base_url,
+                                owner="synthetic", repo=f"repo-{i}") for i in range(repos)]
+    db.add_all(repo_rows)
+    db.flush()
+    return team, [r.id for r in repo_rows]
+
+def _generate_prs(db: Session, rng: random.Random, team_id: int, repo_ids: list[int], prs: int,
+                  days: int, now: dt.datetime) -> int:
+    authors = _people("author", 25)
+    author_weights = [1.0 / (i + 1) for i in range(len(authors))]  # a few prolific authors
+    reviewers = _people("reviewer", 20)
+    numbers = {repo_id: 0 for repo_id in repo_ids}
+    pr_rows: list[dict] = []
+    review_rows: list[dict] = []
+    reviews = 0
+    for _ in range(prs):
+        repo_id = rng.choice(repo_ids)
+        numbers[repo_id] += 1
+        created = now - dt.timedelta(seconds=rng.uniform(0, days * 86400))
+        merged = closed = None
+        roll = rng.random()
+        if roll < 0.72:
+            merged = created + dt.timedelta(hours=_lognormal(rng, 20, 1.2))
+        elif roll < 0.82:
+            closed = created + dt.timedelta(hours=_lognormal(rng, 48, 1.0))
+        if (merged or closed or now) > now:
+            merged = closed = None  # would finish in the future: still open
+        additions = int(_lognormal(rng, 60, 1.4))
+        deletions = int(additions * rng.betavariate(2, 5))
+        pr_rows.append({
+            "team_id": team_id, "git_repo_id": repo_id, "pr_number": numbers[repo_id],
+            "title_hash": sha256_64(f"pr-{repo_id}-{numbers[repo_id]}"),
+            "state": "closed" if merged or closed else "open",
+            "created_at": created, "merged_at": merged, "closed_at": merged or closed,
+            "additions": additions, "deletions": deletions,
+            "changed_files": max(1, int((additions + deletions) / 35 * rng.uniform(0.5, 1.5))),
+            "author_login_hash": rng.choices(authors, author_weights)[0],
+            "updated_at": merged or closed or created,
+        })
+
+        young_open = merged is None and closed is None and now - created < dt.timedelta(days=1)
+        n_reviews = 0 if young_open and rng.random() < 0.8 else rng.choices(*REVIEW_COUNTS)[0]
+        submitted = created
+        for reviewer in rng.sample(reviewers, n_reviews):
+            submitted = min(submitted + dt.timedelta(hours=_lognormal(rng, 6, 1.3)), now)
+            review_rows.append({
+                "team_id": team_id, "git_repo_id": repo_id, "pr_number": numbers[repo_id],
+                "reviewer_login_hash": reviewer, "state": rng.choices(*REVIEW_STATES)[0],
+                "submitted_at": submitted, "created_at": submitted,
+            })
+        reviews += n_reviews
+
+        if len(pr_rows) >= CHUNK:
+            _flush(db, models.PullRequest, pr_rows)
+            _flush(db, models.PullRequestReview, review_rows)
+            db.commit()
+    _flush(db, models.PullRequest, pr_rows)
+    _flush(db, models.PullRequestReview, review_rows)
+    return reviews
+
+def _generate_issues(db: Session, rng: random.Random, team_id: int, issues: int, days: int, now: dt.datetime) -> None:
+    assignees = _people("assignee", 15)
+    rows: list[dict] = []
+    for i in range(issues):
+        created = now - dt.timedelta(seconds=rng.uniform(0, days * 86400))
+        rows.append({
+            "team_id": team_id, "key": f"SYN-{i + 1}",
+            "status": rng.choices(*ISSUE_STATUSES)[0], "issue_type": rng.choices(*ISSUE_TYPES)[0],
+            "priority": rng.choice(["Low", "Medium", "High"]),
+            "assignee_hash": rng.choice(assignees) if rng.random() < 0.85 else None,
+            "created_at": created,
+            "updated_at": created + (now - created) * rng.random(),
+            "is_blocked": rng.random() < 0.05,
+        })
+        if len(rows) >= CHUNK:
+            _flush(db, models.Issue, rows)
+    _flush(db, models.Issue, rows)
+
+def _generate_snapshots(db: Session, rng: random.Random, team_id: int, days: int, now: dt.datetime) -> None:
+    rows = [{"team_id": team_id, "as_of_date": (now - dt.timedelta(days=d)).date(), "name": name,
+             "value": round(rng.uniform(0, 100), 2), "created_at": now - dt.timedelta(days=d)}
+            for d in range(days) for name in METRIC_NAMES]
+    for i in range(0, len(rows), CHUNK):
+        _flush(db, models.MetricSnapshot, rows[i:i + CHUNK])
+
+def _generate_runs(db: Session, rng: random.Random, team_id: int, name: str, days: int, now: dt.datetime) -> int:
+    # About two plan runs a day, each with its plan; the context packet changes weekly (one blob per week)
+    blobs: dict[dt.date, str] = {}
+    runs: list[dict] = []
+    for d in range(days):
+        for _ in range(2):
+            created = now - dt.timedelta(days=d, seconds=rng.uniform(0, 86400))
+            week = created.date() - dt.timedelta(days=created.weekday())
+            if week not in blobs:
+                packet = ContextPacketSchema(
+                    org="synthetic", team=name, as_of=dt.datetime.combine(week, dt.time()), entities=[],
+                    signals=[Signal(name=name, value=round(rng.uniform(0, 100), 2), unit="count")
+                             for name in METRIC_NAMES])
+                blobs[week] = store_context(db, packet)
+            runs.append({"team_id": team_id, "created_at": created, "llm_mode": "openai", "model": "synthetic",
+                         "status": "ok", "context_hash": blobs[week]})
+    run_ids = db.execute(insert(models.AgentRun).returning(models.AgentRun.id, sort_by_parameter_order=True),
+                         runs).scalars().all()
+    plans = [{"team_id": team_id, "agent_run_id": run_id, "week_start": run["created_at"].date(),
+              "created_at": run["created_at"], "context_hash": run["context_hash"],
+              "plan_json": {"top_actions": [], "top_risks": [], "summary": "synthetic"}}
+             for run_id, run in zip(run_ids, runs)]
+    for i in range(0, len(plans), CHUNK):
+        _flush(db, models.WeeklyPlan, plans[i:i + CHUNK])
+
+    job_runs: list[dict] = []
+    for hour in range(days * 24):
+        ran_at = now - dt.timedelta(hours=hour, seconds=rng.uniform(0, 600))
+        actions = ["sync_git", "sync_jira"] + (["metrics"] if hour % 24 == 0 else [])
+        job_runs.extend({"team_id": team_id, "action": action, "ran_at": ran_at} for action in actions)
+        if len(job_runs) >= CHUNK:
+            _flush(db, models.JobRun, job_runs)
+    _flush(db, models.JobRun, job_runs)
+    return len(runs)
+
+def seed_team(db: Session, prs: int, seed: int = 0, repos: int = 5, days: int = 180,
+              issues: int | None = None) -> int:
+    """Create (or reuse) the synthetic team for these parameters and return its id."""
+    issues = prs // 2 if issues is None else issues
+    name = team_name(prs, seed, repos, days, issues)
+    existing = db.query(models.Team).filter_by(name=name).one_or_none()
+    if existing:
+        return existing.id
+    pending = f"{name} (seeding)"
+    for (leftover,) in db.query(models.Team.id).filter_by(name=pending).all():
+        log.warning(f"deleting team {leftover} left over from an interrupted seed of {name}")
+        delete_team(db, leftover)
+    db.commit()
+    rng = random.Random(seed)
+    # Pinned to the day, so a rerun on the same day generates identical timestamps
+    now = dt.datetime.combine(dt.date.today(), dt.time())
+    team, repo_ids = _setup_team(db, pending, repos)
+    reviews = _generate_prs(db, rng, team.id, repo_ids, prs, days, now)
+    _generate_issues(db, rng, team.id, issues, days, now)
+    _generate_snapshots(db, rng, team.id, days, now)
+    runs = _generate_runs(db, rng, team.id, name, days, now)
+    # The rename commits with the last rows: only a complete team ever carries the real name
+    team.name = name
+    db.commit()
+    log.info(f"seeded team {team.id} ({name}): {prs} PRs, {reviews} reviews, {issues} issues, "
+             f"{days * len(METRIC_NAMES)} snapshots, {runs} plan runs")
+    return team.id
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prs", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repos", type=int, default=5)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--issues", type=int, default=None, help="default: half the PR count")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        team_id = seed_team(db, args.prs, args.seed, args.repos, args.days, args.issues)
+    finally:
+        db.close()
+    print(team_id)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -47,3 +47,13 @@ class WeeklyPlanSchema(BaseModel):
     top_actions: List[ActionSchema]
     top_risks: List[RiskSchema]
     summary: str
+
+# Partial responses used when the plan is generated as separate concurrent calls
+class ActionsPartSchema(BaseModel):
+    top_actions: List[ActionSchema]
+
+class RisksPartSchema(BaseModel):
+    top_risks: List[RiskSchema]
+
+class SummaryPartSchema(BaseModel):
+    summary: str
@@ -0,0 +1,297 @@
+"""Bulk export of a team's history to Parquet/Arrow files, and bulk import through COPY.
+
+Export streams rows with a server-side cursor and writes one row group / record batch per chunk, so memory
+stays flat whatever the table size. It reads from DATABASE_READ_URL when configured, keeping analyst
+extracts off the primary.
+
+Import reads Parquet, Arrow IPC or CSV files in chunks, hashes any raw identifying columns exactly like
+ingest does (the raw values are never stored), COPYs each chunk into a temporary staging table and inserts
+from there with ON CONFLICT DO NOTHING, so re-importing the same files is a no-op.
+
+    python -m app.services.bulk export --team-id 3 --dir export/ [--format parquet|arrow] [--table ...]
+    python -m app.services.bulk import --team-id 3 --dir history/ [--queue]
+
+With --queue the worker does the work, on its own filesystem: --dir is then relative to BULK_DIR, a volume
+the worker and the host running the command both mount. Needs the optional `pyarrow` package.
+"""
+import argparse
+import functools
+import io
+import os
+import sys
+from typing import Callable, Iterator
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, String, Text, create_engine, select
+from sqlalchemy.engine import Engine
+from app import models
+from app.db import SessionLocal, engine
+from app.settings import settings
+from app.util import sha256_64
+from app.logging import get_logger
+
+log = get_logger("bulk")
+
+TABLES = {
+    "pull_requests": models.PullRequest,
+    "pull_request_reviews": models.PullRequestReview,
+    "jira_issues": models.Issue,
+    "metric_snapshots": models.MetricSnapshot,
+    "git_commits": models.GitCommit,
+}
+
+# Raw columns accepted on import -> (stored column, hash). Same rules as app/ingest/*.
+HASHED = {
+    "pull_requests": {
+        "title": ("title_hash", lambda v: sha256_64(v or "")),
+        "author_login": ("author_login_hash", lambda v: sha256_64(v or "unknown")),
+    },
+    "pull_request_reviews": {"reviewer_login": ("reviewer_login_hash", lambda v: sha256_64(v or "unknown"))},
+    "jira_issues": {"assignee": ("assignee_hash", lambda v: sha256_64(v) if v else None)},
+    "git_commits": {"author_email": ("author_hash", lambda v: sha256_64((v or "").lower()))},
+}
+
+FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".csv": "csv"}
+
+class BulkError(Exception):
+    pass
+
+def _pa():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise BulkError("bulk export/import needs the 'pyarrow' package") from exc
+    return pyarrow
+
+def _columns(model) -> list:
+    return [c for c in model.__table__.columns if c.name != "id"]
+
+def _arrow_type(pa, column):
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, (String, Text)):
+        return pa.string()
+    raise BulkError(f"no Arrow type for {column.table.name}.{column.name} ({column.type})")
+
+@functools.lru_cache(maxsize=1)
+def _read_engine() -> Engine:
+    if settings.database_read_url:
+        return create_engine(settings.database_read_url, pool_pre_ping=True)
+    return engine
+
+def queued_dir(directory: str) -> str:
+    """Resolve a queued job's directory, which is given relative to BULK_DIR (see main)."""
+    base = os.path.abspath(settings.bulk_dir)
+    path = os.path.abspath(os.path.join(base, directory))
+    if os.path.isabs(directory) or os.path.commonpath([base, path]) != base:
+        raise BulkError(f"queued jobs take a directory relative to BULK_DIR ({settings.bulk_dir}), got {directory!r}")
+    return path
+
+# ---- export ----
+
+def _writer(pa, path: str, schema, fmt: str):
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(path, schema, compression="zstd")
+    if fmt == "arrow":
+        return pa.ipc.new_file(path, schema)
+    raise BulkError(f"unknown export format {fmt!r} (expected parquet or arrow)")
+
+def export_table(team_id: int, table: str, path: str, fmt: str = "parquet",
+                 chunk_rows: int | None = None) -> int:
+    """Write one table's rows for the team to `path`. Returns the row count.
+
+    git_repo_id goes out as `repo` ("owner/name"), so the file re-imports through the same repo lookup
+    as any other import instead of carrying ids that only mean something in this database."""
+    pa = _pa()
+    model = TABLES[table]
+    columns, fields = [], []
+    for c in _columns(model):
+        if c.name == "git_repo_id":
+            columns.append((models.GitRepo.owner + "/" + models.GitRepo.repo).label("repo"))
+            fields.append(("repo", pa.string()))
+        else:
+            columns.append(c)
+            fields.append((c.name, _arrow_type(pa, c)))
+    schema = pa.schema(fields)
+    query = select(*columns).where(model.team_id == team_id)
+    if "git_repo_id" in model.__table__.columns:
+        query = query.join(models.GitRepo, models.GitRepo.id == model.git_repo_id)
+    chunk_rows = chunk_rows or settings.bulk_chunk_rows
+    rows = 0
+    with _read_engine().connect() as conn, _writer(pa, path, schema, fmt) as writer:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(query)
+        for chunk in result.partitions():
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    log.info(f"exported {rows} {table} rows for team {team_id} -> {path}")
+    return rows
+
+def export_team(team_id: int, directory: str, fmt: str = "parquet", tables: list[str] | None = None,
+                progress: Callable[[dict], None] | None = None) -> dict[str, int]:
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for i, table in enumerate(tables or TABLES):
+        counts[table] = export_table(team_id, table, os.path.join(directory, f"{table}.{fmt}"), fmt)
+        if progress:
+            progress({"step": table, "done": i + 1, "total": len(tables or TABLES)})
+    return counts
+
+# ---- import ----
+
+def _batches(pa, path: str, chunk_rows: int) -> Iterator:
+    fmt = FORMATS.get(os.path.splitext(path)[1])
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        yield from pq.ParquetFile(path).iter_batches(batch_size=chunk_rows)
+    elif fmt == "arrow":
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+    elif fmt == "csv":
+        import pyarrow.csv as pacsv
+        yield from pacsv.open_csv(path, read_options=pacsv.ReadOptions(block_size=chunk_rows * 256))
+    else:
+        raise BulkError(f"can't import {path}: expected .parquet, .arrow/.feather or .csv")
+
+def _prepare(pa, table: str, batch, team_id: int, repo_ids: dict[str, int], schema):
+    """Hash raw columns, pin team_id, resolve `repo` ("owner/name") to git_repo_id (or check raw ids
+    belong to the team), fill Python-side defaults (COPY doesn't run them) and cast to the table's types."""
+    n = batch.num_rows
+    data = {name: batch.column(i) for i, name in enumerate(batch.schema.names)}
+    for raw, (column, hash_fn) in HASHED.get(table, {}).items():
+        if raw in data:
+            data[column] = pa.array([hash_fn(v) for v in data.pop(raw).to_pylist()], type=pa.string())
+    data["team_id"] = pa.array([team_id] * n, type=pa.int64())
+    if "repo" in data and "git_repo_id" in schema.names:
+        names = data.pop("repo").to_pylist()
+        missing = {name for name in names if name not in repo_ids}
+        if missing:
+            raise BulkError(f"{table}: unknown repos for this team: {', '.join(sorted(missing)[:5])}")
+        data["git_repo_id"] = pa.array([repo_ids[name] for name in names], type=pa.int64())
+    elif "git_repo_id" in data:
+        # Raw ids are accepted, but only the team's own: anything else would attach rows to another team's repo
+        owned = set(repo_ids.values())
+        foreign = {v for v in data["git_repo_id"].to_pylist() if v not in owned}
+        if foreign:
+            raise BulkError(f"{table}: git_repo_id not owned by this team: "
+                            f"{', '.join(str(v) for v in sorted(foreign, key=str)[:5])}")
+    ignored = set(data) - set(schema.names)
+    if ignored:
+        raise BulkError(f"{table}: unexpected columns {', '.join(sorted(ignored))}")
+
+    arrays = []
+    for field, column in zip(schema, _columns(TABLES[table])):
+        if field.name in data:
+            arrays.append(data[field.name].cast(field.type))
+        elif column.default is not None:
+            value = column.default.arg(None) if column.default.is_callable else column.default.arg
+            arrays.append(pa.array([value] * n, type=field.type))
+        elif column.nullable:
+            arrays.append(pa.nulls(n, type=field.type))
+        else:
+            raise BulkError(f"{table}: required column {field.name} is missing")
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def import_table(team_id: int, table: str, path: str, chunk_rows: int | None = None) -> tuple[int, int]:
+    """Load a file into `table` for the team. Returns (rows read, rows inserted)."""
+    pa = _pa()
+    import pyarrow.csv as pacsv
+
+    model = TABLES[table]
+    columns = [c.name for c in _columns(model)]
+    schema = pa.schema([(c.name, _arrow_type(pa, c)) for c in _columns(model)])
+    chunk_rows = chunk_rows or settings.bulk_chunk_rows
+    with SessionLocal() as db:
+        repo_ids = {f"{r.owner}/{r.repo}": r.id for r in db.query(models.GitRepo).filter_by(team_id=team_id)}
+
+    col_list = ", ".join(columns)
+    read = inserted = 0
+    conn = engine.raw_connection()  # COPY needs the DBAPI (psycopg2) cursor
+    try:
+        cur = conn.cursor()
+        # A pooled connection may still hold the stage from an import that failed midway
+        cur.execute("DROP TABLE IF EXISTS bulk_stage")
+        cur.execute(f"CREATE TEMP TABLE bulk_stage AS SELECT {col_list} FROM {table} WITH NO DATA")
+        for batch in _batches(pa, path, chunk_rows):
+            batch = _prepare(pa, table, batch, team_id, repo_ids, schema)
+            buf = io.BytesIO()
+            pacsv.write_csv(batch, buf, pacsv.WriteOptions(include_header=False))
+            buf.seek(0)
+            cur.copy_expert(f"COPY bulk_stage ({col_list}) FROM STDIN WITH (FORMAT csv)", buf)
+            cur.execute(f"INSERT INTO {table} ({col_list}) SELECT {col_list} FROM bulk_stage ON CONFLICT DO NOTHING")
+            inserted += cur.rowcount
+            cur.execute("TRUNCATE bulk_stage")
+            conn.commit()  # one transaction per chunk: bounded WAL and locks, and progress survives a failure
+            read += batch.num_rows
+        cur.execute("DROP TABLE bulk_stage")
+        conn.commit()
+    finally:
+        conn.close()
+    log.info(f"imported {path} into {table} for team {team_id}: {read} read, {inserted} new")
+    return read, inserted
+
+def import_team(team_id: int, directory: str, tables: list[str] | None = None,
+                progress: Callable[[dict], None] | None = None) -> dict[str, dict]:
+    """Import every `<table>.<parquet|arrow|feather|csv>` found in `directory`."""
+    from app.services.data_versions import bump_data_version, team_scope
+
+    files = [(table, os.path.join(directory, name)) for name in sorted(os.listdir(directory))
+             for table in [os.path.splitext(name)[0]]
+             if table in TABLES and (not tables or table in tables) and os.path.splitext(name)[1] in FORMATS]
+    if not files:
+        raise BulkError(f"no importable files in {directory} (expected e.g. pull_requests.parquet)")
+    counts = {}
+    for i, (table, path) in enumerate(files):
+        read, inserted = import_table(team_id, table, path)
+        counts[table] = {"read": read, "inserted": inserted}
+        if progress:
+            progress({"step": table, "done": i + 1, "total": len(files)})
+    if any(c["inserted"] for c in counts.values()):
+        with SessionLocal() as db:
+            bump_data_version(db, team_scope(team_id))
+            db.commit()
+    return counts
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("--team-id", type=int, required=True)
+    parser.add_argument("--dir", required=True)
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet", help="export format")
+    parser.add_argument("--table", action="append", choices=sorted(TABLES), help="default: all")
+    parser.add_argument("--queue", action="store_true", help="run as a worker job instead of in this process")
+    args = parser.parse_args()
+
+    if args.queue:
+        from app.services.jobs import submit_job
+        # The worker resolves the directory against its own BULK_DIR; an absolute path from this host would
+        # point at nothing (or at the wrong files) inside the worker's container
+        try:
+            queued_dir(args.dir)
+        except BulkError as exc:
+            parser.error(str(exc))
+        payload = {"dir": args.dir, "format": args.format, "tables": args.table}
+        with SessionLocal() as db:
+            job, _ = submit_job(db, args.team_id, f"bulk_{args.command}", payload=payload, owner="cli")
+        print(f"queued job {job.id}")
+        return 0
+    if args.command == "export":
+        counts = export_team(args.team_id, args.dir, args.format, args.table)
+    else:
+        counts = import_team(args.team_id, args.dir, args.table)
+    for table, count in counts.items():
+        print(f"{table:24} {count}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import datetime as dt
+import hashlib
+import zlib
+
+import orjson
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app import models
+from app.settings import settings
+from app.schemas import ContextPacketSchema
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError("zstd context blobs need the 'zstandard' package") from exc
+    return zstandard
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=settings.context_blob_level).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, settings.context_blob_level)
+    raise ValueError(f"unknown context blob codec: {codec}")
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return _zstd().ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"unknown context blob codec: {codec}")
+
+def packet_bytes(packet: ContextPacketSchema) -> bytes:
+    # Sorted keys: the same packet always serializes (and hashes) the same way
+    return orjson.dumps(packet.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS)
+
+def store_context(db: Session, packet: ContextPacketSchema) -> str:
+    """Content-addressed write: returns the packet's sha256, storing the compressed blob only if it
+    isn't there yet. Does not commit.
+
+    Reusing a blob bumps its created_at, and the row stays locked until the caller commits, so
+    prune_context_blobs (which spares blobs younger than a day) can't delete it before the run or plan
+    that references it is committed.
+    """
+    raw = packet_bytes(packet)
+    digest = hashlib.sha256(raw).hexdigest()
+    now = dt.datetime.utcnow()
+    if db.query(models.ContextBlob).filter_by(hash=digest).update({"created_at": now}, synchronize_session=False):
+        return digest
+    codec = settings.context_blob_codec
+    data = _compress(raw, codec)
+    db.execute(insert(models.ContextBlob)
+               .values(hash=digest, codec=codec, raw_size=len(raw), size=len(data), data=data, created_at=now)
+               .on_conflict_do_update(index_elements=[models.ContextBlob.hash], set_={"created_at": now}))
+    return digest
+
+def load_context(db: Session, digest: str) -> dict | None:
+    blob = db.query(models.ContextBlob).filter_by(hash=digest).one_or_none()
+    return orjson.loads(_decompress(blob.data, blob.codec)) if blob else None
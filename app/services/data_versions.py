@@ -0,0 +1,27 @@
+import datetime as dt
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app import models
+
+TEAMS_SCOPE = "teams"
+
+def team_scope(team_id: int) -> str:
+    return f"team:{team_id}"
+
+def bump_data_version(db: Session, *scopes: str) -> None:
+    """Increment the given scopes. Does not commit: the bump lands with the caller's writes."""
+    now = dt.datetime.utcnow()
+    for scope in scopes:
+        stmt = insert(models.DataVersion).values(key=scope, version=1, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.DataVersion.key],
+            set_={"version": models.DataVersion.version + 1, "updated_at": now},
+        )
+        db.execute(stmt)
+
+def get_data_versions(db: Session, scopes: list[str]) -> dict[str, int]:
+    rows = db.query(models.DataVersion.key, models.DataVersion.version)\
+        .filter(models.DataVersion.key.in_(scopes)).all()
+    found = {key: version for key, version in rows}
+    return {scope: found.get(scope, 0) for scope in scopes}
@@ -0,0 +1,292 @@
+import datetime as dt
+import json
+import threading
+import zlib
+from typing import Any
+
+from sqlalchemy import exists, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from app import models
+from app.db import SessionLocal
+from app.settings import settings
+from app.instrumentation.prom import LOCK_CONTENTION
+from app.logging import get_logger
+
+log = get_logger("jobs")
+
+ACTIVE_STATUSES = ("queued", "running")
+TERMINAL_STATUSES = ("done", "error")
+
+# Higher runs first; user-initiated work jumps ahead of scheduled work.
+PRIORITY_SCHEDULED = 0
+PRIORITY_INTERACTIVE = 10
+
+CLAIM_BATCH = 10
+
+class JobBusy(Exception):
+    pass
+
+def _find_inflight(db: Session, team_id: int, kind: str, dedupe_key: str | None,
+                   statuses: tuple[str, ...]) -> models.Job | None:
+    return (db.query(models.Job)
+            .filter_by(team_id=team_id, kind=kind, dedupe_key=dedupe_key)
+            .filter(models.Job.status.in_(statuses))
+            .order_by(models.Job.id.desc())
+            .first())
+
+def submit_job(db: Session, team_id: int, kind: str, *, dedupe_key: str | None = None,
+               payload: dict | None = None, priority: int = PRIORITY_SCHEDULED, owner: str | None = None,
+               run_after: dt.datetime | None = None, coalesce_running: bool = False) -> tuple[models.Job, bool]:
+    """Queue a job, or return the queued one with the same dedupe key (and the running one too
+    when coalesce_running is set). Returns (job, created)."""
+    statuses = ACTIVE_STATUSES if coalesce_running else ("queued",)
+    if dedupe_key is not None:
+        existing = _find_inflight(db, team_id, kind, dedupe_key, statuses)
+        if existing:
+            if priority > existing.priority and existing.status == "queued":
+                existing.priority = priority
+                db.commit()
+            return existing, False
+
+    job = models.Job(
+        team_id=team_id,
+        kind=kind,
+        dedupe_key=dedupe_key,
+        payload_json=json.dumps(payload) if payload is not None else None,
+        priority=priority,
+        owner=owner,
+        status="queued",
+        max_attempts=settings.job_max_attempts,
+        run_after=run_after or dt.datetime.utcnow(),
+    )
+    try:
+        db.add(job)
+        db.commit()
+    except IntegrityError:
+        # Lost the race against a concurrent submission; coalesce onto the winner.
+        db.rollback()
+        existing = _find_inflight(db, team_id, kind, dedupe_key, statuses)
+        if existing:
+            return existing, False
+        raise
+    db.refresh(job)
+    return job, True
+
+def debounce_job(db: Session, team_id: int, kind: str, dedupe_key: str, *, delay_seconds: int,
+                 max_delay_seconds: int, payload: dict | None = None) -> tuple[models.Job, bool]:
+    """Queue a job to run `delay_seconds` from now. If one with the same key is still queued, push it
+    back instead, but never past `max_delay_seconds` after it was first queued, so a steady stream of
+    triggers still gets a run. Returns (job, created)."""
+    now = dt.datetime.utcnow()
+    run_after = now + dt.timedelta(seconds=delay_seconds)
+    existing = _find_inflight(db, team_id, kind, dedupe_key, ("queued",))
+    if existing:
+        cap = existing.created_at + dt.timedelta(seconds=max_delay_seconds)
+        existing.run_after = max(existing.run_after, min(run_after, cap))
+        db.commit()
+        return existing, False
+    return submit_job(db, team_id, kind, dedupe_key=dedupe_key, payload=payload, run_after=run_after)
+
+def reclaim_expired(db: Session) -> int:
+    """Requeue running jobs whose lease ran out (worker died); give up after max_attempts."""
+    now = dt.datetime.utcnow()
+    expired = (db.query(models.Job)
+               .filter(models.Job.status == "running", models.Job.lease_expires_at < now)
+               .with_for_update(skip_locked=True)
+               .all())
+    for job in expired:
+        log.warning(f"job {job.id} ({job.kind}) lease held by {job.owner} expired")
+        if job.attempts < job.max_attempts:
+            job.status = "queued"
+        else:
+            job.status = "error"
+            job.error = f"lease expired after {job.attempts} attempts"
+            job.finished_at = now
+        job.lease_expires_at = None
+    db.commit()
+    return len(expired)
+
+def _serial_lock(db: Session, team_id: int, kind: str) -> bool:
+    # Transaction-scoped advisory lock: serializes claims for one (team, kind) across workers.
+    kind_key = zlib.crc32(kind.encode("utf-8")) & 0x7FFFFFFF
+    return bool(db.execute(select(func.pg_try_advisory_xact_lock(team_id, kind_key))).scalar())
+
+def _is_running(db: Session, team_id: int, kind: str) -> bool:
+    return db.query(
+        exists().where(models.Job.team_id == team_id, models.Job.kind == kind, models.Job.status == "running")
+    ).scalar()
+
+def _mark_running(job: models.Job, worker: str, now: dt.datetime) -> None:
+    job.status = "running"
+    job.owner = worker
+    job.attempts = (job.attempts or 0) + 1
+    job.started_at = now
+    job.heartbeat_at = now
+    job.lease_expires_at = now + dt.timedelta(seconds=settings.job_lease_seconds)
+
+def _running_for_team(db: Session, team_id: int) -> int:
+    return db.query(func.count(models.Job.id)).filter_by(team_id=team_id, status="running").scalar()
+
+def claim_next_job(db: Session, worker: str, kinds: list[str] | None = None,
+                   team_ids: list[int] | None = None,
+                   unsharded_kinds: list[str] | None = None) -> models.Job | None:
+    """SELECT ... FOR UPDATE SKIP LOCKED the best queued job whose (team, kind) has nothing running.
+    Within a priority, jobs run in due-time order, and a team already at JOB_MAX_RUNNING_PER_TEAM is
+    skipped so one large team can't occupy every consumer. With `team_ids` (this worker's shard), other
+    teams' jobs are only taken once they've waited JOB_STEAL_AFTER_SECONDS, except `unsharded_kinds`:
+    global jobs that are only filed under some team, taken whatever team that is."""
+    reclaim_expired(db)
+    now = dt.datetime.utcnow()
+    running = aliased(models.Job)
+    busy = exists().where(
+        running.team_id == models.Job.team_id,
+        running.kind == models.Job.kind,
+        running.status == "running",
+    )
+    team_running = (select(func.count(running.id))
+                    .where(running.team_id == models.Job.team_id, running.status == "running")
+                    .scalar_subquery())
+    q = (db.query(models.Job)
+         .filter(models.Job.status == "queued", models.Job.run_after <= now)
+         .filter(~busy)
+         .filter(team_running < settings.job_max_running_per_team))
+    if kinds:
+        q = q.filter(models.Job.kind.in_(kinds))
+    if team_ids is not None:
+        steal_before = now - dt.timedelta(seconds=settings.job_steal_after_seconds)
+        q = q.filter(or_(models.Job.team_id.in_(team_ids), models.Job.run_after <= steal_before,
+                         models.Job.kind.in_(unsharded_kinds or [])))
+    candidates = (q.order_by(models.Job.priority.desc(), models.Job.run_after, models.Job.id)
+                  .with_for_update(skip_locked=True, of=models.Job)
+                  .limit(CLAIM_BATCH)
+                  .all())
+    claimed: set[tuple[int, str]] = set()
+    for job in candidates:
+        key = (job.team_id, job.kind)
+        if key in claimed:
+            continue
+        if not _serial_lock(db, job.team_id, job.kind):
+            LOCK_CONTENTION.labels(lock="job_claim").inc()
+            continue
+        # Re-check under the advisory lock: the candidate query's snapshot may predate another claim.
+        # (The per-team cap is only re-checked here, so concurrent claims of different kinds can briefly exceed it.)
+        if _is_running(db, job.team_id, job.kind) or _running_for_team(db, job.team_id) >= settings.job_max_running_per_team:
+            continue
+        _mark_running(job, worker, now)
+        db.commit()
+        return job
+    db.rollback()
+    return None
+
+def start_inline_job(db: Session, team_id: int, kind: str, owner: str) -> models.Job:
+    """Record work executed in-process (e.g. a streamed plan run) as a running job so it is
+    serialized against queued jobs of the same kind. Raises JobBusy if one is already running."""
+    now = dt.datetime.utcnow()
+    if not _serial_lock(db, team_id, kind) or _is_running(db, team_id, kind):
+        LOCK_CONTENTION.labels(lock="inline_job").inc()
+        db.rollback()
+        raise JobBusy(f"{kind} already running for team {team_id}")
+    job = models.Job(team_id=team_id, kind=kind, priority=PRIORITY_INTERACTIVE, max_attempts=1, run_after=now)
+    _mark_running(job, owner, now)
+    db.add(job)
+    db.commit()
+    return job
+
+def heartbeat(job_id: int, worker: str) -> bool:
+    """Extend the lease. False means the lease was lost (reclaimed by someone else)."""
+    db = SessionLocal()
+    try:
+        now = dt.datetime.utcnow()
+        n = (db.query(models.Job)
+             .filter_by(id=job_id, owner=worker, status="running")
+             .update({"heartbeat_at": now,
+                      "lease_expires_at": now + dt.timedelta(seconds=settings.job_lease_seconds)}))
+        db.commit()
+        return n == 1
+    finally:
+        db.close()
+
+class LeaseHeartbeat:
+    """Background thread that keeps a running job's lease alive while its body executes."""
+
+    def __init__(self, job: models.Job):
+        self.job_id = job.id
+        self.worker = job.owner
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-{job.id}-heartbeat", daemon=True)
+
+    def _run(self) -> None:
+        interval = max(settings.job_lease_seconds / 3.0, 1.0)
+        while not self._stop.wait(interval):
+            try:
+                if not heartbeat(self.job_id, self.worker):
+                    log.warning(f"job {self.job_id} lost its lease")
+                    return
+            except Exception as exc:
+                log.warning(f"job {self.job_id} heartbeat failed: {exc}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+def report_progress(job_id: int, progress: dict) -> None:
+    """Publish progress for a running job. Own session, so pollers see it while the job's
+    transaction is still open."""
+    db = SessionLocal()
+    try:
+        db.query(models.Job).filter_by(id=job_id, status="running").update({"progress_json": json.dumps(progress)})
+        db.commit()
+    finally:
+        db.close()
+
+def finish_job(db: Session, job: models.Job, worker: str, *, result: Any = None, error: str | None = None) -> bool:
+    """Record the outcome if `worker` still holds the job. After a lost lease (requeued by reclaim_expired
+    or claimed by another worker) the outcome is dropped, so it can't overwrite the newer attempt's state.
+    Returns whether it was recorded."""
+    db.rollback()  # the job body may have failed mid-transaction
+    n = (db.query(models.Job)
+         .filter_by(id=job.id, owner=worker, status="running")
+         .update({"status": "error" if error else "done",
+                  "error": error,
+                  "result_json": json.dumps(result, default=str) if result is not None else None,
+                  "finished_at": dt.datetime.utcnow(),
+                  "lease_expires_at": None}))
+    db.commit()
+    if n == 0:
+        log.warning(f"job {job.id} is no longer held by {worker}; dropping its {'error' if error else 'result'}")
+    return n == 1
+
+def jobs_settling(db: Session, job_ids: list[int], settle_seconds: int) -> bool:
+    """Whether any of the jobs is still queued/running or finished less than `settle_seconds` ago."""
+    cutoff = dt.datetime.utcnow() - dt.timedelta(seconds=settle_seconds)
+    return db.query(exists().where(
+        models.Job.id.in_(job_ids),
+        or_(models.Job.finished_at.is_(None), models.Job.finished_at > cutoff),
+    )).scalar()
+
+def job_payload(job: models.Job) -> dict:
+    return json.loads(job.payload_json) if job.payload_json else {}
+
+def get_job(db: Session, job_id: int) -> models.Job | None:
+    return db.query(models.Job).filter_by(id=job_id).one_or_none()
+
+def job_to_dict(job: models.Job) -> dict:
+    return {
+        "id": job.id,
+        "team_id": job.team_id,
+        "kind": job.kind,
+        "status": job.status,
+        "priority": job.priority,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "progress": json.loads(job.progress_json) if job.progress_json else None,
+        "result": json.loads(job.result_json) if job.result_json else None,
+        "error": job.error,
+    }
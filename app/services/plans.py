@@ -1,75 +1,44 @@
+from typing import Any, Iterator
 
-import datetime as dt
-
-from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app import models
 from app.settings import settings
-from app.context.builder import build_context_packet
-from app.agents.weekly_plan import generate_weekly_plan
-
-class PlanInProgress(Exception):
-    pass
-
-def _acquire_plan_lock(db: Session, team_id: int, *, owner: str | None, ttl_minutes: int = 60) -> None:
-    now = dt.datetime.utcnow()
-    lock = models.ActionLock(team_id=team_id, action="weekly_plan", owner=owner, locked_at=now)
-    try:
-        db.add(lock)
-        db.commit()
-        return
-    except IntegrityError:
-        db.rollback()
-
-    existing = db.query(models.ActionLock).filter_by(team_id=team_id, action="weekly_plan").one_or_none()
-    if existing and (now - existing.locked_at) > dt.timedelta(minutes=ttl_minutes):
-        db.delete(existing)
-        db.commit()
-        try:
-            db.add(lock)
-            db.commit()
-            return
-        except IntegrityError:
-            db.rollback()
-
-    raise PlanInProgress(f"weekly plan already running for team {team_id}")
-
-def _release_plan_lock(db: Session, team_id: int) -> None:
-    db.query(models.ActionLock).filter_by(team_id=team_id, action="weekly_plan").delete()
-    db.commit()
-
-def run_weekly_plan(db: Session, team_id: int, owner: str | None = None) -> models.WeeklyPlan:
-    _acquire_plan_lock(db, team_id, owner=owner)
-    team = db.query(models.Team).filter_by(id=team_id).one()
-    packet = build_context_packet(team, db)
-
+from app.context.builder import get_context_packet, packet_version
+from app.agents.weekly_plan import generate_weekly_plan, stream_weekly_plan
+from app.schemas import ContextPacketSchema, WeeklyPlanSchema
+from app.services.context_store import load_context, store_context
+from app.services.data_versions import bump_data_version, team_scope
+from app.instrumentation.tracing import current_trace_id, traced
+from app.services.jobs import PRIORITY_INTERACTIVE, LeaseHeartbeat, finish_job, start_inline_job, submit_job
+
+def _llm_mode_and_model() -> tuple[str, str]:
     llm_mode = settings.llm_mode
     model = settings.llm_model if llm_mode == "remote" else settings.ollama_model
+    return llm_mode, model
 
-    try:
-        plan = generate_weekly_plan(packet)
-    except Exception as exc:
-        with db.begin():
-            cp = models.ContextPacket(team_id=team_id, content_json=packet.model_dump_json())
-            db.add(cp)
-
-            ar = models.AgentRun(
-                team_id=team_id,
-                llm_mode=llm_mode,
-                model=model,
-                status="error",
-                error=str(exc),
-            )
-            db.add(ar)
-        raise
-    finally:
-        _release_plan_lock(db, team_id)
-
+def _record_plan_error(db: Session, team_id: int, packet: ContextPacketSchema, exc: Exception) -> None:
+    llm_mode, model = _llm_mode_and_model()
+    db.rollback()  # end the read transaction left open by get_context_packet
     with db.begin():
-        cp = models.ContextPacket(team_id=team_id, content_json=packet.model_dump_json())
-        db.add(cp)
+        ar = models.AgentRun(
+            team_id=team_id,
+            llm_mode=llm_mode,
+            model=model,
+            status="error",
+            error=str(exc),
+            context_hash=store_context(db, packet),
+            trace_id=current_trace_id(),
+        )
+        db.add(ar)
+        bump_data_version(db, team_scope(team_id))
 
-        ar = models.AgentRun(team_id=team_id, llm_mode=llm_mode, model=model, status="ok")
+def _record_plan(db: Session, team_id: int, packet: ContextPacketSchema, plan: WeeklyPlanSchema) -> models.WeeklyPlan:
+    llm_mode, model = _llm_mode_and_model()
+    db.rollback()
+    with db.begin():
+        context_hash = store_context(db, packet)
+        ar = models.AgentRun(team_id=team_id, llm_mode=llm_mode, model=model, status="ok", context_hash=context_hash,
+                             trace_id=current_trace_id())
         db.add(ar)
         db.flush()
 
@@ -77,17 +46,85 @@ def run_weekly_plan(db: Session, team_id: int, owner: str | None = None) -> mode
             team_id=team_id,
             agent_run_id=ar.id,
             week_start=plan.week_start,
-            plan_json=plan.model_dump_json()
+            plan_json=plan.model_dump(mode="json"),
+            context_hash=context_hash,
         )
         db.add(wp)
+        bump_data_version(db, team_scope(team_id))
 
     db.refresh(wp)
     return wp
 
+@traced("run_weekly_plan")
+def run_weekly_plan(db: Session, team_id: int) -> models.WeeklyPlan:
+    # Callers serialize per team through the job queue (run_plan_job / stream_weekly_plan_run).
+    team = db.query(models.Team).filter_by(id=team_id).one()
+    packet = get_context_packet(team, db)
+
+    try:
+        plan = generate_weekly_plan(packet)
+    except Exception as exc:
+        _record_plan_error(db, team_id, packet, exc)
+        raise
+
+    return _record_plan(db, team_id, packet, plan)
+
+def stream_weekly_plan_run(db: Session, team_id: int, owner: str) -> tuple[models.Job, Iterator[tuple[str, Any]]]:
+    """Registers the run as a running weekly_plan job up front (so JobBusy surfaces before any
+    output) and returns it with a generator of ("action"|"risk", item) events followed by ("plan", WeeklyPlan)."""
+    job = start_inline_job(db, team_id, "weekly_plan", owner=owner)
+
+    def _events():
+        error = None
+        try:
+            with LeaseHeartbeat(job):
+                team = db.query(models.Team).filter_by(id=team_id).one()
+                packet = get_context_packet(team, db)
+                plan = None
+                try:
+                    for kind, item in stream_weekly_plan(packet):
+                        if kind == "plan":
+                            plan = item
+                        else:
+                            yield kind, item
+                except Exception as exc:
+                    _record_plan_error(db, team_id, packet, exc)
+                    raise
+                wp = _record_plan(db, team_id, packet, plan)
+        except BaseException as exc:
+            # Includes GeneratorExit when the client disconnects mid-stream.
+            error = str(exc) or type(exc).__name__
+            raise
+        finally:
+            finish_job(db, job, owner, error=error,
+                       result=None if error else {"weekly_plan_id": wp.id, "week_start": str(wp.week_start)})
+        yield "plan", wp
+
+    return job, _events()
+
+def submit_plan_job(db: Session, team_id: int, owner: str | None = None,
+                    payload: dict | None = None) -> tuple[models.Job, bool]:
+    """Queue a plan run for the worker. Submissions for the same team and packet version coalesce."""
+    db.query(models.Team).filter_by(id=team_id).one()
+    return submit_job(db, team_id, "weekly_plan", dedupe_key=f"packet:{packet_version(team_id, db)}",
+                      priority=PRIORITY_INTERACTIVE, owner=owner, coalesce_running=True, payload=payload)
+
+def run_plan_job(db: Session, job: models.Job) -> dict:
+    wp = run_weekly_plan(db=db, team_id=job.team_id)
+    return {"weekly_plan_id": wp.id, "week_start": str(wp.week_start)}
+
 def get_latest_plan(db: Session, team_id: int) -> models.WeeklyPlan:
     return db.query(models.WeeklyPlan).filter_by(team_id=team_id)\
         .order_by(models.WeeklyPlan.created_at.desc()).first()
 
-def get_llm_context_preview(db: Session, team_id: int) -> models.ContextPacket:
-    return db.query(models.ContextPacket).filter_by(team_id=team_id)\
+def get_llm_context_preview(db: Session, team_id: int) -> dict | None:
+    """The most recent context packet sent to the LLM for the team, decompressed."""
+    run = db.query(models.AgentRun.context_hash)\
+        .filter(models.AgentRun.team_id == team_id, models.AgentRun.context_hash.isnot(None))\
+        .order_by(models.AgentRun.created_at.desc()).first()
+    if run:
+        return load_context(db, run.context_hash)
+    # Runs from before context_blobs
+    packet = db.query(models.ContextPacket).filter_by(team_id=team_id)\
         .order_by(models.ContextPacket.created_at.desc()).first()
+    return packet.content_json if packet else None
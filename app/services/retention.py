@@ -0,0 +1,160 @@
+import datetime as dt
+import re
+from typing import Callable
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from app import models
+from app.settings import settings
+from app.services.data_versions import bump_data_version, team_scope
+from app.logging import get_logger
+
+log = get_logger("retention")
+
+# table -> partition column (see migration 3)
+PARTITIONED_TABLES = {"context_packets": "created_at", "job_runs": "ran_at"}
+
+PARTITION_LOCK_KEY = 7261_0002
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+def _month_start(d: dt.date) -> dt.datetime:
+    return dt.datetime(d.year, d.month, 1)
+
+def _add_months(d: dt.datetime, months: int) -> dt.datetime:
+    y, m = divmod(d.month - 1 + months, 12)
+    return dt.datetime(d.year + y, m + 1, 1)
+
+def _parse_bound(value: str) -> dt.datetime | None:
+    # MINVALUE / MAXVALUE -> None
+    value = value.strip()
+    return dt.datetime.fromisoformat(value.strip("'")) if value.startswith("'") else None
+
+def _partitions(db: Session, table: str) -> list[tuple[str, dt.datetime | None, dt.datetime | None]]:
+    """(name, lower, upper) of each range partition; unbounded ends are None, the default partition is skipped."""
+    rows = db.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i"
+        " JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent"
+        " WHERE p.relname = :table"
+    ), {"table": table}).all()
+    parts = []
+    for name, bound in rows:
+        m = _BOUND_RE.search(bound or "")
+        if m:
+            parts.append((name, _parse_bound(m.group(1)), _parse_bound(m.group(2))))
+    return parts
+
+def _covered(parts, at: dt.datetime) -> bool:
+    return any((lo is None or lo <= at) and (hi is None or at < hi) for _, lo, hi in parts)
+
+def ensure_partitions(db: Session, months_ahead: int | None = None) -> list[str]:
+    """Create monthly partitions from the current month up to `months_ahead` months out.
+    Rows that already landed in the default partition for a new month are moved into it first."""
+    months_ahead = settings.retention_partition_months_ahead if months_ahead is None else months_ahead
+    db.execute(select(func.pg_advisory_xact_lock(PARTITION_LOCK_KEY)))
+    created = []
+    this_month = _month_start(dt.datetime.utcnow().date())
+    for table, column in PARTITIONED_TABLES.items():
+        parts = _partitions(db, table)
+        for i in range(months_ahead + 1):
+            lo, hi = _add_months(this_month, i), _add_months(this_month, i + 1)
+            if _covered(parts, lo):
+                continue
+            name = f"{table}_p{lo:%Y%m}"
+            bounds = {"lo": lo, "hi": hi}
+            db.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+            db.execute(text(f"INSERT INTO {name} SELECT * FROM {table}_default WHERE {column} >= :lo AND {column} < :hi"), bounds)
+            db.execute(text(f"DELETE FROM {table}_default WHERE {column} >= :lo AND {column} < :hi"), bounds)
+            db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lo:%Y-%m-%d}') TO ('{hi:%Y-%m-%d}')"))
+            created.append(name)
+    db.commit()
+    if created:
+        log.info(f"created partitions: {', '.join(created)}")
+    return created
+
+def drop_partitions_before(db: Session, table: str, cutoff: dt.datetime) -> dict:
+    """Drop every partition of `table` that ends at or before `cutoff`, and delete older rows from the
+    default partition. Rows in the partition straddling the cutoff stay until the whole month expires."""
+    column = PARTITIONED_TABLES[table]
+    dropped = [name for name, _, hi in _partitions(db, table) if hi is not None and hi <= cutoff]
+    for name in dropped:
+        db.execute(text(f"DROP TABLE {name}"))
+    deleted = db.execute(text(f"DELETE FROM {table}_default WHERE {column} < :cutoff"), {"cutoff": cutoff}).rowcount
+    db.commit()
+    return {"partitions_dropped": dropped, "default_rows_deleted": deleted}
+
+def rollup_metric_snapshots(db: Session, unit: str, cutoff: dt.date) -> int:
+    """Collapse snapshots dated before `cutoff` into one row per (team, `unit` bucket, name) dated at the
+    bucket start, averaging values. `cutoff` is aligned down to a bucket boundary so only complete
+    buckets are rolled, and already-rolled buckets (a single row at the bucket start) are left alone."""
+    cutoff = db.execute(text("SELECT date_trunc(:unit, CAST(:cutoff AS date))::date"),
+                        {"unit": unit, "cutoff": cutoff}).scalar()
+    params = {"unit": unit, "cutoff": cutoff, "now": dt.datetime.utcnow()}
+    team_ids = db.execute(text(
+        "INSERT INTO metric_snapshots (team_id, as_of_date, name, value, created_at)"
+        " SELECT team_id, date_trunc(:unit, as_of_date)::date, name, avg(value), :now"
+        " FROM metric_snapshots WHERE as_of_date < :cutoff"
+        " GROUP BY team_id, date_trunc(:unit, as_of_date)::date, name"
+        " HAVING count(*) > 1 OR min(as_of_date) <> date_trunc(:unit, min(as_of_date))::date"
+        " ON CONFLICT (team_id, as_of_date, name) DO UPDATE SET value = EXCLUDED.value, created_at = EXCLUDED.created_at"
+        " RETURNING team_id"
+    ), params).scalars().all()
+    removed = db.execute(text(
+        "DELETE FROM metric_snapshots WHERE as_of_date < :cutoff AND as_of_date <> date_trunc(:unit, as_of_date)::date"
+    ), params).rowcount
+    if team_ids:
+        bump_data_version(db, *(team_scope(t) for t in set(team_ids)))
+    db.commit()
+    return removed
+
+def prune_agent_runs(db: Session, cutoff: dt.datetime) -> int:
+    # Runs that produced a plan are referenced by weekly_plans and kept with it
+    n = (db.query(models.AgentRun)
+         .filter(models.AgentRun.created_at < cutoff)
+         .filter(~select(models.WeeklyPlan.id).where(models.WeeklyPlan.agent_run_id == models.AgentRun.id).exists())
+         .delete(synchronize_session=False))
+    db.commit()
+    return n
+
+def prune_context_blobs(db: Session, cutoff: dt.datetime) -> int:
+    # Blobs no run or plan points at any more (their agent runs were pruned)
+    n = (db.query(models.ContextBlob)
+         .filter(models.ContextBlob.created_at < cutoff)
+         .filter(~select(models.AgentRun.id).where(models.AgentRun.context_hash == models.ContextBlob.hash).exists())
+         .filter(~select(models.WeeklyPlan.id).where(models.WeeklyPlan.context_hash == models.ContextBlob.hash).exists())
+         .delete(synchronize_session=False))
+    db.commit()
+    return n
+
+def prune_finished_jobs(db: Session, cutoff: dt.datetime) -> int:
+    n = (db.query(models.Job)
+         .filter(models.Job.status.in_(("done", "error")), models.Job.finished_at < cutoff)
+         .delete(synchronize_session=False))
+    db.commit()
+    return n
+
+def run_retention(db: Session, progress: Callable[[dict], None] | None = None) -> dict:
+    """Apply every retention policy from settings; `progress` is called after each step."""
+    now = dt.datetime.utcnow()
+    today = now.date()
+    steps: list[tuple[str, Callable[[], object]]] = [
+        ("ensure_partitions", lambda: ensure_partitions(db)),
+        ("metrics_weekly_rollup", lambda: rollup_metric_snapshots(
+            db, "week", today - dt.timedelta(days=settings.retention_metrics_daily_days))),
+        ("metrics_monthly_rollup", lambda: rollup_metric_snapshots(
+            db, "month", today - dt.timedelta(days=settings.retention_metrics_weekly_days))),
+        ("context_packets", lambda: drop_partitions_before(
+            db, "context_packets", now - dt.timedelta(days=settings.retention_context_packets_days))),
+        ("job_runs", lambda: drop_partitions_before(
+            db, "job_runs", now - dt.timedelta(days=settings.retention_job_runs_days))),
+        ("agent_runs", lambda: prune_agent_runs(db, now - dt.timedelta(days=settings.retention_agent_runs_days))),
+        ("context_blobs", lambda: prune_context_blobs(db, now - dt.timedelta(days=1))),
+        ("jobs", lambda: prune_finished_jobs(db, now - dt.timedelta(days=settings.retention_jobs_days))),
+    ]
+    summary: dict = {}
+    for i, (name, step) in enumerate(steps, start=1):
+        summary[name] = step()
+        log.info(f"retention {name}: {summary[name]}")
+        if progress:
+            progress({"step": name, "done": i, "total": len(steps)})
+    return summary
@@ -1,29 +1,63 @@
 import datetime as dt
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
 from app import models
 from app.settings import settings
+from app.services.data_versions import TEAMS_SCOPE, bump_data_version, team_scope
+from app.util import strip_url_credentials
+from app.logging import get_logger
+
+log = get_logger("setup")
+
+def _default_configs() -> tuple[str, str, dict, dict | None]:
+    """(provider name, provider API URL, git repo fields, Jira config fields or None) from settings."""
+    if settings.git_source == "mirror":
+        provider_name, provider_url = "git", "local"
+        api_base_url = settings.git_clone_url or f"https://github.com/{settings.github_owner}/{settings.github_repo}.git"
+        # Stored in git_repos and served by the API: never with credentials in it
+        if strip_url_credentials(api_base_url) != api_base_url:
+            log.warning("GIT_CLONE_URL contains credentials; they are dropped, set GIT_CLONE_TOKEN instead")
+            api_base_url = strip_url_credentials(api_base_url)
+    else:
+        provider_name, provider_url = "GitHub", "https://api.github.com"
+        api_base_url = settings.github_api_base_url
+    git_cfg = dict(
+        api_base_url=api_base_url,
+        token_present=bool(settings.github_token),
+        owner=settings.github_owner,
+        repo=settings.github_repo,
+    )
+    jira_cfg = (dict(
+        base_url=settings.jira_base_url,
+        email=settings.jira_email,
+        token_present=bool(settings.jira_api_token),
+        project_key=settings.jira_project_key,
+        board_id=settings.jira_board_id,
+    ) if settings.jira_base_url and settings.jira_email and settings.jira_project_key and settings.jira_api_token else None)
+    return provider_name, provider_url, git_cfg, jira_cfg
+
+def _configured_team(db: Session, provider_name: str, git_cfg: dict, jira_cfg: dict | None) -> models.Team | None:
+    """The default team when it and its configs already match the settings: one read instead of the
+    lookups and commits of a full setup, so restarts with unchanged settings write nothing."""
+    repo = models.GitRepo
+    query = (db.query(models.Team).join(models.Org)
+             .filter(models.Org.name == settings.default_org_name, models.Team.name == settings.default_team_name,
+                     exists().where(repo.team_id == models.Team.id, repo.git_provider.has(name=provider_name),
+                                    *(getattr(repo, k) == v for k, v in git_cfg.items()))))
+    if jira_cfg:
+        jira = models.JiraConfig
+        query = query.filter(exists().where(jira.team_id == models.Team.id,
+                                            *(getattr(jira, k) == v for k, v in jira_cfg.items())))
+    return query.one_or_none()
 
 def ensure_defaults_setup(db: Session) -> models.Team:
+    provider_name, provider_url, git_cfg, jira_cfg = _default_configs()
+    team = _configured_team(db, provider_name, git_cfg, jira_cfg)
+    if team:
+        return team
     team = ensure_default_org_team(db, settings.default_org_name, settings.default_team_name)
-    github_provider = ensure_git_provider(db, "GitHub", "https://api.github.com")
-    upsert_configs(
-        db,
-        team,
-        git_cfg=dict(
-            git_provider_id=github_provider.id,
-            api_base_url=settings.github_api_base_url,
-            token_present=bool(settings.github_token),
-            owner=settings.github_owner,
-            repo=settings.github_repo,
-        ),
-        jira_cfg=(dict(
-            base_url=settings.jira_base_url,
-            email=settings.jira_email,
-            token_present=bool(settings.jira_api_token),
-            project_key=settings.jira_project_key,
-            board_id=settings.jira_board_id,
-        ) if settings.jira_base_url and settings.jira_email and settings.jira_project_key and settings.jira_api_token else None)
-    )
+    provider = ensure_git_provider(db, provider_name, provider_url)
+    upsert_configs(db, team, git_cfg=dict(git_provider_id=provider.id, **git_cfg), jira_cfg=jira_cfg)
     return team
 
 def ensure_default_org_team(db: Session, org_name: str, team_name: str) -> models.Team:
@@ -38,6 +72,7 @@ def ensure_default_org_team(db: Session, org_name: str, team_name: str) -> model
     if not team:
         team = models.Team(org_id=org.id, name=team_name)
         db.add(team)
+        bump_data_version(db, TEAMS_SCOPE)
         db.commit()
         db.refresh(team)
     return team
@@ -69,4 +104,6 @@ def upsert_configs(db: Session, team: models.Team, git_cfg: dict, jira_cfg: dict
             for k,v in jira_cfg.items():
                 setattr(jc, k, v)
 
+    if db.new or any(db.is_modified(obj) for obj in db.dirty):
+        bump_data_version(db, TEAMS_SCOPE, team_scope(team.id))
     db.commit()
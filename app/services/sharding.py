@@ -0,0 +1,114 @@
+import datetime as dt
+import hashlib
+import threading
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app import models
+from app.db import SessionLocal
+from app.settings import settings
+from app.logging import get_logger
+
+log = get_logger("sharding")
+
+# Shard key for work that isn't per team (e.g. retention): exactly one live worker owns it
+GLOBAL_SHARD = "global"
+
+def team_key(team_id: int) -> str:
+    return f"team:{team_id}"
+
+def _weight(worker_id: str, key: str) -> int:
+    return int.from_bytes(hashlib.sha256(f"{worker_id}|{key}".encode("utf-8")).digest()[:8], "big")
+
+def owner_of(key: str, workers: list[str]) -> str | None:
+    """Rendezvous (highest random weight) hashing: when a worker joins or leaves, only the keys
+    it wins or held move; everything else keeps its owner."""
+    return max(workers, key=lambda w: _weight(w, key), default=None)
+
+def renew_lease(db: Session, worker_id: str) -> None:
+    now = dt.datetime.utcnow()
+    expires = now + dt.timedelta(seconds=settings.worker_lease_seconds)
+    stmt = insert(models.WorkerLease).values(worker_id=worker_id, started_at=now, heartbeat_at=now, expires_at=expires)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[models.WorkerLease.worker_id],
+        set_={"heartbeat_at": now, "expires_at": expires},
+    ))
+    db.commit()
+
+def release_lease(db: Session, worker_id: str) -> None:
+    db.query(models.WorkerLease).filter_by(worker_id=worker_id).delete()
+    db.commit()
+
+def live_workers(db: Session) -> list[str]:
+    now = dt.datetime.utcnow()
+    # Drop long-dead replicas so the table doesn't accumulate one row per container restart
+    db.query(models.WorkerLease).filter(
+        models.WorkerLease.expires_at < now - dt.timedelta(seconds=settings.worker_lease_seconds * 10)
+    ).delete()
+    rows = (db.query(models.WorkerLease.worker_id)
+            .filter(models.WorkerLease.expires_at > now)
+            .order_by(models.WorkerLease.worker_id)
+            .all())
+    db.commit()
+    return [worker_id for worker_id, in rows]
+
+class WorkerMembership:
+    """Keeps this worker's lease alive and tracks which teams it owns among the live workers.
+    The shard map is refreshed on every heartbeat, so replicas joining or dying rebalance within
+    WORKER_LEASE_SECONDS."""
+
+    def __init__(self, worker_id: str):
+        self.worker_id = worker_id
+        self._workers: list[str] = [worker_id]
+        self._team_ids: list[int] | None = None  # None until the first refresh
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="worker-membership", daemon=True)
+
+    def refresh(self) -> None:
+        db = SessionLocal()
+        try:
+            renew_lease(db, self.worker_id)
+            workers = live_workers(db) or [self.worker_id]
+            team_ids = [team_id for team_id, in db.query(models.Team.id).order_by(models.Team.id)]
+        finally:
+            db.close()
+        with self._lock:
+            if workers != self._workers:
+                log.info(f"live workers changed: {len(self._workers)} -> {len(workers)}")
+            self._workers, self._team_ids = workers, team_ids
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.worker_heartbeat_seconds):
+            try:
+                self.refresh()
+            except Exception as exc:
+                log.warning(f"worker heartbeat failed: {exc}")
+
+    def owns(self, key: str) -> bool:
+        with self._lock:
+            return owner_of(key, self._workers) == self.worker_id
+
+    def owns_team(self, team_id: int) -> bool:
+        return self.owns(team_key(team_id))
+
+    def owned_teams(self) -> list[int] | None:
+        """Teams this worker owns, or None before the first refresh (unsharded: everything)."""
+        with self._lock:
+            if self._team_ids is None:
+                return None
+            return [t for t in self._team_ids if owner_of(team_key(t), self._workers) == self.worker_id]
+
+    def start(self) -> "WorkerMembership":
+        self.refresh()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        db = SessionLocal()
+        try:
+            release_lease(db, self.worker_id)
+        finally:
+            db.close()
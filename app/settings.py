@@ -9,6 +9,18 @@ class Settings(BaseSettings):
 
     app_port: int = Field(default=8080, alias="APP_PORT")
     database_url: str = Field(alias="DATABASE_URL")
+    db_pool_size: int = Field(default=10, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=20, alias="DB_MAX_OVERFLOW")
+    db_pool_recycle_seconds: int = Field(default=1800, alias="DB_POOL_RECYCLE_SECONDS")
+    db_pool_timeout_seconds: int = Field(default=30, alias="DB_POOL_TIMEOUT_SECONDS")
+    # Dashboard sections load concurrently, on at most this many connections per request
+    dashboard_max_connections: int = Field(default=3, ge=1, alias="DASHBOARD_MAX_CONNECTIONS")
+    # Optional streaming replica for GET routes
+    database_read_url: str | None = Field(default=None, alias="DATABASE_READ_URL")
+    replica_max_lag_seconds: float = Field(default=5.0, alias="REPLICA_MAX_LAG_SECONDS")
+    replica_lag_check_seconds: float = Field(default=2.0, alias="REPLICA_LAG_CHECK_SECONDS")
+    read_your_writes_seconds: int = Field(default=60, alias="READ_YOUR_WRITES_SECONDS")
+    read_your_writes_max_seconds: int = Field(default=3600, alias="READ_YOUR_WRITES_MAX_SECONDS")
 
     default_org_name: str = Field(default="demo-org", alias="DEFAULT_ORG_NAME")
     default_team_name: str = Field(default="demo-team", alias="DEFAULT_TEAM_NAME")
@@ -17,6 +29,16 @@ class Settings(BaseSettings):
     github_token: str | None = Field(default=None, alias="GITHUB_TOKEN")
     github_owner: str = Field(default="kubernetes", alias="GITHUB_OWNER")
     github_repo: str = Field(default="kubernetes", alias="GITHUB_REPO")
+    # PyGithub spaces requests 0.25s apart by default to stay clear of GitHub's secondary rate limits
+    github_seconds_between_requests: float = Field(default=0.25, alias="GITHUB_SECONDS_BETWEEN_REQUESTS")
+    github_per_page: int = Field(default=100, alias="GITHUB_PER_PAGE")
+
+    # api: GitHub REST API (PRs + reviews); mirror: local `git clone --mirror` of GIT_CLONE_URL (commits)
+    git_source: str = Field(default="api", alias="GIT_SOURCE")
+    git_clone_url: str | None = Field(default=None, alias="GIT_CLONE_URL")
+    git_clone_token: str | None = Field(default=None, alias="GIT_CLONE_TOKEN")  # HTTPS token for private remotes
+    git_mirror_dir: str = Field(default="git-mirrors", alias="GIT_MIRROR_DIR")
+    git_mirror_timeout_seconds: int = Field(default=3600, alias="GIT_MIRROR_TIMEOUT_SECONDS")
 
     jira_base_url: str | None = Field(default=None, alias="JIRA_BASE_URL")
     jira_email: str | None = Field(default=None, alias="JIRA_EMAIL")
@@ -31,12 +53,68 @@ class Settings(BaseSettings):
     llm_temperature: float = Field(default=0.2, alias="LLM_TEMPERATURE")
     llm_max_tokens: int = Field(default=1200, alias="LLM_MAX_TOKENS")
     llm_timeout_seconds: int = Field(default=60, alias="LLM_TIMEOUT_SECONDS")
+    llm_plan_decomposed: bool = Field(default=False, alias="LLM_PLAN_DECOMPOSED")  # actions/risks/summary as concurrent calls
+    llm_part_retries: int = Field(default=1, ge=0, alias="LLM_PART_RETRIES")
+    llm_retry_attempts: int = Field(default=2, alias="LLM_RETRY_ATTEMPTS")  # on 429/5xx, jittered backoff
+    llm_retry_backoff_seconds: float = Field(default=1.0, alias="LLM_RETRY_BACKOFF_SECONDS")
+
+    # Fallback chain, e.g. "openai,local": later backends are hedged in when earlier ones are slow or fail
+    llm_backends: str = Field(default="", alias="LLM_BACKENDS")
+    llm_hedge_percentile: float = Field(default=95.0, alias="LLM_HEDGE_PERCENTILE")
+    llm_hedge_min_samples: int = Field(default=5, alias="LLM_HEDGE_MIN_SAMPLES")
+    llm_hedge_default_seconds: float = Field(default=20.0, alias="LLM_HEDGE_DEFAULT_SECONDS")
+    llm_hedge_min_seconds: float = Field(default=2.0, alias="LLM_HEDGE_MIN_SECONDS")
 
     ollama_base_url: str = Field(default="http://host.docker.internal:11434", alias="OLLAMA_BASE_URL")
     ollama_model: str = Field(default="llama3.1", alias="OLLAMA_MODEL")
 
+    response_cache_max_entries: int = Field(default=512, alias="RESPONSE_CACHE_MAX_ENTRIES")
+    response_gzip_min_bytes: int = Field(default=1024, alias="RESPONSE_GZIP_MIN_BYTES")
+    context_blob_codec: str = Field(default="zlib", alias="CONTEXT_BLOB_CODEC")  # zlib | zstd (needs zstandard)
+    context_blob_level: int = Field(default=6, alias="CONTEXT_BLOB_LEVEL")
+
     sync_interval_minutes: int = Field(default=60, alias="SYNC_INTERVAL_MINUTES")
     metrics_daily_hour: int = Field(default=2, alias="METRICS_DAILY_HOUR")
     metrics_daily_minute: int = Field(default=0, alias="METRICS_DAILY_MINUTE")
+    # Recompute after a sync that changed data; further syncs within the window push it back (up to the max)
+    metrics_refresh_debounce_seconds: int = Field(default=120, alias="METRICS_REFRESH_DEBOUNCE_SECONDS")
+    metrics_refresh_max_delay_seconds: int = Field(default=900, alias="METRICS_REFRESH_MAX_DELAY_SECONDS")
+    context_prewarm: bool = Field(default=False, alias="CONTEXT_PREWARM")  # build the plan packet after each recompute
+    job_poll_seconds: int = Field(default=2, alias="JOB_POLL_SECONDS")
+    job_worker_concurrency: int = Field(default=4, alias="JOB_WORKER_CONCURRENCY")
+    job_lease_seconds: int = Field(default=120, alias="JOB_LEASE_SECONDS")  # heartbeats extend it every lease/3
+    job_max_attempts: int = Field(default=3, alias="JOB_MAX_ATTEMPTS")  # reclaims after expired leases
+    job_max_running_per_team: int = Field(default=2, alias="JOB_MAX_RUNNING_PER_TEAM")  # fairness across teams
+    schedule_tick_seconds: int = Field(default=60, alias="SCHEDULE_TICK_SECONDS")
+    sync_jitter_seconds: int = Field(default=600, alias="SYNC_JITTER_SECONDS")  # per-team start offset
+    # Worker replicas: teams are sharded across live leases; idle workers steal jobs waiting this long
+    worker_heartbeat_seconds: int = Field(default=10, alias="WORKER_HEARTBEAT_SECONDS")
+    worker_lease_seconds: int = Field(default=30, alias="WORKER_LEASE_SECONDS")
+    job_steal_after_seconds: int = Field(default=60, alias="JOB_STEAL_AFTER_SECONDS")
+    # OpenTelemetry: "" (off) | otlp (OTEL_EXPORTER_OTLP_* env vars) | file (JSON lines at TRACING_FILE_PATH)
+    tracing_exporter: str = Field(default="", alias="TRACING_EXPORTER")
+    tracing_file_path: str = Field(default="traces.jsonl", alias="TRACING_FILE_PATH")
+    # Sampling profiler: requests with X-Profile: <PROFILE_TOKEN>, and job kinds in PROFILE_JOBS ("all" for every job)
+    profile_token: str | None = Field(default=None, alias="PROFILE_TOKEN")
+    profile_jobs: str = Field(default="", alias="PROFILE_JOBS")
+    profile_dir: str = Field(default="profiles", alias="PROFILE_DIR")
+    profile_sample_hz: float = Field(default=100.0, alias="PROFILE_SAMPLE_HZ")
+    worker_metrics_port: int = Field(default=9108, alias="WORKER_METRICS_PORT")  # Prometheus exporter, 0 disables
+
+    # Retention (daily worker job, see app/services/retention.py)
+    retention_daily_hour: int = Field(default=3, alias="RETENTION_DAILY_HOUR")
+    retention_daily_minute: int = Field(default=30, alias="RETENTION_DAILY_MINUTE")
+    retention_metrics_daily_days: int = Field(default=90, alias="RETENTION_METRICS_DAILY_DAYS")  # then weekly
+    retention_metrics_weekly_days: int = Field(default=365, alias="RETENTION_METRICS_WEEKLY_DAYS")  # then monthly
+    retention_context_packets_days: int = Field(default=90, alias="RETENTION_CONTEXT_PACKETS_DAYS")
+    retention_job_runs_days: int = Field(default=90, alias="RETENTION_JOB_RUNS_DAYS")
+    retention_agent_runs_days: int = Field(default=180, alias="RETENTION_AGENT_RUNS_DAYS")  # runs without a plan
+    retention_jobs_days: int = Field(default=30, alias="RETENTION_JOBS_DAYS")  # finished queue entries
+    retention_partition_months_ahead: int = Field(default=2, alias="RETENTION_PARTITION_MONTHS_AHEAD")
+
+    # Bulk export/import (app/services/bulk.py): rows per Parquet row group / COPY chunk
+    bulk_chunk_rows: int = Field(default=50_000, alias="BULK_CHUNK_ROWS")
+    # Volume shared by the CLI host and the worker; queued (--queue) jobs take directories relative to it
+    bulk_dir: str = Field(default="bulk", alias="BULK_DIR")
 
 settings = Settings()
@@ -1,4 +1,20 @@
 import hashlib
+from urllib.parse import urlsplit, urlunsplit
 
 def sha256_64(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def strip_url_credentials(url: str) -> str:
+    """`url` without credentials: http(s) URLs lose their whole user:password@ part (tokens are often
+    passed as the user name), other schemes keep the user name (ssh://git@host) but lose any password."""
+    parts = urlsplit(url)
+    if "@" not in parts.netloc:
+        return url
+    userinfo, host = parts.netloc.rsplit("@", 1)
+    if parts.scheme in ("http", "https"):
+        netloc = host
+    elif ":" in userinfo:
+        netloc = f"{userinfo.split(':', 1)[0]}@{host}"
+    else:
+        return url
+    return urlunsplit(parts._replace(netloc=netloc))
@@ -1,13 +1,26 @@
-import time
+import os
+import socket
+import threading
+import zlib
 import datetime as dt
 from apscheduler.schedulers.blocking import BlockingScheduler
 from app.db import SessionLocal, init_db
 from app.settings import settings
 from app import models
 from app.services.setup import ensure_defaults_setup
-from app.ingest.git_ingest import SyncInProgress, sync_team_git
+from app.ingest.git_ingest import sync_team_git
 from app.ingest.jira_ingest import sync_jira
 from app.metrics.compute import snapshot_metrics
+from app.context.builder import refresh_context_packet
+from app.services.data_versions import get_data_versions, team_scope
+from app.services.jobs import (LeaseHeartbeat, claim_next_job, debounce_job, finish_job, job_payload,
+                               report_progress, submit_job)
+from app.services.plans import run_plan_job
+from app.services.retention import run_retention
+from app.services.sharding import GLOBAL_SHARD, WorkerMembership
+from app.instrumentation.prom import start_exporter
+from app.instrumentation.tracing import current_trace_id, setup_tracing, span
+from app.instrumentation.profiling import job_profiler
 from app.logging import get_logger
 
 log = get_logger("worker")
@@ -18,7 +31,8 @@ def _get_team(db):
     return team
 
 def _record_job_run(db, team_id: int, action: str, ran_at: dt.datetime | None = None) -> None:
-    run = models.JobRun(team_id=team_id, action=action, ran_at=ran_at or dt.datetime.utcnow())
+    run = models.JobRun(team_id=team_id, action=action, ran_at=ran_at or dt.datetime.utcnow(),
+                        trace_id=current_trace_id())
     db.add(run)
     db.commit()
 
@@ -29,65 +43,227 @@ def _get_last_job_run_time(db, team_id: int, action: str) -> dt.datetime | None:
         .first())
     return row.ran_at if row else None
 
+def _get_last_failed_job_time(db, team_id: int, kind: str) -> dt.datetime | None:
+    return (db.query(models.Job.finished_at)
+            .filter_by(team_id=team_id, kind=kind, status="error")
+            .order_by(models.Job.finished_at.desc())
+            .limit(1)
+            .scalar())
+
+def _teams(db) -> list[tuple[int, bool]]:
+    """(team_id, has_jira) for every team."""
+    rows = (db.query(models.Team.id, models.JiraConfig.id)
+            .outerjoin(models.JiraConfig, models.JiraConfig.team_id == models.Team.id)
+            .order_by(models.Team.id)
+            .all())
+    return [(team_id, jira_id is not None) for team_id, jira_id in rows]
+
+def _team_jitter(team_id: int) -> dt.timedelta:
+    # Stable per-team offset so teams don't all hit the GitHub API at the same moment
+    return dt.timedelta(seconds=zlib.crc32(f"team:{team_id}".encode("utf-8")) % (settings.sync_jitter_seconds + 1))
+
+WORKER_STARTED_AT = dt.datetime.utcnow()
+
+def _next_sync_time(db, team_id: int) -> dt.datetime:
+    now = dt.datetime.utcnow()
+    interval = dt.timedelta(minutes=settings.sync_interval_minutes)
+    # A failed sync also waits out the interval instead of retrying every tick
+    last = max(filter(None, (_get_last_job_run_time(db, team_id, "sync_git"),
+                             _get_last_failed_job_time(db, team_id, "sync_git"))), default=None)
+    if not last or now - last > interval:
+        # Overdue (or never synced): catch up shortly after start, spread over the jitter window
+        return WORKER_STARTED_AT + _team_jitter(team_id)
+    return last + interval
+
+WORKER_ID = f"worker:{socket.gethostname()}:{os.getpid()}"
+
+# Teams are sharded across worker replicas; each schedules (and preferentially runs) its own teams.
+# Until started it owns everything, which is also the single-worker behaviour.
+MEMBERSHIP = WorkerMembership(WORKER_ID)
+
+# ---- scheduler: enqueue only; the consumers below do the work ----
+
 def job_sync():
+    """Tick: queue a sync for every team whose next run time has passed."""
     db = SessionLocal()
     try:
-        team = _get_team(db)
-        try:
-            n = sync_team_git(team_id=team.id, db=db, since_days=30, owner="worker")
-            log.info(f"git sync completed")
-            _record_job_run(db, team.id, "sync_git")
-        except SyncInProgress:
-            log.info("git sync skipped: already running")
-
-        if settings.jira_base_url and settings.jira_email and settings.jira_api_token and settings.jira_project_key:
-            try:
-                m = sync_jira(team_id=team.id, db=db, owner="worker")
-                log.info(f"jira synced: {m} issues")
-            except SyncInProgress:
-                log.info("jira sync skipped: already running")
-
+        now = dt.datetime.utcnow()
+        for team_id, has_jira in _teams(db):
+            if not MEMBERSHIP.owns_team(team_id) or _next_sync_time(db, team_id) > now:
+                continue
+            job, created = submit_job(db, team_id, "sync_git", dedupe_key="sync", owner="scheduler",
+                                      coalesce_running=True)
+            if created:
+                log.info(f"git sync queued for team {team_id}: job {job.id}")
+            if has_jira:
+                submit_job(db, team_id, "sync_jira", dedupe_key="sync", owner="scheduler", coalesce_running=True)
     finally:
         db.close()
 
 def job_metrics():
     db = SessionLocal()
     try:
-        team = _get_team(db)
-        n = snapshot_metrics(team_id=team.id, db=db, as_of=dt.date.today())
-        log.info(f"metrics snapshotted: {n}")
+        now = dt.datetime.utcnow()
+        for team_id, _ in _teams(db):
+            if not MEMBERSHIP.owns_team(team_id):
+                continue
+            job, created = submit_job(db, team_id, "metrics", dedupe_key="snapshot", owner="scheduler",
+                                      run_after=now + _team_jitter(team_id))
+            log.info(f"metrics snapshot for team {team_id} {'queued' if created else 'already queued'}: job {job.id}")
+    finally:
+        db.close()
+
+def job_retention():
+    if not MEMBERSHIP.owns(GLOBAL_SHARD):
+        return
+    db = SessionLocal()
+    try:
+        teams = _teams(db)
+        if not teams:
+            return
+        # Retention is global; the job is filed under the first team, but claimed by the global shard's
+        # owner (see process_next_job) whichever worker owns that team
+        job, created = submit_job(db, teams[0][0], "retention", dedupe_key="daily", owner="scheduler")
+        log.info(f"retention {'queued' if created else 'already queued'}: job {job.id}")
+    finally:
+        db.close()
+
+# ---- job handlers ----
+
+def _team_version(db, team_id: int) -> int:
+    return get_data_versions(db, [team_scope(team_id)])[team_scope(team_id)]
+
+def _refresh_metrics(db, team_id: int) -> None:
+    # Bursts of syncs (git + jira, API triggers) coalesce into one recompute per team
+    job, created = debounce_job(db, team_id, "metrics", "snapshot",
+                                delay_seconds=settings.metrics_refresh_debounce_seconds,
+                                max_delay_seconds=settings.metrics_refresh_max_delay_seconds)
+    log.info(f"metrics refresh for team {team_id} {'queued' if created else 'debounced'}: job {job.id}")
+
+def _run_sync_git(db, job: models.Job) -> dict:
+    # Ingest only bumps the team's data version when a row actually changed
+    before = _team_version(db, job.team_id)
+    n = sync_team_git(team_id=job.team_id, db=db, since_days=job_payload(job).get("since_days", 30))
+    log.info(f"git sync completed")
+    _record_job_run(db, job.team_id, "sync_git")
+    changed = _team_version(db, job.team_id) != before
+    if changed:
+        _refresh_metrics(db, job.team_id)
+    return {"prs_synced": n, "changed": changed}
+
+def _run_sync_jira(db, job: models.Job) -> dict:
+    before = _team_version(db, job.team_id)
+    m = sync_jira(team_id=job.team_id, db=db)
+    log.info(f"jira synced: {m} issues")
+    changed = _team_version(db, job.team_id) != before
+    if changed:
+        _refresh_metrics(db, job.team_id)
+    return {"issues_synced": m, "changed": changed}
+
+def _run_metrics(db, job: models.Job) -> dict:
+    n = snapshot_metrics(team_id=job.team_id, db=db, as_of=dt.date.today())
+    log.info(f"metrics snapshotted: {n}")
+    if settings.context_prewarm:
+        # The next plan run for this team (on this worker) starts from the cached packet. Rebuilt
+        # unconditionally: today's snapshots were just rewritten, so any cached packet is stale
+        refresh_context_packet(db.query(models.Team).filter_by(id=job.team_id).one(), db)
+    return {"metrics_snapshotted": n}
+
+def _run_retention(db, job: models.Job) -> dict:
+    return run_retention(db, progress=lambda p: report_progress(job.id, p))
+
+def _run_bulk_export(db, job: models.Job) -> dict:
+    from app.services.bulk import export_team, queued_dir
+    payload = job_payload(job)
+    return export_team(job.team_id, queued_dir(payload["dir"]), payload.get("format", "parquet"), payload.get("tables"),
+                       progress=lambda p: report_progress(job.id, p))
+
+def _run_bulk_import(db, job: models.Job) -> dict:
+    from app.services.bulk import import_team, queued_dir
+    payload = job_payload(job)
+    counts = import_team(job.team_id, queued_dir(payload["dir"]), payload.get("tables"),
+                         progress=lambda p: report_progress(job.id, p))
+    if any(c["inserted"] for c in counts.values()):
+        _refresh_metrics(db, job.team_id)
+    return counts
+
+JOB_HANDLERS = {
+    "sync_git": _run_sync_git,
+    "sync_jira": _run_sync_jira,
+    "metrics": _run_metrics,
+    "weekly_plan": run_plan_job,
+    "retention": _run_retention,
+    "bulk_export": _run_bulk_export,
+    "bulk_import": _run_bulk_import,
+}
+
+def process_next_job(db) -> bool:
+    job = claim_next_job(db, WORKER_ID, list(JOB_HANDLERS), team_ids=MEMBERSHIP.owned_teams(),
+                         unsharded_kinds=["retention"] if MEMBERSHIP.owns(GLOBAL_SHARD) else None)
+    if not job:
+        return False
+    log.info(f"job {job.id} ({job.kind}) started for team {job.team_id}, attempt {job.attempts}")
+    try:
+        with LeaseHeartbeat(job), span(f"job {job.kind}", **{"job.id": job.id, "team.id": job.team_id}), \
+                job_profiler(job, job_payload(job)):
+            result = JOB_HANDLERS[job.kind](db, job)
+    except Exception as exc:
+        log.warning(f"job {job.id} ({job.kind}) failed: {exc}")
+        finish_job(db, job, WORKER_ID, error=str(exc))
+    else:
+        if finish_job(db, job, WORKER_ID, result=result):
+            log.info(f"job {job.id} ({job.kind}) done: {result}")
+    return True
+
+def consume_jobs(stop: threading.Event) -> None:
+    db = SessionLocal()
+    try:
+        while not stop.is_set():
+            try:
+                if not process_next_job(db):
+                    stop.wait(settings.job_poll_seconds)
+            except Exception as exc:
+                log.warning(f"job consumer error: {exc}")
+                db.rollback()
+                stop.wait(settings.job_poll_seconds)
     finally:
         db.close()
 
 def main():
+    setup_tracing("em-aide-worker")
     init_db()
     sched = BlockingScheduler(timezone=settings.model_config.get("timezone", None) or "UTC")
 
-    # Hourly sync
     db = SessionLocal()
     try:
-        team = _get_team(db)
-        last_run = _get_last_job_run_time(db, team.id, "sync_git")
+        _get_team(db)
     finally:
         db.close()
+    MEMBERSHIP.start()
+    start_exporter(settings.worker_metrics_port)
 
-    now = dt.datetime.utcnow()
-    if not last_run:
-        next_sync_run = now
-    else:
-        elapsed = now - last_run
-        if elapsed > dt.timedelta(minutes=settings.sync_interval_minutes):
-            next_sync_run = now
-        else:
-            next_sync_run = last_run + dt.timedelta(minutes=settings.sync_interval_minutes)
-
-    sched.add_job(job_sync, "interval", minutes=settings.sync_interval_minutes, next_run_time=next_sync_run)
+    # Per-team syncs: each tick queues the teams that are due (see _next_sync_time)
+    sched.add_job(job_sync, "interval", seconds=settings.schedule_tick_seconds, next_run_time=dt.datetime.utcnow())
     # Daily metrics (also run once on start)
     sched.add_job(job_metrics, "cron", hour=settings.metrics_daily_hour, minute=settings.metrics_daily_minute)
     sched.add_job(job_metrics, "date", run_date=dt.datetime.utcnow() + dt.timedelta(seconds=10))
+    # Daily retention: rollups, pruning, partition maintenance
+    sched.add_job(job_retention, "cron", hour=settings.retention_daily_hour, minute=settings.retention_daily_minute)
+
+    # Queue consumers: sync, metrics and plan jobs from both the API and the scheduler, for all teams.
+    # JOB_WORKER_CONCURRENCY caps total parallelism, JOB_MAX_RUNNING_PER_TEAM what one team can take.
+    stop = threading.Event()
+    consumers = [threading.Thread(target=consume_jobs, args=(stop,), name=f"job-consumer-{i}", daemon=True)
+                 for i in range(settings.job_worker_concurrency)]
+    for t in consumers:
+        t.start()
 
     print("[worker] started. Press Ctrl+C to exit.")
-    sched.start()
+    try:
+        sched.start()
+    finally:
+        stop.set()
+        MEMBERSHIP.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,13 @@
+#!/bin/bash
+# Streaming replica of the db service: clone it with pg_basebackup on first start, then run as a hot standby.
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+  until pg_basebackup -h "${PRIMARY_HOST:-db}" -U replicator -D "$PGDATA" -Fp -Xs -R -P; do
+    echo "waiting for primary..."
+    sleep 2
+  done
+  chmod 0700 "$PGDATA"
+fi
+
+exec postgres -c hot_standby=on
@@ -0,0 +1,43 @@
+"""packet_version moves whenever the inputs of build_context_packet do, including in-place updates.
+
+Needs a scratch Postgres database, like test_query_plans:
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost:5432/emaide_test python -m pytest tests
+"""
+import os
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+from app import models  # noqa: E402
+from app.context.builder import packet_version  # noqa: E402
+from app.db import SessionLocal, init_db  # noqa: E402
+from app.metrics.compute import snapshot_metrics  # noqa: E402
+from app.perf.synthetic import seed_team  # noqa: E402
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+def test_same_day_metric_update_changes_packet_version(db) -> None:
+    team_id = seed_team(db, prs=200, seed=0, repos=2, days=30)
+    snapshot_metrics(team_id, db)
+    snapshots = db.query(models.MetricSnapshot).filter_by(team_id=team_id)
+    count = snapshots.count()
+    before = packet_version(team_id, db)
+
+    # Second run on the same day rewrites today's rows in place: no new rows, created_at unchanged
+    snapshot_metrics(team_id, db)
+
+    assert snapshots.count() == count
+    assert packet_version(team_id, db) != before
@@ -0,0 +1,36 @@
+"""The hot read queries use their composite indexes on a realistically sized dataset.
+
+Seeds synthetic teams into a scratch Postgres database (reused across runs) and checks each query's
+plan with app.perf.explain_check, planner settings left at their defaults:
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost:5432/emaide_test python -m pytest tests
+"""
+import os
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+from app.db import SessionLocal, engine, init_db  # noqa: E402
+from app.perf.explain_check import HOT_QUERIES, check_hot_queries  # noqa: E402
+from app.perf.synthetic import seed_team  # noqa: E402
+
+@pytest.fixture(scope="module")
+def team_id() -> int:
+    init_db()
+    db = SessionLocal()
+    try:
+        # Several teams, so filtering on team_id is selective the way it is in production
+        team_ids = [seed_team(db, prs=3000, seed=seed, repos=3, days=120) for seed in range(5)]
+    finally:
+        db.close()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("ANALYZE")
+    return team_ids[len(team_ids) // 2]
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_its_index(team_id: int, name: str) -> None:
+    assert check_hot_queries(team_id, [name])[name] == []
@@ -1,4 +1,4 @@
-import type { Team, WeeklyPlan, Metric, GitPullRequestMap, Health } from "./types";
+import type { Team, WeeklyPlan, Metric, GitPullRequestMap, Health, Action, Risk, Job, JobSubmission, DashboardData, DashboardSection } from "./types";
 
 async function request<T>(path: string, init?: RequestInit): Promise<T> {
   const res = await fetch(path, init);
@@ -11,16 +11,78 @@ async function request<T>(path: string, init?: RequestInit): Promise<T> {
 
 // These exist as /api aliases in the “one-command” backend zip
 export const getTeams = () => request<Team[]>("/api/teams");
-export const snapshotMetrics = (teamId: number) =>
-  request(`/api/teams/${teamId}/metrics/snapshot`, { method: "POST" });
+
+// Syncs and snapshots are queued on the worker; these resolve once the job has finished.
+const submitAndWait = async (path: string) => {
+  const submission = await request<JobSubmission>(path, { method: "POST" });
+  return waitForJob(submission.job_id);
+};
+
+export const snapshotMetrics = (teamId: number) => submitAndWait(`/api/teams/${teamId}/metrics/snapshot`);
+
+// Queues a plan run on the worker; duplicate clicks coalesce onto the in-flight job.
 export const runWeeklyPlan = (teamId: number) =>
-  request(`/api/teams/${teamId}/plan/run`, { method: "POST" });
+  request<JobSubmission>(`/api/teams/${teamId}/plan/run`, { method: "POST" });
+
+export const getJob = (jobId: number) => request<Job>(`/api/jobs/${jobId}`);
+
+// Resolves when the job finishes (SSE status events), rejects if it fails.
+export const waitForJob = (jobId: number, onStatus?: (job: Job) => void) =>
+  new Promise<Job>((resolve, reject) => {
+    const source = new EventSource(`/api/jobs/${jobId}/events`);
+    source.addEventListener("status", (e) => {
+      const job = JSON.parse((e as MessageEvent).data) as Job;
+      onStatus?.(job);
+      if (job.status === "done") {
+        source.close();
+        resolve(job);
+      } else if (job.status === "error") {
+        source.close();
+        reject(new Error(job.error ?? `job ${jobId} failed`));
+      }
+    });
+    source.addEventListener("error", () => {
+      source.close();
+      reject(new Error(`lost connection while waiting for job ${jobId}`));
+    });
+  });
+export type PlanStreamHandlers = {
+  onAction?: (action: Action) => void;
+  onRisk?: (risk: Risk) => void;
+  onPlan?: (plan: WeeklyPlan) => void;
+  onError?: (message: string) => void;
+};
+
+// Streams a plan run over SSE; actions/risks arrive as soon as the model finishes each one.
+// Returns a function that closes the stream.
+export const streamWeeklyPlan = (teamId: number, handlers: PlanStreamHandlers): (() => void) => {
+  const source = new EventSource(`/api/teams/${teamId}/plan/stream`);
+  let finished = false;
+  const finish = () => {
+    finished = true;
+    source.close();
+  };
+  source.addEventListener("action", (e) => handlers.onAction?.(JSON.parse((e as MessageEvent).data)));
+  source.addEventListener("risk", (e) => handlers.onRisk?.(JSON.parse((e as MessageEvent).data)));
+  source.addEventListener("plan", (e) => {
+    finish();
+    handlers.onPlan?.(JSON.parse((e as MessageEvent).data).plan as WeeklyPlan);
+  });
+  source.addEventListener("error", (e) => {
+    if (finished) return;
+    finish();
+    const data = (e as MessageEvent).data;
+    handlers.onError?.(data ? JSON.parse(data).detail : "plan stream failed");
+  });
+  return finish;
+};
+
 export const getLatestPlan = async (teamId: number): Promise<WeeklyPlan | null> => {
   try {
-    const data = await request<{ weekly_plan_id: number; plan: string }>(
-      `/api/teams/${teamId}/plan/latest`
+    const data = await request<{ weekly_plan_id: number; plan: WeeklyPlan }>(
+      `/api/v2/teams/${teamId}/plan/latest`
     );
-    return JSON.parse(data.plan) as WeeklyPlan;
+    return data.plan;
   } catch {
     return null;
   }
@@ -28,10 +90,8 @@ export const getLatestPlan = async (teamId: number): Promise<WeeklyPlan | null>
 
 // Git sync endpoint might be non-/api in your backend (depends on whether you added the alias).
 // This calls the non-/api path which should exist if you implemented manual sync earlier.
-export const syncGit = (teamId: number) =>
-  request(`/api/teams/${teamId}/sync/git`, { method: "POST" });
-export const syncJira = (teamId: number) =>
-  request(`/api/teams/${teamId}/sync/jira`, { method: "POST" });
+export const syncGit = (teamId: number) => submitAndWait(`/api/teams/${teamId}/sync/git`);
+export const syncJira = (teamId: number) => submitAndWait(`/api/teams/${teamId}/sync/jira`);
 
 export const getLatestMetrics = async (teamId: number): Promise<Metric[]> => {
   // expects backend endpoint: GET /api/teams/{team_id}/metrics/latest
@@ -45,3 +105,11 @@ export const getLlmContextPreview = (teamId: number) =>
   request<any>(`/api/teams/${teamId}/llm/context/preview`);
 
 export const getHealth = () => request<Health>("/api/health");
+
+// One round trip for everything the dashboard renders; the server loads sections concurrently.
+export const getDashboard = (teamId: number, fields: DashboardSection[]) =>
+  request<DashboardData>(`/api/teams/${teamId}/dashboard?fields=${fields.join(",")}`);
+
+// Dashboard of the first team plus its team_id: the initial page load in one request.
+export const getDefaultDashboard = (fields: DashboardSection[]) =>
+  request<DashboardData>(`/api/dashboard?fields=${fields.join(",")}`);
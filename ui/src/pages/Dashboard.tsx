@@ -1,6 +1,6 @@
-import { useEffect, useMemo, useState } from "react";
-import type { Team, WeeklyPlan, Metric, GitPullRequestMap } from "../types";
-import { getTeams, getLatestPlan, runWeeklyPlan, snapshotMetrics, syncGit, syncJira, getLatestMetrics, getGitPullRequests, getLlmContextPreview, getHealth } from "../api";
+import { useEffect, useMemo, useRef, useState } from "react";
+import type { Team, WeeklyPlan, Metric, GitPullRequestMap, DashboardData, DashboardSection } from "../types";
+import { getDashboard, getDefaultDashboard, streamWeeklyPlan, snapshotMetrics, syncGit, syncJira, getLlmContextPreview } from "../api";
 import { Card } from "../components/Card";
 import { Button } from "../components/Button";
 import { DashboardCard } from "../components/DashboardCard";
@@ -25,6 +25,8 @@ const formatNumber = (value: number | null, digits = 1) => {
 
 type Toast = { kind: "ok" | "error"; message: string } | null;
 
+const TEAM_SECTIONS: DashboardSection[] = ["health", "plan", "metrics", "pull_requests", "context"];
+
 export default function Dashboard() {
   const [teams, setTeams] = useState<Team[]>([]);
   const [teamId, setTeamId] = useState<number | null>(null);
@@ -41,6 +43,8 @@ export default function Dashboard() {
   const [showMetricsHistory, setShowMetricsHistory] = useState(false);
   const [activeTab, setActiveTab] = useState<"dashboard" | "plan">("dashboard");
   const [environment, setEnvironment] = useState<string | null>(null);
+  // Team whose data came with the initial load, so selecting it doesn't fetch it again
+  const preloadedTeam = useRef<number | null>(null);
 
   const selectedTeam = useMemo(() => teams.find(t => t.id === teamId) ?? null, [teams, teamId]);
   const canPreviewLlm = environment === "local" || environment === "dev";
@@ -82,52 +86,47 @@ export default function Dashboard() {
     return metrics.filter((m) => new Date(m.as_of_date) >= cutoff);
   }, [metrics]);
 
-  const loadTeamData = async (id: number, includePreview: boolean) => {
-    const p = await getLatestPlan(id);
+  const applyTeamData = (data: DashboardData) => {
+    setEnvironment(data.health?.environment ?? null);
+
+    const p = data.plan?.plan ?? null;
     setPlan(p);
     setRawJson(p ? JSON.stringify(p, null, 2) : null);
+    setMetrics(data.metrics ?? []);
+    setPrs(data.pull_requests ?? null);
+    // context is null unless the server allows previews (local/dev)
+    setContextEntities(Array.isArray(data.context?.entities) ? data.context.entities : []);
 
-    const ms = await getLatestMetrics(id);
-    setMetrics(ms);
-
-    const prs = await getGitPullRequests(id);
-    setPrs(prs);
-
-    if (!includePreview) {
-      setContextEntities([]);
-      return;
-    }
-
-    try {
-      const ctx = await getLlmContextPreview(id);
-      setContextEntities(Array.isArray(ctx?.entities) ? ctx.entities : []);
-    } catch {
-      setContextEntities([]);
-    }
+    const failed = Object.keys(data.errors ?? {});
+    if (failed.length) setToast({ kind: "error", message: `Failed to load: ${failed.join(", ")}` });
   };
 
+  const loadTeamData = async (id: number) => applyTeamData(await getDashboard(id, TEAM_SECTIONS));
+
   useEffect(() => {
-    (async () => {
-      const [teamsRes, healthRes] = await Promise.allSettled([getTeams(), getHealth()]);
-      if (teamsRes.status === "fulfilled") {
-        setTeams(teamsRes.value);
-        if (teamsRes.value.length && teamId == null) setTeamId(teamsRes.value[0].id);
-      } else {
-        setToast({ kind: "error", message: teamsRes.reason?.message ?? String(teamsRes.reason) });
-      }
-      if (healthRes.status === "fulfilled") {
-        setEnvironment(healthRes.value.environment ?? null);
-      }
-    })();
+    getDefaultDashboard(["teams", ...TEAM_SECTIONS])
+      .then((data) => {
+        setTeams(data.teams ?? []);
+        if (data.team_id != null && teamId == null) {
+          preloadedTeam.current = data.team_id;
+          applyTeamData(data);
+          setTeamId(data.team_id);
+        }
+      })
+      .catch((e: any) => setToast({ kind: "error", message: e?.message ?? String(e) }));
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
   useEffect(() => {
     if (!teamId) return;
-    loadTeamData(teamId, canPreviewLlm).catch((e: any) => {
+    if (preloadedTeam.current === teamId) {
+      preloadedTeam.current = null;
+      return;
+    }
+    loadTeamData(teamId).catch((e: any) => {
       setToast({ kind: "error", message: e?.message ?? String(e) });
     });
-  }, [teamId, canPreviewLlm]);
+  }, [teamId]);
 
   useEffect(() => {
     if (!toast) return;
@@ -143,7 +142,7 @@ export default function Dashboard() {
       setToast({ kind: "ok", message: `${label} complete` });
 
       if (teamId) {
-        await loadTeamData(teamId, canPreviewLlm);
+        await loadTeamData(teamId);
       }
       onSuccess?.();
 
@@ -154,6 +153,21 @@ export default function Dashboard() {
     }
   };
 
+  const runPlanStreaming = () =>
+    act("Run weekly plan", () => {
+      setActiveTab("plan");
+      setPlan({ week_start: "", generated_at: "", top_actions: [], top_risks: [], summary: "" });
+      setRawJson(null);
+      return new Promise<WeeklyPlan>((resolve, reject) => {
+        streamWeeklyPlan(teamId!, {
+          onAction: (a) => setPlan((p) => (p ? { ...p, top_actions: [...p.top_actions, a] } : p)),
+          onRisk: (r) => setPlan((p) => (p ? { ...p, top_risks: [...p.top_risks, r] } : p)),
+          onPlan: resolve,
+          onError: (message) => reject(new Error(message)),
+        });
+      });
+    });
+
   const prTotal = latestMetric("pr_count") ?? 0;
   const prOpen = latestMetric("pr_open_count") ?? 0;
   const prNeedsReview = latestMetric("pr_low_review_coverage_count") ?? 0;
@@ -297,7 +311,7 @@ export default function Dashboard() {
           label={busy === "Run weekly plan" ? "Planning…" : "Run weekly plan"}
           disabled={!teamId || !!busy}
           tone="green"
-          onClick={() => act("Run weekly plan", () => runWeeklyPlan(teamId!), () => setActiveTab("plan"))}
+          onClick={runPlanStreaming}
         />
         {canPreviewLlm ? (
           <Button
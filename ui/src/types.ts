@@ -46,3 +46,34 @@ export type Health = {
   project: string;
   environment?: string;
 };
+
+export type JobStatus = "queued" | "running" | "done" | "error";
+
+export type Job = {
+  id: number;
+  team_id: number;
+  kind: string;
+  status: JobStatus;
+  created_at: string;
+  started_at?: string | null;
+  finished_at?: string | null;
+  progress?: any;
+  result?: any;
+  error?: string | null;
+};
+
+export type JobSubmission = { job_id: number; status: JobStatus; coalesced: boolean };
+
+export type DashboardSection = "teams" | "health" | "metrics" | "plan" | "pull_requests" | "llm_runs" | "context";
+
+export type DashboardData = {
+  team_id?: number | null; // only from the default-team dashboard
+  teams?: Team[];
+  health?: Health;
+  metrics?: Metric[];
+  plan?: { weekly_plan_id: number; plan: WeeklyPlan } | null;
+  pull_requests?: GitPullRequestMap[];
+  llm_runs?: any[];
+  context?: any | null;
+  errors?: Partial<Record<DashboardSection, string>>;
+};